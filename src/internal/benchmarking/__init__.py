@@ -0,0 +1,2 @@
+# This file makes the 'benchmarking' directory a Python package.
+# Shared helpers for the load tests and benchmark scripts in src/scripts.
@@ -0,0 +1,188 @@
+"""
+Synthetic corpus generator for the retrieval benchmarks.
+
+Writes N fake chunks in the same layout the real pipeline produces:
+    <root>/processed_syllabi/<course>/chunks.parquet          (same keys as embeddings_pipeline)
+    <root>/processed_syllabi/<course>/embeddings.npy          (float32, row-aligned with the chunks)
+    <root>/chroma_db/                                         (collection "rag_documents")
+    <root>/bm25_index/                                        (bm25s index + chunk_ids.json)
+    <root>/chunk_store/                                       (texts + metadata, see chunk_store.py)
+
+Text is drawn from a Zipf-distributed pseudo vocabulary with course-specific topic
+words, and vectors are clustered around a per-course centre, so both retrieval legs
+see realistic score distributions without running the embedding model.
+"""
+import json
+import os
+import string
+import time
+
+import numpy as np
+
+from internal.database_setup.bm25_indexer import build_index
+from internal.database_setup.chroma_db import init_db, get_collection
+from internal.database_setup.chunk_store import build_store
+from internal.database_setup.chunk_files import (
+    write_chunks, read_chunks, write_embeddings, load_embeddings, has_chunks, chroma_metadata)
+
+EMBED_DIM = 1024
+COLLECTION = "rag_documents"
+
+
+def make_vocabulary(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Pronounceable-ish pseudo words of 3-10 letters."""
+    letters = np.array(list(string.ascii_lowercase))
+    lengths = rng.integers(3, 11, size=size)
+    words = {"".join(rng.choice(letters, n)) for n in lengths}
+    while len(words) < size:
+        words.add("".join(rng.choice(letters, int(rng.integers(3, 11)))))
+    return np.array(sorted(words)[:size])
+
+
+def _chunk_lengths(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Word counts per chunk: ~20% short course-page snippets, the rest near the 2048-char splitter limit."""
+    short = rng.random(n) < 0.2
+    return np.where(short, rng.integers(15, 60, n), rng.integers(220, 320, n))
+
+
+def generate_course_chunks(course: str, n_chunks: int, vocab: np.ndarray, probs: np.ndarray,
+                           topic_words: np.ndarray, rng: np.random.Generator) -> list[dict]:
+    """Fake chunks for one course, with the same keys as embeddings_pipeline.process_file."""
+    chunks = []
+    lengths = _chunk_lengths(n_chunks, rng)
+    docs_per_course = max(1, n_chunks // 40)
+    # draw every word of the course at once, then cut it into chunks
+    all_words = vocab[rng.choice(len(vocab), size=int(lengths.sum()), p=probs)]
+    # sprinkle in course topic words so BM25 has something to discriminate on
+    n_topic = len(all_words) // 12
+    all_words[rng.integers(0, len(all_words), n_topic)] = rng.choice(topic_words, n_topic)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    for i in range(n_chunks):
+        words = all_words[offsets[i]:offsets[i + 1]]
+        doc_no = int(rng.integers(0, docs_per_course))
+        chunks.append({
+            "document_type": "research_paper",
+            "title": f"{course} reading {doc_no}",
+            "author": "Synthetic Author",
+            "source": f"synthetic/{course}/doc_{doc_no}.pdf",
+            "date_published": "2024-01-01",
+            "keywords": "Unavailable",
+            "flag": "",
+            "chunk_text": " ".join(words),
+            "chunk_id": f"{course}_doc_{doc_no}.json_chunk_{i+1}",
+            "course": course,
+        })
+    return chunks
+
+
+def course_vectors(n: int, centre: np.ndarray, rng: np.random.Generator, spread: float = 1.0) -> np.ndarray:
+    vecs = centre + spread * rng.standard_normal((n, centre.shape[0]), dtype=np.float32) / np.sqrt(centre.shape[0])
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs.astype(np.float32)
+
+
+def write_corpus(root: str, n_chunks: int, n_courses: int = 16, dim: int = EMBED_DIM, seed: int = 0,
+                 vocab_size: int = 50_000, n_queries: int = 200,
+                 build_chroma: bool = True, build_bm25: bool = True) -> dict:
+    """
+    Generate and index a synthetic corpus under `root`. Returns the wall time of
+    each build step in seconds.
+    """
+    rng = np.random.default_rng(seed)
+    processed_dir = os.path.join(root, "processed_syllabi")
+    timings = {}
+
+    t0 = time.perf_counter()
+    vocab = make_vocabulary(vocab_size, rng)
+    ranks = np.arange(1, vocab_size + 1)
+    probs = 1.0 / ranks ** 1.1
+    probs /= probs.sum()
+
+    courses = [f"synthetic_course_{c:02d}" for c in range(n_courses)]
+    per_course = np.full(n_courses, n_chunks // n_courses)
+    per_course[: n_chunks % n_courses] += 1
+    queries_per_course = np.full(n_courses, n_queries // n_courses)
+    queries_per_course[: n_queries % n_courses] += 1
+    queries = []
+    for c, (course, n) in enumerate(zip(courses, per_course)):
+        course_dir = os.path.join(processed_dir, course)
+        os.makedirs(course_dir, exist_ok=True)
+        topic_words = rng.choice(vocab[1000:], 200, replace=False)
+        chunks = generate_course_chunks(course, int(n), vocab, probs, topic_words, rng)
+        centre = rng.standard_normal(dim).astype(np.float32)
+        centre /= np.linalg.norm(centre)
+        vecs = course_vectors(int(n), centre, rng)
+        queries.extend(_make_queries(chunks, vecs, int(queries_per_course[c]), rng))
+        write_chunks(course_dir, chunks)
+        write_embeddings(course_dir, vecs)
+    with open(os.path.join(root, "queries.json"), "w", encoding="utf-8") as f:
+        json.dump(queries, f)
+    timings["generate"] = time.perf_counter() - t0
+
+    if build_chroma:
+        t0 = time.perf_counter()
+        client = init_db(db_path=os.path.join(root, "chroma_db"))
+        collection = get_collection(client, collection_name=COLLECTION)
+        batch = client.get_max_batch_size()
+        for chunks, vecs in iter_courses(processed_dir):
+            for i in range(0, len(chunks), batch):
+                part = chunks[i:i + batch]
+                collection.upsert(
+                    ids=[c["chunk_id"] for c in part],
+                    embeddings=vecs[i:i + batch],
+                    metadatas=[chroma_metadata(c) for c in part],
+                )
+        timings["build_chroma"] = time.perf_counter() - t0
+
+    if build_bm25:
+        t0 = time.perf_counter()
+        build_index(processed_dir=processed_dir, index_dir=os.path.join(root, "bm25_index"))
+        timings["build_bm25"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    build_store(processed_dir=processed_dir, store_dir=os.path.join(root, "chunk_store"))
+    timings["build_chunk_store"] = time.perf_counter() - t0
+
+    with open(os.path.join(root, "corpus_info.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_chunks": n_chunks, "n_courses": n_courses, "dim": dim, "seed": seed,
+                   "build_timings": timings}, f, indent=2)
+    return timings
+
+
+def iter_courses(processed_dir: str):
+    """Yield (chunks, vectors) for every course directory of a synthetic corpus."""
+    for course in sorted(os.listdir(processed_dir)):
+        course_dir = os.path.join(processed_dir, course)
+        if not has_chunks(course_dir):
+            continue
+        yield read_chunks(course_dir), load_embeddings(course_dir)
+
+
+def _make_queries(chunks: list[dict], vecs: np.ndarray, n_queries: int, rng: np.random.Generator,
+                  n_words: int = 6) -> list[dict]:
+    """
+    Query text = a few consecutive words of a random chunk, query vector = a slightly
+    perturbed copy of that chunk's vector.
+    """
+    queries = []
+    for i in rng.integers(0, len(chunks), n_queries):
+        words = chunks[i]["chunk_text"].split()
+        start = int(rng.integers(0, max(1, len(words) - n_words)))
+        vec = vecs[i] + 0.05 * rng.standard_normal(vecs.shape[1], dtype=np.float32) / np.sqrt(vecs.shape[1])
+        queries.append({"text": " ".join(words[start:start + n_words]),
+                        "embedding": (vec / np.linalg.norm(vec)).tolist(),
+                        "source_id": chunks[i]["chunk_id"]})
+    return queries
+
+
+def load_queries(root: str) -> list[tuple[str, np.ndarray]]:
+    """(query text, query vector) pairs saved next to the corpus by write_corpus."""
+    with open(os.path.join(root, "queries.json"), encoding="utf-8") as f:
+        return [(q["text"], np.asarray(q["embedding"], dtype=np.float32)) for q in json.load(f)]
+
+
+def dir_size_mb(path: str) -> float:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+    return total / 2**20
@@ -0,0 +1,135 @@
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import psutil
+
+
+def percentiles(values, points=(50, 90, 95, 99)) -> dict:
+    """
+    Summarise a list of latencies (seconds) as count/mean/max and the requested percentiles.
+    Returns an empty-count summary if no values were recorded.
+    """
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=float)
+    summary = {
+        "count": int(arr.size),
+        "mean": float(arr.mean()),
+        "min": float(arr.min()),
+        "max": float(arr.max()),
+    }
+    for p, v in zip(points, np.percentile(arr, points)):
+        summary[f"p{p}"] = float(v)
+    return summary
+
+
+class ResourceSampler:
+    """
+    Samples CPU utilisation and resident memory of the current process in a
+    background thread. Use as a context manager around the measured workload.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.cpu_percent = []
+        self.rss_bytes = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._cpu_times_start = None
+        self._wall_start = None
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def _run(self):
+        self.process.cpu_percent(None)  # first call only primes the counter
+        while not self._stop.wait(self.interval):
+            self.cpu_percent.append(self.process.cpu_percent(None))
+            self.rss_bytes.append(self.process.memory_info().rss)
+
+    def __enter__(self):
+        self._cpu_times_start = self.process.cpu_times()
+        self._wall_start = time.perf_counter()
+        self.rss_bytes.append(self.process.memory_info().rss)
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        end = self.process.cpu_times()
+        self.cpu_seconds = (end.user - self._cpu_times_start.user) + (end.system - self._cpu_times_start.system)
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.rss_bytes.append(self.process.memory_info().rss)
+        return False
+
+    @property
+    def peak_rss_mb(self) -> float:
+        return max(self.rss_bytes) / 2**20 if self.rss_bytes else 0.0
+
+    def summary(self) -> dict:
+        rss_mb = [b / 2**20 for b in self.rss_bytes]
+        return {
+            "cpu_seconds": self.cpu_seconds,
+            "wall_seconds": self.wall_seconds,
+            "cpu_cores_used": self.cpu_seconds / self.wall_seconds if self.wall_seconds else None,
+            "cpu_percent_mean": float(np.mean(self.cpu_percent)) if self.cpu_percent else None,
+            "cpu_percent_max": float(np.max(self.cpu_percent)) if self.cpu_percent else None,
+            "rss_mb_start": rss_mb[0] if rss_mb else None,
+            "rss_mb_mean": float(np.mean(rss_mb)) if rss_mb else None,
+            "rss_mb_peak": max(rss_mb) if rss_mb else None,
+        }
+
+
+def git_commit() -> str | None:
+    """Return the current git commit hash, or None outside a git checkout."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(args: dict | None = None) -> dict:
+    """Common header for every benchmark report, so runs can be compared across commits."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": args or {},
+    }
+
+
+def write_report(report: dict, path) -> Path:
+    """Write a benchmark report as JSON (numpy scalars converted) and return the path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    def default(o):
+        if isinstance(o, (np.floating, np.integer)):
+            return o.item()
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        return str(o)
+
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=default, ensure_ascii=False)
+    print(f"Report written to {path}")
+    return path
+
+
+def default_report_path(name: str, out_dir: str = "output/benchmarks") -> Path:
+    """output/benchmarks/<name>_<UTC timestamp>.json"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return Path(out_dir) / f"{name}_{stamp}.json"
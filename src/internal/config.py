@@ -0,0 +1,18 @@
+"""
+config.yaml loading, kept free of heavy imports so the scraper (and its worker
+processes) can read the config without pulling in the retrieval stack.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+
+@lru_cache(maxsize=1)
+def get_config() -> dict:
+    """
+    Load and cache the YAML config file.
+    """
+    cfg_path = Path(__file__).resolve().parents[2] / "config.yaml"
+    with cfg_path.open(encoding="utf-8") as f:
+        return yaml.safe_load(f)
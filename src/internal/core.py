@@ -1,35 +1,142 @@
-import os, yaml, sys
+import os, sys
 import re
-from functools import lru_cache
+import time
+import threading
 from dotenv import load_dotenv
-from sentence_transformers import CrossEncoder
 from joblib import load
-from pathlib import Path
 
-from internal.uncertainty_estimation.uncertainty_estimator_factory import get_uncertainty_estimator, compute_uncertainty
-from internal.retrievers.semantic_retriever import load_embedding_model, retrieve_documents
-from internal.database_setup.chroma_db import init_db, get_collection
-from internal.retrievers.bm25_retriever import bm25_retrieve
+from internal.config import get_config
+from internal.uncertainty_estimation.uncertainty_estimator_factory import get_uncertainty_estimator, compute_uncertainty, load_deberta, nli_entry, NLI_MODEL
+from internal.model_registry import ModelRegistry, set_registry, torch_threads_for
+from internal.retrievers.semantic_retriever import embed_query, retrieve_documents, search_collection
+from internal.inference_backend import load_sentence_transformer
+from internal.database_setup.chunk_store import ChunkStore
+from internal.database_setup.vector_store import open_vector_store
+from internal.retrievers.bm25_retriever import bm25_retrieve, load_index
+from internal.retrievers.exact_hybrid import ExactHybridScorer
+from internal.retrievers.cascade import shortlist
+from internal.retrievers.reranker import RerankerService
 from internal.providers.provider import GeneratorProvider
 from internal.providers.provider_utils import ensure_provider_input
 
 load_dotenv(override=True)
 
+EMBEDDING_MODEL = "intfloat/multilingual-e5-large-instruct"
+_models = None
+_models_lock = threading.Lock()
 
-@lru_cache(maxsize=1)
-def get_reranker():
-    # Loads the cross-encoder for MS MARCO L-6
-    return CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
 
-
-@lru_cache(maxsize=1)
-def get_config() -> dict:
+def get_models() -> ModelRegistry:
+    """
+    The process-wide model registry, configured from the `models:` section on first
+    use, with a loader for every model and index the pipeline uses.
+    """
+    global _models
+    with _models_lock:
+        if _models is None:
+            cfg = get_config()
+            models_cfg = cfg.get('models', {})
+            threads = torch_threads_for(models_cfg.get('max_concurrency', 1), models_cfg.get('torch_threads', 'auto'))
+            _models = ModelRegistry(memory_budget_mb=models_cfg.get('memory_budget_mb', 0),
+                                    idle_unload_s=models_cfg.get('idle_unload_s', 0), torch_threads=threads)
+            _register_models(_models, cfg)
+            set_registry(_models)
+        return _models
+
+
+def _register_models(models: ModelRegistry, cfg: dict):
+    retr_cfg = cfg.get('retrieval', {})
+    backend = retr_cfg.get('vector_store', 'chroma')
+    nli_cfg = cfg.get('uncertainty', {}).get('deg_mat', {})
+    # Cross-encoder for MS MARCO L-6 behind a score cache, settings from retrieval.reranker
+    models.register('reranker', lambda: RerankerService(**retr_cfg.get('reranker', {}),
+                                                        backend=inference_backend('reranker')))
+    models.register('embedding', lambda: load_sentence_transformer(EMBEDDING_MODEL, device=cfg.get('device', 'cpu'),
+                                                                   backend=inference_backend('embedding')))
+    nli_args = (NLI_MODEL, nli_cfg.get('batch_size', 10), nli_cfg.get('device', 'cpu'), inference_backend('nli'))
+    models.register(nli_entry(*nli_args), lambda: load_deberta(*nli_args))
+    # memory-mapped indexes: loaded once, never unloaded
+    models.register('vector_store', lambda: _open_vector_store(backend), pinned=True)
+    models.register('chunk_store', lambda: ChunkStore("data/chunk_store"), pinned=True)
+    models.register('bm25_index', lambda: load_index(mmap=True, index_dir="data/bm25_index"), pinned=True)
+
+
+def preload_models(names: list[str] | None = None) -> ModelRegistry:
     """
-    Load and cache the YAML config file.
+    Start loading `names` (default: models.preload, "auto" = everything the configured
+    pipeline uses) in background threads; check get_models().status() for progress.
     """
-    cfg_path = Path(__file__).resolve().parents[2] / "config.yaml"
-    with cfg_path.open(encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    cfg = get_config()
+    if names is None:
+        names = cfg.get('models', {}).get('preload', 'auto')
+    if names == 'auto':
+        names = ['vector_store', 'chunk_store', 'bm25_index', 'embedding', 'reranker']
+        if cfg.get('uncertainty', {}).get('method') == 'deg_mat':
+            names.append('nli')
+    # "nli" is the configured deg_mat model, registered under its settings
+    nli_cfg = cfg.get('uncertainty', {}).get('deg_mat', {})
+    nli_name = nli_entry(NLI_MODEL, nli_cfg.get('batch_size', 10), nli_cfg.get('device', 'cpu'), inference_backend('nli'))
+    names = [nli_name if name == 'nli' else name for name in names or []]
+    models = get_models()
+    models.preload(names)
+    return models
+
+
+def get_reranker() -> RerankerService:
+    return get_models().get('reranker')
+
+
+def get_embedding_model(device: str = None):
+    # the registered model runs on the configured device; another device gets its own entry
+    if device is None or device == get_config().get('device', 'cpu'):
+        return get_models().get('embedding')
+    return get_models().get(f'embedding:{device}', loader=lambda: load_sentence_transformer(
+        EMBEDDING_MODEL, device=device, backend=inference_backend('embedding')))
+
+
+def get_chunk_store() -> ChunkStore:
+    # Memory-mapped chunk texts and metadata, shared by both retrieval legs
+    return get_models().get('chunk_store')
+
+
+def _open_vector_store(backend: str):
+    # Dense index of the semantic leg: the Chroma collection or the flat matrix
+    if backend == "chroma":
+        return open_vector_store("chroma", db_path="data/chroma_db", collection_name="rag_documents")
+    if backend == "quantized":
+        return open_vector_store("quantized", **get_config().get('retrieval', {}).get('quantized', {}))
+    return open_vector_store(backend)
+
+
+def get_vector_store(backend: str = "chroma"):
+    models = get_models()
+    if backend == get_config().get('retrieval', {}).get('vector_store', 'chroma'):
+        return models.get('vector_store')
+    name = f'vector_store:{backend}'
+    if name not in models:
+        models.register(name, lambda: _open_vector_store(backend), pinned=True)
+    return models.get(name)
+
+
+def get_bm25_index():
+    # (retriever, chunk_ids), memory-mapped; loaded once instead of per query
+    return get_models().get('bm25_index')
+
+
+def get_hybrid_scorer(backend: str = "flat") -> ExactHybridScorer:
+    # Full-corpus dense + BM25 scoring for retrieval.method: exact_hybrid
+    models = get_models()
+    name = f'hybrid_scorer:{backend}'
+    if name not in models:
+        cfg = get_config().get('retrieval', {}).get('exact_hybrid', {})
+        models.register(name, lambda: ExactHybridScorer(get_vector_store(backend), get_bm25_index(), **cfg),
+                        pinned=True)
+    return models.get(name)
+
+
+def inference_backend(model_key: str) -> str:
+    """Configured backend ("torch", "int8" or "onnx") of one model, see inference: in config.yaml."""
+    return get_config().get('inference', {}).get(model_key, 'torch')
 
 def _resolve_model_id(model_cfg: dict, provider: str, override: str | None) -> str:
     """
@@ -81,8 +188,11 @@ def init_provider(model_type: str, model_id: str, api_key: str, cfg: dict):
         raise ValueError(f"Invalid model_type {model_type}")
 
 def init_estimator(cfg: dict, override_method: str = None):
+    get_models()  # the NLI model of deg_mat is loaded through the registry
     method = override_method or cfg["uncertainty"]["method"]
-    params = cfg["uncertainty"].get(method, {})
+    params = dict(cfg["uncertainty"].get(method, {}))
+    if method == "deg_mat":
+        params.setdefault("backend", cfg.get("inference", {}).get("nli", "torch"))
     return get_uncertainty_estimator(method, **params)
 
 
@@ -94,6 +204,153 @@ def init_scaler(cfg):
     print(f'scaler path found {scaler_path}')
     return load(scaler_path)
 
+def hybrid_retrieve(
+    query: str,
+    embed_query_text: str,
+    model,
+    collection,
+    sem_k: int,
+    lex_k: int,
+    bm25_index=None,
+    query_embedding=None,
+) -> tuple[list[dict], dict]:
+    """
+    Semantic (Chroma) and lexical (BM25) legs of the hybrid retrieval, combined
+    with semantic-first deduplication by id. Docs carry only ids and scores;
+    hydrate them with the chunk store before reranking.
+
+    `bm25_index` is an already loaded index (see bm25_retriever.load_index) and
+    `query_embedding` a precomputed query vector; both are optional and mostly
+    used by the benchmarks. Returns (docs, timings).
+    """
+    timings = {}
+
+    # semantic retrieval
+    t0 = time.perf_counter()
+    if query_embedding is None:
+        semantic_docs = retrieve_documents(embed_query_text, model, collection, top_k=sem_k)
+    else:
+        semantic_docs = search_collection(query_embedding, collection, top_k=sem_k)
+    for doc in semantic_docs:
+        doc['source'] = 'semantic'
+    timings['semantic_retrieval'] = time.perf_counter() - t0
+
+    # Lexical retrieval
+    t0 = time.perf_counter()
+    raw_bm25 = bm25_retrieve(query, top_k=lex_k, index=bm25_index)
+    bm_docs = []
+    for doc in raw_bm25:
+        doc['bm25_score'] = doc.pop('score') # rename for clarity
+        doc['source'] = 'bm25'
+        bm_docs.append(doc)
+    timings['bm25_retrieval'] = time.perf_counter() - t0
+
+    # Combine, then remove duplicates *by id* (preserving first occurrence order, sem prevalence)
+    seen = {}
+    combined = semantic_docs + bm_docs
+    retrieved_docs = []
+    for doc in combined:
+        if doc["id"] not in seen:
+            retrieved_docs.append(doc)
+            seen[doc["id"]] = doc
+        elif 'bm25_score' in doc:
+            # keep the BM25 score of chunks both legs found (used by the rerank cascade)
+            seen[doc["id"]]['bm25_score'] = doc['bm25_score']
+    return retrieved_docs, timings
+
+
+def exact_hybrid_retrieve(
+    query: str,
+    embed_query_text: str,
+    model,
+    scorer: ExactHybridScorer,
+    top_k: int,
+    semantic_weight: float = 0.5,
+    query_embedding=None,
+) -> tuple[list[dict], dict]:
+    """
+    Alternative to hybrid_retrieve that scores the whole corpus on both legs and
+    returns one fused top_k (see retrievers/exact_hybrid.py). Returns (docs, timings).
+    """
+    timings = {}
+    if query_embedding is None:
+        t0 = time.perf_counter()
+        query_embedding = embed_query(embed_query_text, model)
+        timings['query_embedding'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    docs = scorer.search(query, query_embedding, top_k, semantic_weight=semantic_weight)
+    timings['exact_hybrid_retrieval'] = time.perf_counter() - t0
+    return docs, timings
+
+
+def retrieve_candidates(
+    query: str,
+    embed_query_text: str,
+    model,
+    collection,
+    retr_cfg: dict,
+) -> tuple[list[dict], dict]:
+    """
+    Rerank candidates (ids and leg scores only) with the retrieval method and
+    top_k / semantic_weight of the `retrieval` config. Returns (docs, timings).
+    """
+    total_top_k = retr_cfg.get('top_k', 100)
+    weight = retr_cfg.get('semantic_weight', 0.5)
+    weight = max(0.0, min(1.0, weight))
+    if retr_cfg.get('method', 'hybrid') == 'exact_hybrid':
+        return exact_hybrid_retrieve(
+            query, embed_query_text, model, get_hybrid_scorer(retr_cfg.get('vector_store', 'chroma')),
+            top_k=total_top_k, semantic_weight=weight)
+
+    sem_k = max(1, int(round(weight * total_top_k)))
+    lex_k = max(1, total_top_k - sem_k)
+    return hybrid_retrieve(query, embed_query_text, model, collection, sem_k=sem_k, lex_k=lex_k)
+
+
+def cascade_shortlist(docs: list[dict], cascade_cfg: dict) -> list[dict]:
+    """
+    Candidates that go to the cross-encoder: all of them, or with the cascade
+    enabled the `shortlist` best by fused leg rank (see retrievers/cascade.py).
+    """
+    if not cascade_cfg.get('enabled', False):
+        return docs
+    return shortlist(docs, cascade_cfg.get('shortlist', 0), method=cascade_cfg.get('method', 'rrf'),
+                     rrf_k=cascade_cfg.get('rrf_k', 60), semantic_weight=cascade_cfg.get('semantic_weight', 0.5))
+
+
+def select_documents(docs: list[dict], threshold: float = 0.3, min_docs: int = 0, max_docs: int = 10) -> list[dict]:
+    """
+    Final context from reranked (best-first) docs: those above the rerank
+    threshold, at least min_docs, at most max_docs.
+    """
+    # Filter candidates above threshold and cap at max to not overwhelm llm
+    filtered = [d for d in docs if d['rerank_score'] > threshold]
+    if len(filtered) < min_docs:
+        filtered = docs[:min_docs]
+    return filtered[:max_docs]
+
+
+def rerank_documents(query: str, docs: list[dict], reranker=None, index_version=None) -> list[dict]:
+    """
+    Scores every (query, doc text) pair with the cross-encoder, attaches
+    `rerank_score` and returns the docs sorted best-first. With a RerankerService
+    scores are cached per (query, chunk_id) until `index_version` changes.
+    """
+    reranker = reranker or get_reranker()
+
+    # Compute relevance scores for each pair, attach scores and sort docs
+    if isinstance(reranker, RerankerService):
+        scores = reranker.score(query, docs, index_version=index_version)
+    else:
+        pairs = [(query, doc['text']) for doc in docs]
+        scores = reranker.predict(pairs) if pairs else []
+    for doc, score in zip(docs, scores):
+        doc['rerank_score'] = score
+    docs.sort(key=lambda d: d['rerank_score'], reverse=True)
+    return docs
+
+
 def rag_pipeline(
     query: str,
     top_k: int,
@@ -118,7 +375,11 @@ def rag_pipeline(
     "calibrated_confidence": A float scaled confidence score (or None).
     "top_k": The top_k value used.
     "n_samples": The number of generated samples.
+    "timings": Wall-clock seconds spent in each pipeline stage.
     """
+    timings = {}
+    t_start = time.perf_counter()
+
     # Prepare query embedding text with optional history
     if chat_history:
         hist_txt = " ".join(
@@ -130,73 +391,51 @@ def rag_pipeline(
         embed_query_text = query
     
     #---- Hybrid Retrieval
-    # Determine weights
     cfg = get_config()
     retr_cfg = cfg.get('retrieval', {})
-    total_top_k = retr_cfg.get('top_k', 100)
-
-    weight = retr_cfg.get('semantic_weight', 0.5)
-    weight = max(0.0, min(1.0, weight))
-    sem_k = max(1, int(round(weight * total_top_k)))
-    lex_k = max(1, total_top_k - sem_k)
 
     # semantic retrieval
-    model = load_embedding_model(device=device)
-    db_client = init_db(db_path="data/chroma_db")
-    collection = get_collection(db_client, collection_name="rag_documents")
+    t0 = time.perf_counter()
+    model = get_embedding_model(device)
+    collection = get_vector_store(retr_cfg.get('vector_store', 'chroma'))
     if collection.count() == 0:
         print('collection count is 0! empty chromadb database')
         return None
-    semantic_docs = retrieve_documents(embed_query_text, model, collection, top_k=sem_k)
-    for doc in semantic_docs:
-        doc['source'] = 'semantic'
+    timings['model_and_db'] = time.perf_counter() - t0
 
-    # Lexical retrieval
-    raw_bm25 = bm25_retrieve(query, top_k=lex_k)
-    bm_docs = []
-    for doc in raw_bm25:
-        doc['bm25_score'] = doc.pop('score') # rename for clarity
-        doc['source'] = 'bm25'
-        bm_docs.append(doc)
+    retrieved_docs, retr_timings = retrieve_candidates(query, embed_query_text, model, collection, retr_cfg)
+    timings.update(retr_timings)
 
-    # Combine, then remove duplicates *by id* (preserving first occurrence order, sem prevalence)
-    seen = set()
-    combined = semantic_docs + bm_docs
-    retrieved_docs = []
-    for doc in combined:
-        if doc["id"] not in seen:
-            retrieved_docs.append(doc)
-            seen.add(doc["id"])
+    # only the cascade shortlist is hydrated and cross-encoded
+    t0 = time.perf_counter()
+    retrieved_docs = cascade_shortlist(retrieved_docs, retr_cfg.get('cascade', {}))
+    timings['cascade'] = time.perf_counter() - t0
 
-    # reranking
-    reranker = get_reranker()
-    pairs = [(query, doc['text']) for doc in retrieved_docs]
+    # both legs return ids only; fetch text and metadata for the rerank candidates
+    t0 = time.perf_counter()
+    retrieved_docs = get_chunk_store().hydrate(retrieved_docs)
+    timings['hydrate'] = time.perf_counter() - t0
 
-    # Compute relevance scores for each pair, attach scores and sort docs
-    scores = reranker.predict(pairs)
-    for doc, score in zip(retrieved_docs, scores):
-        doc['rerank_score'] = score
-    retrieved_docs.sort(key=lambda d: d['rerank_score'], reverse=True)
+    # reranking
+    t0 = time.perf_counter()
+    retrieved_docs = rerank_documents(query, retrieved_docs, index_version=get_chunk_store().version)
+    timings['rerank'] = time.perf_counter() - t0
 
     # threshold score, from config
-    threshold = retr_cfg.get('threshold', 0.3)
-    min_docs = retr_cfg.get('min_docs', 0)
-    max_docs = retr_cfg.get('max_docs', 10)
-
-    # Filter candidates above threshold and cap at max to not overwhelm llm
-    filtered = [d for d in retrieved_docs if d['rerank_score'] > threshold]
-    if len(filtered) < min_docs:
-        filtered = retrieved_docs[:min_docs]
-    retrieved_docs = filtered[:max_docs]
+    retrieved_docs = select_documents(retrieved_docs, threshold=retr_cfg.get('threshold', 0.3),
+                                      min_docs=retr_cfg.get('min_docs', 0), max_docs=retr_cfg.get('max_docs', 10))
 
     # Generation
     samples = []
     if n_samples > 1 and estimator is not None:
+        t0 = time.perf_counter()
         for i in range(n_samples):
             sample = provider.generate(query, retrieved_docs, chat_history)
             samples.append(sample)
+        timings['generation'] = time.perf_counter() - t0
 
         # compute raw value
+        t0 = time.perf_counter()
         raw_uncertainty = compute_uncertainty(estimator, samples)
 
         # apply scaler
@@ -205,6 +444,7 @@ def rag_pipeline(
         else:
             calibrated = scaler.transform([[raw_uncertainty]])[0,0]
             calibrated_confidence = 1 - calibrated
+        timings['uncertainty'] = time.perf_counter() - t0
 
         # build & send the “best‐answer” prompt via the provider helper
         selection_prompt = GeneratorProvider.build_selection_prompt(
@@ -215,7 +455,9 @@ def rag_pipeline(
         )
         #print(f"SELECTION MODEL, SELECTION_PROMPT IS {selection_prompt}")
 
+        t0 = time.perf_counter()
         selection = provider.generate_raw(selection_prompt)
+        timings['selection'] = time.perf_counter() - t0
         print(F"SELECTION MODEL OUTPUT IS: " + selection)
     
         # parse the reply with regex
@@ -239,11 +481,14 @@ def rag_pipeline(
              
     else:
         # Single-sample path
+        t0 = time.perf_counter()
         sample = provider.generate(query, retrieved_docs, chat_history)
+        timings['generation'] = time.perf_counter() - t0
         samples.append(sample)
         final_answer = sample
         calibrated_confidence = None
         raw_uncertainty = None
+    timings['total'] = time.perf_counter() - t_start
     
     return {
         "final_answer": final_answer,
@@ -253,6 +498,7 @@ def rag_pipeline(
         "calibrated_confidence": calibrated_confidence,
         "top_k": top_k,
         "n_samples": n_samples,
+        "timings": timings,
     }
 
 
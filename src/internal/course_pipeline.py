@@ -1,10 +1,11 @@
 import os
 import json
-from internal.scraping.html_scraper import scrape_html
-from internal.scraping.pdf_processor import scrape_pdf
-from internal.scraping.metadata_handler import update_metadata_corrections
+from internal.scraping.scheduler import run_materials
+from internal.scraping.browser_pool import get_browser_backend
+from internal.scraping.metadata_handler import MetadataStore, update_metadata_corrections
 from internal.scraping.utils import get_stable_filename
 from internal.logging_utils.scraping_logger import logger
+from internal.config import get_config
 
 def parse_materials_paths(file_path):
     """
@@ -38,19 +39,26 @@ def parse_materials_paths(file_path):
 
     return materials
 
-def save_scraped_data(course_name, document_data, page_range=None):
-    """Saves extracted data into a JSON file with correct metadata and page range tracking."""
+def save_scraped_data(course_name, document_data, page_range=None, store=None):
+    """
+    Saves extracted data into a JSON file with correct metadata and page range tracking.
+    With a MetadataStore, filenames and corrections come from memory instead of disk.
+    """
 
     output_dir = os.path.join("data/processed_syllabi", course_name, "scraped_data")
     os.makedirs(output_dir, exist_ok=True)
 
-    # create clean and stable filename, that prevents articles with the same title from overwriting
-    save_path = get_stable_filename(output_dir, document_data["title"], document_data["source"], ".json", page_range)
+    if store is not None:
+        save_path = store.stable_filename(output_dir, document_data["title"], document_data["source"], ".json", page_range)
+        document_data.update(store.corrections_for(document_data))
+    else:
+        # create clean and stable filename, that prevents articles with the same title from overwriting
+        save_path = get_stable_filename(output_dir, document_data["title"], document_data["source"], ".json", page_range)
 
-    # Ensure metadata corrections are applied & new entries are added
-    metadata_corrections = update_metadata_corrections(document_data)
-    if document_data["source"] in metadata_corrections:
-        document_data.update(metadata_corrections[document_data["source"]])
+        # Ensure metadata corrections are applied & new entries are added
+        metadata_corrections = update_metadata_corrections(document_data)
+        if document_data["source"] in metadata_corrections:
+            document_data.update(metadata_corrections[document_data["source"]])
 
     # Save data
     with open(save_path, "w", encoding="utf-8") as f:
@@ -59,30 +67,40 @@ def save_scraped_data(course_name, document_data, page_range=None):
     logger.info(f"Saved: {save_path}")
 
 
-def process_course_syllabi(level, course_name):
+def process_course_syllabi(level, course_name, store=None):
     """
     Processes course materials, distinguishing between books, research papers, and articles.
-    Saves extracted data in a structured format.
+    Saves extracted data in a structured format. PDFs and web pages are scraped in
+    parallel (see scraping.scheduler); finished materials are skipped on re-runs.
+    Pass one MetadataStore for several courses to load the corrections only once.
     """
     materials_file = f"data/raw_syllabi/{level}/{course_name}/materials_paths.txt"
     materials = parse_materials_paths(materials_file)
-
-    for material in materials:
-        logger.info(f"Processing: {material['path']}")
-
-        if material["path"].endswith(".pdf"):
-            pdf_data = scrape_pdf(
-                material["path"], 
-                page_range=material["page_range"], 
-                true_page_1=material["true_page_1"]
-            )
-
-            save_scraped_data(course_name, pdf_data, page_range=material["page_range"])
-
-        elif material["path"].startswith("http"):
-            html_data = scrape_html(material["path"])
-            save_scraped_data(course_name, html_data)
-        logger.info('')
+    scraping_cfg = get_config().get("scraping", {})
+    # AU course pages share one pool of headless browsers across the HTML threads
+    get_browser_backend(size=scraping_cfg.get("browser_pool_size", 2))
+
+    own_store = store is None
+    store = store or MetadataStore()
+
+    def save(material, data):
+        save_scraped_data(course_name, data, page_range=material["page_range"], store=store)
+
+    try:
+        counts = run_materials(
+            materials,
+            os.path.join("data/processed_syllabi", course_name),
+            save,
+            pdf_workers=scraping_cfg.get("pdf_workers", 4),
+            html_workers=scraping_cfg.get("html_workers", 8),
+            per_domain_interval=scraping_cfg.get("per_domain_interval", 1.0),
+            pdf_page_workers=scraping_cfg.get("pdf_page_workers", 1),
+        )
+    finally:
+        # also after a crash: materials marked done must keep their corrections entry
+        if own_store:
+            store.flush()
+    logger.info(f"{course_name}: {counts}")
     return
 
 
@@ -94,11 +112,12 @@ if __name__ == "__main__":
     #courses = ['applied_cognitive_science', 'cognition_and_communication', 'cognitive_neuroscience', 'intro_to_cognitive_science', 'Methods_1', 'Methods_2', 'Methods_3', 'Methods_4', 'perception_and_action', 'philosophy_of_cognitive_science', 'social_and_cultural_dynamics']
     courses = ['philosophy_of_cognitive_science']
 
-    for course in courses:
-        os.makedirs(f"data/processed_syllabi/{course}", exist_ok=True)
+    with MetadataStore() as store:
+        for course in courses:
+            os.makedirs(f"data/processed_syllabi/{course}", exist_ok=True)
+
+            logger.info(f'Beginning processing of: {course}')
 
-        logger.info(f'Beginning processing of: {course}')
-        
-        process_course_syllabi(level, f"{course}")
+            process_course_syllabi(level, f"{course}", store=store)
 
-        logger.info(f'Finished processing of: {course}')
+            logger.info(f'Finished processing of: {course}')
@@ -7,36 +7,69 @@ if sys.platform.startswith("win"):
     
 import os, glob, json
 import bm25s, Stemmer
+from bm25s.tokenization import Tokenized
 
+from internal.database_setup.chunk_files import has_chunks, read_chunks, LEGACY_CHUNKS_FILE
 
-def collect_chunks():
-    processed_dir = os.path.join('data/processed_syllabi')
-    
+
+def collect_chunks(processed_dir='data/processed_syllabi', columns=None):
+    """
+    Every chunk under processed_dir, course by course. Reads chunks.parquet (only
+    `columns`, if given), falling back to processed_chunks.json for course
+    directories that were not migrated yet.
+    """
     chunks = []
-    for path in glob.glob(os.path.join(processed_dir, '*', 'processed_chunks.json')):
-        with open(path, encoding='utf-8') as f:
-            chunks.extend(json.load(f))
+    for course_dir in sorted(glob.glob(os.path.join(processed_dir, '*'))):
+        legacy_path = os.path.join(course_dir, LEGACY_CHUNKS_FILE)
+        if has_chunks(course_dir):
+            chunks.extend(read_chunks(course_dir, columns))
+        elif os.path.exists(legacy_path):
+            with open(legacy_path, encoding='utf-8') as f:
+                chunks.extend(json.load(f))
     return chunks
 
-def build_index():
-    index_dir = os.path.join("data/bm25_index")
-    stemmer = Stemmer.Stemmer("english")
+class TokenAccumulator:
+    """
+    Tokenizes chunks batch by batch for the BM25 index, keeping only token ids per
+    chunk (not the text), so the index can be built at the end of a streaming ingest.
+    """
+    def __init__(self):
+        self.stemmer = Stemmer.Stemmer("english")
+        self.vocab = {}
+        self.token_ids = []
+        self.chunk_ids = []
+
+    def add(self, chunks):
+        if not chunks:
+            return
+        tokens = bm25s.tokenize([c['chunk_text'] for c in chunks], stemmer=self.stemmer, stopwords="en",
+                                return_ids=False, show_progress=False)
+        for chunk, doc_tokens in zip(chunks, tokens):
+            self.token_ids.append([self.vocab.setdefault(t, len(self.vocab)) for t in doc_tokens])
+            self.chunk_ids.append(chunk['chunk_id'])
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def save(self, index_dir='data/bm25_index'):
+        if not self.chunk_ids:
+            raise RuntimeError("No chunks found!")
+        # the text itself lives in the chunk store; the index only maps doc rows to chunk_ids
+        bm25 = bm25s.BM25()
+        bm25.index(Tokenized(ids=self.token_ids, vocab=self.vocab), show_progress=False)
 
-    chunks   = collect_chunks()
-    if not chunks:
-        raise RuntimeError("No chunks found!")
-    corpus    = [c['chunk_text'] for c in chunks]
-    tokens    = bm25s.tokenize(corpus, stemmer=stemmer, stopwords="en")
+        os.makedirs(index_dir, exist_ok=True)
+        bm25.save(index_dir)
+        with open(os.path.join(index_dir, 'chunk_ids.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.chunk_ids, f)
 
-    bm25 = bm25s.BM25(corpus=corpus)
-    bm25.index(tokens)
+        print("BM25 index built at", index_dir)
 
-    os.makedirs(index_dir, exist_ok=True)
-    bm25.save(index_dir, corpus=corpus)
-    with open(os.path.join(index_dir, 'chunk_ids.json'), 'w', encoding='utf-8') as f:
-        json.dump([c['chunk_id'] for c in chunks], f)
 
-    print("BM25 index built at", index_dir)
+def build_index(processed_dir='data/processed_syllabi', index_dir='data/bm25_index'):
+    tokens = TokenAccumulator()
+    tokens.add(collect_chunks(processed_dir, columns=['chunk_id', 'chunk_text']))
+    tokens.save(index_dir)
 
 if __name__ == "__main__":
     # run to update index
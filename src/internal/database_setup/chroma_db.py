@@ -24,12 +24,13 @@ def add_documents(collection, docs):
       - "id": a unique identifier (string)
       - "embedding": a list or array of floats
       - "metadata": a dict with any additional metadata
-      - "text": the original text content
+      - "text": optional, the original text content. The pipeline leaves it out,
+        since retrieval hydrates text from the chunk store.
     """
     ids = [doc["id"] for doc in docs]
     embeddings = [doc["embedding"] for doc in docs]
     metadatas = [doc["metadata"] for doc in docs]
-    documents = [doc["text"] for doc in docs]
+    documents = [doc["text"] for doc in docs] if all("text" in doc for doc in docs) else None
 
     print(f"Upserting {len(ids)} documents...")
 
@@ -0,0 +1,148 @@
+"""
+Binary on-disk format for the processed chunks of one course directory:
+    chunks.parquet   chunk text, chunk_id and metadata, one row per chunk
+    embeddings.npy   float32 (or float16) matrix, row-aligned with chunks.parquet
+
+Both are read memory-mapped, so loading a course no longer means parsing every
+embedding float out of processed_chunks_with_embeddings.json. Old course directories
+are converted once with migrate_legacy().
+"""
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNKS_FILE = "chunks.parquet"
+EMBEDDINGS_FILE = "embeddings.npy"
+LEGACY_CHUNKS_FILE = "processed_chunks.json"
+LEGACY_EMBEDDINGS_FILE = "processed_chunks_with_embeddings.json"
+
+
+def has_chunks(course_dir):
+    return os.path.exists(os.path.join(course_dir, CHUNKS_FILE))
+
+
+def has_embeddings(course_dir):
+    return os.path.exists(os.path.join(course_dir, EMBEDDINGS_FILE))
+
+
+def write_chunks(course_dir, chunks):
+    """Write chunk dicts (any 'embedding' key is left out) to chunks.parquet."""
+    keys = []
+    for chunk in chunks:
+        keys.extend(k for k in chunk if k != "embedding" and k not in keys)
+    columns = {}
+    for key in keys:
+        values = [chunk.get(key) for chunk in chunks]
+        try:
+            columns[key] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # mixed types in a scraped metadata field; keep it as text
+            columns[key] = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    os.makedirs(course_dir, exist_ok=True)
+    pq.write_table(pa.table(columns), os.path.join(course_dir, CHUNKS_FILE))
+
+
+def read_table(course_dir, columns=None):
+    """chunks.parquet as a memory-mapped Arrow table."""
+    return pq.read_table(os.path.join(course_dir, CHUNKS_FILE), columns=columns, memory_map=True)
+
+
+def read_chunks(course_dir, columns=None):
+    """
+    chunks.parquet as a list of dicts. Keys that were missing for a chunk (null in
+    the table) are dropped again, so the dicts look like the ones that were written.
+    """
+    rows = read_table(course_dir, columns).to_pylist()
+    return [{k: v for k, v in row.items() if v is not None} for row in rows]
+
+
+def write_embeddings(course_dir, embeddings, dtype="float32"):
+    embeddings = np.asarray(embeddings, dtype=dtype)
+    os.makedirs(course_dir, exist_ok=True)
+    np.save(os.path.join(course_dir, EMBEDDINGS_FILE), embeddings)
+
+
+class EmbeddingsWriter:
+    """
+    Appends embedding batches to a raw float32 file and turns it into embeddings.npy
+    on close(), so a course never has to be held in memory as one matrix.
+    """
+    def __init__(self, course_dir, dtype="float32"):
+        os.makedirs(course_dir, exist_ok=True)
+        self.course_dir = course_dir
+        self.dtype = dtype
+        self.dim = None
+        self.rows = 0
+        self._raw_path = os.path.join(course_dir, EMBEDDINGS_FILE + ".f32.tmp")
+        self._raw = open(self._raw_path, "wb")
+
+    def append(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            return
+        self.dim = self.dim or vectors.shape[1]
+        self._raw.write(vectors.tobytes())
+        self.rows += len(vectors)
+
+    def close(self, block_rows=65536):
+        self._raw.close()
+        if self.rows == 0:
+            write_embeddings(self.course_dir, np.zeros((0, 0)), dtype=self.dtype)
+        else:
+            src = np.memmap(self._raw_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+            tmp_path = os.path.join(self.course_dir, EMBEDDINGS_FILE + ".tmp")
+            out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype, shape=(self.rows, self.dim))
+            for i in range(0, self.rows, block_rows):
+                out[i:i + block_rows] = src[i:i + block_rows]
+            out.flush()
+            del out, src
+            os.replace(tmp_path, os.path.join(self.course_dir, EMBEDDINGS_FILE))
+        os.remove(self._raw_path)
+
+
+def load_embeddings(course_dir, mmap=True):
+    """
+    Embedding matrix of a course, memory-mapped by default. float16 files are
+    returned as stored; cast slices with .astype(np.float32) where needed.
+    """
+    return np.load(os.path.join(course_dir, EMBEDDINGS_FILE), mmap_mode="r" if mmap else None)
+
+
+def chroma_metadata(chunk):
+    """Chunk metadata as Chroma accepts it: no text/embedding/flag and no None values."""
+    return {k: v for k, v in chunk.items()
+            if k not in ("chunk_text", "embedding", "flag") and v is not None}
+
+
+def migrate_legacy(course_dir, dtype="float32"):
+    """
+    Convert processed_chunks(_with_embeddings).json in `course_dir` to chunks.parquet
+    (+ embeddings.npy). The JSON files are left in place. Returns True if anything
+    was converted.
+    """
+    if has_chunks(course_dir):
+        return False
+    emb_path = os.path.join(course_dir, LEGACY_EMBEDDINGS_FILE)
+    chunks_path = os.path.join(course_dir, LEGACY_CHUNKS_FILE)
+    path = emb_path if os.path.exists(emb_path) else chunks_path
+    if not os.path.exists(path):
+        return False
+
+    with open(path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    write_chunks(course_dir, chunks)
+    if chunks and all("embedding" in c for c in chunks):
+        write_embeddings(course_dir, [c["embedding"] for c in chunks], dtype=dtype)
+    print(f"Migrated {path} -> {CHUNKS_FILE}" + (f" + {EMBEDDINGS_FILE}" if has_embeddings(course_dir) else ""))
+    return True
+
+
+if __name__ == "__main__":
+    # convert every legacy course directory under data/processed_syllabi
+    base = os.path.join("data", "processed_syllabi")
+    for course in sorted(os.listdir(base)):
+        if os.path.isdir(os.path.join(base, course)):
+            migrate_legacy(os.path.join(base, course))
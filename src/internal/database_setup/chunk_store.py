@@ -0,0 +1,204 @@
+"""
+Single on-disk store for chunk text and metadata, keyed by chunk_id.
+
+Chroma and BM25 only return ids and scores; the text and metadata of the candidates
+that reach the reranker are hydrated from here. Layout of `store_dir`:
+    texts.bin        all chunk texts, utf-8, back to back
+    offsets.npy      int64 (n + 1,) byte offsets into texts.bin, row-aligned with ids.npy
+    ids.npy          chunk_ids in row order (fixed-width bytes)
+    sorted_ids.npy   the same ids sorted, with
+    sorted_rows.npy  their row numbers, for binary-search lookup by id
+    meta_rows.npy    int32 row -> index into metadata.json
+    n_tokens.npy     int32 token count per row (-1 if the chunker did not count tokens)
+    metadata.json    distinct metadata dicts (chunks of one document share one entry)
+    owners.json      courses/sources of chunks that were deduplicated across documents
+
+Everything except metadata.json is memory-mapped, so opening the store costs the
+same regardless of corpus size.
+"""
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+
+from internal.database_setup.bm25_indexer import collect_chunks
+
+# keys that are not shared metadata; chunk_id and n_tokens are added back per row on hydration
+SKIP_KEYS = ("chunk_text", "chunk_id", "embedding", "flag", "n_tokens")
+
+
+class ChunkStoreWriter:
+    """
+    Writes a store incrementally (add() batches of chunks, then close()), so a
+    streaming ingest never holds all texts in memory. Files are written under
+    temporary names and swapped in on close(), so readers never see a half-built store.
+    """
+    def __init__(self, store_dir='data/chunk_store'):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self._texts = open(self._tmp('texts.bin'), 'wb')
+        self.offsets = [0]
+        self.ids = []
+        self.meta_rows = []
+        self.n_tokens = []
+        self._meta_index, self.metadata = {}, []
+
+    def _tmp(self, name):
+        return os.path.join(self.store_dir, name + '.tmp')
+
+    def add(self, chunks):
+        for chunk in chunks:
+            data = chunk['chunk_text'].encode('utf-8')
+            self._texts.write(data)
+            self.offsets.append(self.offsets[-1] + len(data))
+            self.ids.append(chunk['chunk_id'].encode('utf-8'))
+            n_tokens = chunk.get('n_tokens')
+            # per-chunk, so kept out of the shared metadata dicts
+            self.n_tokens.append(-1 if n_tokens is None or n_tokens != n_tokens else int(n_tokens))
+
+            meta = {k: v for k, v in chunk.items() if k not in SKIP_KEYS}
+            key = json.dumps(meta, sort_keys=True, ensure_ascii=False)
+            if key not in self._meta_index:
+                self._meta_index[key] = len(self.metadata)
+                self.metadata.append(meta)
+            self.meta_rows.append(self._meta_index[key])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def close(self, owners=None):
+        """`owners`: {chunk_id: {"courses": [...], "sources": [...]}} for deduplicated chunks."""
+        self._texts.close()
+        if not self.ids:
+            raise RuntimeError("No chunks found!")
+        ids = np.array(self.ids)
+        if len(np.unique(ids)) != len(ids):
+            raise RuntimeError("Duplicate chunk_ids, cannot build chunk store")
+        order = np.argsort(ids, kind='stable')
+
+        arrays = {
+            'offsets.npy': np.asarray(self.offsets, dtype=np.int64),
+            'ids.npy': ids,
+            'sorted_ids.npy': ids[order],
+            'sorted_rows.npy': order.astype(np.int64),
+            'meta_rows.npy': np.asarray(self.meta_rows, dtype=np.int32),
+            'n_tokens.npy': np.asarray(self.n_tokens, dtype=np.int32),
+        }
+        for name, arr in arrays.items():
+            with open(self._tmp(name), 'wb') as f:
+                np.save(f, arr)
+        with open(self._tmp('metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, ensure_ascii=False)
+        with open(self._tmp('owners.json'), 'w', encoding='utf-8') as f:
+            json.dump(owners or {}, f, ensure_ascii=False)
+        for name in ['texts.bin', 'metadata.json', 'owners.json', *arrays]:
+            os.replace(self._tmp(name), os.path.join(self.store_dir, name))
+
+        print(f"Chunk store built at {self.store_dir}: {len(self.ids)} chunks, {len(self.metadata)} metadata entries")
+
+
+def build_store(processed_dir='data/processed_syllabi', store_dir='data/chunk_store', chunks=None):
+    """
+    Write the store from every chunks.parquet under `processed_dir`, or from an
+    already loaded list of `chunks`.
+    """
+    writer = ChunkStoreWriter(store_dir)
+    writer.add(chunks if chunks is not None else collect_chunks(processed_dir))
+    writer.close()
+
+
+def load_owners(store_dir='data/chunk_store'):
+    """owners.json of a store (empty for stores built before deduplication)."""
+    path = os.path.join(store_dir, 'owners.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ChunkStore:
+    def __init__(self, store_dir='data/chunk_store'):
+        if not os.path.exists(os.path.join(store_dir, 'offsets.npy')):
+            raise FileNotFoundError(
+                f"No chunk store at {store_dir}; build it with `uv run -m internal.database_setup.chunk_store`")
+        self.store_dir = store_dir
+
+        def load(name):
+            return np.load(os.path.join(store_dir, name), mmap_mode='r')
+
+        self.offsets = load('offsets.npy')
+        self.ids = load('ids.npy')
+        self.sorted_ids = load('sorted_ids.npy')
+        self.sorted_rows = load('sorted_rows.npy')
+        self.meta_rows = load('meta_rows.npy')
+        # stores built before token-aware chunking have no n_tokens.npy
+        has_tokens = os.path.exists(os.path.join(store_dir, 'n_tokens.npy'))
+        self.n_tokens = load('n_tokens.npy') if has_tokens else None
+        with open(os.path.join(store_dir, 'metadata.json'), encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self.owners = load_owners(store_dir)
+        # changes whenever the store is rebuilt; keys caches of per-chunk results (e.g. rerank scores)
+        stat = os.stat(os.path.join(store_dir, 'offsets.npy'))
+        self.version = f"{stat.st_size}-{stat.st_mtime_ns}"
+
+        self._file = open(os.path.join(store_dir, 'texts.bin'), 'rb')
+        # mmap refuses empty files
+        self._texts = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b''
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def row(self, chunk_id):
+        """Row number of `chunk_id`, or None if it is not in the store."""
+        key = chunk_id.encode('utf-8')
+        pos = int(np.searchsorted(self.sorted_ids, key))
+        if pos < len(self.sorted_ids) and self.sorted_ids[pos] == key:
+            return int(self.sorted_rows[pos])
+        return None
+
+    def chunk_id(self, row):
+        return self.ids[row].decode('utf-8')
+
+    def text(self, row):
+        return self._texts[self.offsets[row]:self.offsets[row + 1]].decode('utf-8')
+
+    def get(self, chunk_id):
+        """{'text', 'metadata'} for one chunk, or None if the id is unknown."""
+        row = self.row(chunk_id)
+        if row is None:
+            return None
+        metadata = dict(self.metadata[self.meta_rows[row]])
+        metadata['chunk_id'] = chunk_id
+        if self.n_tokens is not None and self.n_tokens[row] >= 0:
+            metadata['n_tokens'] = int(self.n_tokens[row])
+        metadata.update(self.owners.get(chunk_id, {}))
+        return {"text": self.text(row), "metadata": metadata}
+
+    def hydrate(self, docs):
+        """
+        Fill in 'text' and 'metadata' of retrieved docs (dicts with an 'id') in place.
+        Docs whose id is missing from the store are dropped, with a warning, since
+        the indexes were then built from a different corpus than the store.
+        """
+        hydrated = []
+        for doc in docs:
+            if 'text' not in doc:
+                chunk = self.get(doc['id'])
+                if chunk is None:
+                    print(f"[chunk_store] unknown chunk_id {doc['id']}, rebuild the chunk store", file=sys.stderr)
+                    continue
+                doc.update(chunk)
+            hydrated.append(doc)
+        return hydrated
+
+    def close(self):
+        if isinstance(self._texts, mmap.mmap):
+            self._texts.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    # run to update the store after re-chunking
+    build_store()
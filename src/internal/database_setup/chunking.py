@@ -0,0 +1,144 @@
+"""
+Token-aware chunking.
+
+The embedding model (multilingual-e5-large-instruct) and the reranker
+(ms-marco-MiniLM-L-6-v2) both truncate at 512 tokens, so a 2048-character chunk is
+partly embedded and reranked as nothing. TokenChunker measures chunks in the
+embedding model's tokens instead: sentences are packed into chunks of at most
+`max_tokens`, overlapping by whole sentences, and every chunk records its token
+count. Sentences are tokenized in one batched call per document.
+
+Run this module for truncation stats of the existing corpus:
+    uv run -m internal.database_setup.chunking
+"""
+import re
+from bisect import bisect_left
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from internal.benchmarking.utils import percentiles
+
+# clean_text collapses newlines, so sentence ends are the only boundaries left;
+# a lowercase continuation ("e.g. this") is not treated as a new sentence
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[^a-z\s])')
+
+
+def split_sentences(text):
+    return [s for s in SENTENCE_END.split(text) if s.strip()]
+
+
+class TokenChunker:
+    """
+    Sentence-packing chunker measured in `tokenizer` tokens. `max_tokens` excludes
+    the special tokens the model adds; keep it below the model limit to leave room
+    for the query when the same chunk goes through the cross-encoder.
+    """
+    def __init__(self, tokenizer, max_tokens=384, overlap_tokens=48):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def _count(self, texts):
+        if not texts:
+            return []
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def _split_long(self, sentence):
+        """Cut a sentence longer than max_tokens at token windows, snapped to spaces."""
+        offsets = self.tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        token_starts = [o[0] for o in offsets]
+        pieces, start = [], 0
+        while True:
+            # each window starts at the first token of the piece, i.e. where the last cut landed
+            end = bisect_left(token_starts, start) + self.max_tokens
+            if end >= len(offsets):
+                break
+            cut = sentence.rfind(' ', start + 1, token_starts[end] + 1)
+            cut = cut if cut > start else token_starts[end]
+            if cut <= start:
+                break
+            pieces.append(sentence[start:cut].strip())
+            start = cut
+        pieces.append(sentence[start:].strip())
+        return [p for p in pieces if p]
+
+    def split(self, text):
+        """[(chunk_text, n_tokens)] for one document."""
+        sentences = split_sentences(text)
+        counts = self._count(sentences)
+        units = []
+        for sentence, count in zip(sentences, counts):
+            if count > self.max_tokens:
+                long_pieces = self._split_long(sentence)
+                units.extend(zip(long_pieces, self._count(long_pieces)))
+            else:
+                units.append((sentence, count))
+
+        chunks, current, size = [], [], 0
+        for unit in units:
+            if current and size + unit[1] > self.max_tokens:
+                chunks.append(" ".join(s for s, _ in current))
+                # carry whole trailing sentences as overlap
+                overlap, overlap_size = [], 0
+                for prev in reversed(current):
+                    if overlap_size + prev[1] > self.overlap_tokens or overlap_size + prev[1] + unit[1] > self.max_tokens:
+                        break
+                    overlap.insert(0, prev)
+                    overlap_size += prev[1]
+                current, size = overlap, overlap_size
+            current.append(unit)
+            size += unit[1]
+        if current:
+            chunks.append(" ".join(s for s, _ in current))
+        # exact counts of the joined text, as the model will see it
+        return list(zip(chunks, self._count(chunks)))
+
+
+class CharChunker:
+    """The previous character-based splitter, behind the same interface (n_tokens unknown)."""
+    def __init__(self, chunk_size=2048, chunk_overlap=200, separators=None):
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators)
+
+    def split(self, text):
+        return [(chunk, None) for chunk in self.splitter.split_text(text)]
+
+
+def make_chunker(settings):
+    """Chunker for the ingest settings (see embeddings_pipeline.ingest_settings)."""
+    if settings["chunker"] == "tokens":
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(settings["embedding_model"])
+        return TokenChunker(tokenizer, settings["chunk_tokens"], settings["chunk_overlap_tokens"])
+    return CharChunker(settings["chunk_size"], settings["chunk_overlap"], settings["separators"])
+
+
+def truncation_report(texts, tokenizer, limit=512):
+    """How many chunks exceed `limit` model tokens (special tokens included) and how much text is cut."""
+    counts = [len(ids) for ids in tokenizer(texts, add_special_tokens=True)["input_ids"]] if texts else []
+    over = [c for c in counts if c > limit]
+    total = sum(counts)
+    return {
+        "chunks": len(counts),
+        "truncated": len(over),
+        "truncated_share": len(over) / len(counts) if counts else 0.0,
+        "tokens": total,
+        "tokens_lost": sum(c - limit for c in over),
+        "tokens_lost_share": sum(c - limit for c in over) / total if total else 0.0,
+        "tokens_per_chunk": percentiles(counts),
+    }
+
+
+if __name__ == "__main__":
+    from transformers import AutoTokenizer
+    from internal.core import get_config
+    from internal.database_setup.bm25_indexer import collect_chunks
+
+    texts = [c["chunk_text"] for c in collect_chunks(columns=["chunk_text"])]
+    embedding_model = get_config().get("ingest", {}).get("embedding_model", "intfloat/multilingual-e5-large-instruct")
+    for name in (embedding_model, "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+        report = truncation_report(texts, AutoTokenizer.from_pretrained(name))
+        dist = report["tokens_per_chunk"]
+        print(f"{name}: {report['truncated']}/{report['chunks']} chunks over 512 tokens "
+              f"({report['truncated_share']:.1%}), {report['tokens_lost_share']:.1%} of all tokens never seen; "
+              f"tokens/chunk p50={dist.get('p50', 0):.0f} p95={dist.get('p95', 0):.0f} max={dist.get('max', 0):.0f}")
@@ -0,0 +1,123 @@
+"""
+Exact and near-duplicate chunk detection for the ingest (MinHash + LSH, in numpy).
+
+The same readings are scraped under several courses, so the same chunk text would
+otherwise be embedded, indexed and reranked once per course. The first occurrence
+becomes the canonical chunk; later duplicates are dropped and recorded per course in
+duplicates.json, from which the owning courses/sources of each canonical chunk are
+collected at the end of the ingest (see collect_owners).
+"""
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+from internal.database_setup.embedding_cache import text_hash
+
+DUPLICATES_FILE = "duplicates.json"
+WORD = re.compile(r"\w+")
+MASK32 = np.uint64(0xFFFFFFFF)
+
+
+class ChunkDeduplicator:
+    """
+    `threshold` is the estimated Jaccard similarity of word `shingle_words`-grams above
+    which two chunks count as duplicates. `num_perm` hashes are split into `bands`
+    LSH bands; with the defaults (16 bands of 8 rows) pairs below ~0.7 similarity
+    rarely become candidates at all.
+    """
+    def __init__(self, threshold=0.85, num_perm=128, bands=16, shingle_words=5, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2**32, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**32, num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self.shingle_words = shingle_words
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = []
+        self.canonical = []          # (chunk_id, course, source) per signature
+        self.exact = {}              # text hash -> index into canonical
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def signature(self, text):
+        words = WORD.findall(text.lower()) or [""]
+        word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+        k = min(self.shingle_words, len(words))
+        shingles = np.zeros(len(words) - k + 1, dtype=np.uint64)
+        for j in range(k):
+            shingles = (shingles * np.uint64(1000003) + word_hashes[j:len(words) - k + 1 + j]) & MASK32
+        hashes = (shingles[:, None] * self.a[None, :] + self.b[None, :]) & MASK32
+        return hashes.min(axis=0).astype(np.uint32)
+
+    def _bands(self, sig):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(len(self.buckets))]
+
+    def add(self, chunk_id, text, course=None, source=None):
+        """
+        Register a chunk. Returns None if it is new (it becomes canonical), otherwise
+        (chunk_id, course, source) of the canonical chunk it duplicates.
+        """
+        key = text_hash(text)
+        if key in self.exact:
+            return self.canonical[self.exact[key]]
+        sig = self.signature(text)
+        bands = self._bands(sig)
+        candidates = {idx for band, bucket in zip(bands, self.buckets) for idx in bucket.get(band, ())}
+        for idx in sorted(candidates):
+            if np.mean(self.signatures[idx] == sig) >= self.threshold:
+                return self.canonical[idx]
+
+        idx = len(self.canonical)
+        self.canonical.append((chunk_id, course, source))
+        self.signatures.append(sig)
+        self.exact[key] = idx
+        for band, bucket in zip(bands, self.buckets):
+            bucket.setdefault(band, []).append(idx)
+        return None
+
+    def filter(self, chunks, duplicates):
+        """Canonical chunks of `chunks`; one record per dropped chunk is appended to `duplicates`."""
+        kept = []
+        for chunk in chunks:
+            source = chunk.get("source", "")
+            canonical = self.add(chunk["chunk_id"], chunk["chunk_text"], chunk.get("course"), source)
+            if canonical is None:
+                kept.append(chunk)
+            else:
+                duplicates.append({"canonical": canonical[0], "canonical_course": canonical[1],
+                                   "canonical_source": canonical[2], "course": chunk.get("course"),
+                                   "source": source})
+        return kept
+
+
+def write_duplicates(course_dir, duplicates):
+    with open(os.path.join(course_dir, DUPLICATES_FILE), "w", encoding="utf-8") as f:
+        json.dump(duplicates, f, ensure_ascii=False)
+
+
+def read_duplicates(course_dir):
+    path = os.path.join(course_dir, DUPLICATES_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def collect_owners(course_dirs):
+    """{canonical chunk_id: {"courses": [...], "sources": [...]}}, canonical owner first."""
+    owners = {}
+    for course_dir in course_dirs:
+        for dup in read_duplicates(course_dir):
+            entry = owners.setdefault(dup["canonical"], {"courses": [dup["canonical_course"]],
+                                                         "sources": [dup["canonical_source"]]})
+            if dup["course"] not in entry["courses"]:
+                entry["courses"].append(dup["course"])
+            if dup["source"] not in entry["sources"]:
+                entry["sources"].append(dup["source"])
+    return owners
@@ -0,0 +1,51 @@
+"""
+Persistent embedding cache keyed by a hash of the embedded text.
+
+One SQLite file per embedding model under data/embedding_cache/, so switching models
+never mixes vectors. Vectors are stored as raw float32 bytes.
+"""
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, cache_dir="data/embedding_cache"):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, model_name.replace("/", "__") + ".sqlite")
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def get_many(self, keys):
+        """{key: float32 vector} for the keys that are cached."""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        # stay below SQLite's host-parameter limit
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT key, vec FROM vectors WHERE key IN ({','.join('?' * len(part))})", part)
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO vectors (key, vec) VALUES (?, ?)",
+            ((key, vec.tobytes()) for key, vec in zip(keys, vectors)))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
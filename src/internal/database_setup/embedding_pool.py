@@ -0,0 +1,64 @@
+"""
+Multi-process embedding for index builds on CPU-only machines.
+
+A single SentenceTransformer.encode call leaves most cores idle between batches
+(tokenization, Python overhead). EmbeddingPool starts `workers` processes that each
+load one copy of the model and run torch with `threads_per_worker` threads, and
+encodes the planned batches (see embeddings.plan_batches) concurrently. Results come
+back in submission order, so callers can write them straight into row-aligned files.
+
+It quacks like a SentenceTransformer as far as embed_text_batched is concerned:
+`tokenizer`, `max_seq_length` and `encode_batches`.
+"""
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+_model = None
+
+
+def _init_worker(model_name, threads):
+    global _model
+    import torch
+    torch.set_num_threads(threads)
+    from internal.database_setup.embeddings import load_embedding_model
+    _model = load_embedding_model(model_name, device="cpu")
+
+
+def _encode(texts):
+    return _model.encode(texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True)
+
+
+def default_workers():
+    """Worker count for the whole machine, ~4 torch threads each (matmuls still scale to a few threads)."""
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+class EmbeddingPool:
+    def __init__(self, model_name, workers=None, threads_per_worker=None):
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.workers = workers or default_workers()
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        # the parent only plans batches, so it needs the tokenizer but not the model
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.max_seq_length = min(self.tokenizer.model_max_length, 512)
+        # spawn: forking a process that already runs torch threads can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=mp.get_context("spawn"),
+            initializer=_init_worker, initargs=(model_name, self.threads_per_worker))
+        print(f"Embedding pool: {self.workers} workers x {self.threads_per_worker} torch threads")
+
+    def encode_batches(self, batches):
+        """Embeddings of each batch of texts, yielded in order as the workers finish them."""
+        return self._executor.map(_encode, batches)
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,3 +1,4 @@
+import numpy as np
 import torch
 import torch.nn.functional as F
 from sentence_transformers import SentenceTransformer
@@ -21,6 +22,69 @@ def embed_text(texts, model):
     return embeddings.cpu().numpy() if hasattr(embeddings, "cpu") else embeddings
 
 
+def token_lengths(texts, model):
+    """
+    Tokenized length of each text, capped at the model's max_seq_length. Falls back
+    to ~4 characters per token if the model has no tokenizer.
+    """
+    max_len = getattr(model, "max_seq_length", None) or 512
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return [min(max_len, len(t) // 4 + 2) for t in texts]
+    encoded = tokenizer(list(texts), add_special_tokens=True, truncation=True, max_length=max_len)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def plan_batches(lengths, token_budget=16384, max_batch_size=64):
+    """
+    Groups text indices into batches, longest texts first, so each batch holds texts
+    of similar length and its padded size (batch size x longest text) stays within
+    `token_budget`. Short course-page snippets end up in large batches, long book
+    passages in small ones.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches, current, longest = [], [], 0
+    for i in order:
+        longest_if_added = max(longest, lengths[i])
+        if current and (longest_if_added * (len(current) + 1) > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, longest_if_added = [], lengths[i]
+        current.append(i)
+        longest = longest_if_added
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_text_batched(texts, model, token_budget=16384, max_batch_size=64, on_batch=None, stats=None):
+    """
+    Like embed_text, but batches by token budget over length-sorted texts instead of
+    fixed-size batches in input order, which mostly encodes padding when lengths vary.
+    Returns the embeddings in input order. `on_batch(indices, embeddings)` is called
+    after every batch (e.g. to fill a cache); `stats` collects real vs padded tokens.
+    `model` may also be an EmbeddingPool, which encodes the batches in parallel.
+    """
+    lengths = token_lengths(texts, model)
+    batches = plan_batches(lengths, token_budget, max_batch_size)
+    batch_texts = [[texts[i] for i in batch] for batch in batches]
+    if hasattr(model, "encode_batches"):
+        encoded = model.encode_batches(batch_texts)
+    else:
+        encoded = (model.encode(t, batch_size=len(t), convert_to_numpy=True, normalize_embeddings=True)
+                   for t in batch_texts)
+    out = None
+    for batch, embeddings in zip(batches, encoded):
+        if out is None:
+            out = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+        out[batch] = embeddings
+        if on_batch is not None:
+            on_batch(batch, embeddings)
+        if stats is not None:
+            stats["tokens"] += sum(lengths[i] for i in batch)
+            stats["padded_tokens"] += len(batch) * max(lengths[i] for i in batch)
+    return out if out is not None else np.zeros((0, 0), dtype=np.float32)
+
+
 # testing
 if __name__ == "__main__":
     # Example texts (queries and documents)
@@ -0,0 +1,125 @@
+"""
+Compressed dense index for corpora too large to search as float32.
+
+Built from the flat index (vectors.npy, see vector_store.build_flat_index):
+    int8.npy     (n, d) int8 codes, per-dimension symmetric scale   (4x smaller)
+    scales.npy   (d,) float32 scale of each dimension
+    binary.npy   (n, d / 8) uint8, sign bits packed                   (32x smaller)
+    meta.json    {"dims": d}
+`dims` optionally keeps only the first d dimensions. e5 is not trained for
+truncation (no Matryoshka loss), so check recall before using it.
+
+QuantizedVectorStore searches the codes first (Hamming distance for binary, int8
+dot product otherwise), keeps `rescore` x top_k candidates and rescores those
+exactly against the float32 vectors, which stay on disk (memory-mapped) and are
+only touched for the shortlist. scripts/bench_quantization.py reports recall@k
+against the exact flat index.
+"""
+import json
+import os
+
+import numpy as np
+
+from internal.database_setup.vector_store import VectorStore, FlatVectorStore
+
+# number of set bits of every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def build_quantized_index(flat_dir="data/flat_index", index_dir="data/quantized_index", dims=None, block_rows=65536):
+    vectors = np.load(os.path.join(flat_dir, "vectors.npy"), mmap_mode="r")
+    n, d = len(vectors), dims or vectors.shape[1]
+    if d % 8:
+        raise ValueError("dims must be a multiple of 8 for the binary codes")
+    os.makedirs(index_dir, exist_ok=True)
+
+    # per-dimension max |x| maps each dimension onto [-127, 127]
+    max_abs = np.zeros(d, dtype=np.float32)
+    for i in range(0, n, block_rows):
+        max_abs = np.maximum(max_abs, np.abs(vectors[i:i + block_rows, :d]).max(axis=0))
+    scales = np.where(max_abs > 0, max_abs / 127, 1).astype(np.float32)
+
+    int8 = np.lib.format.open_memmap(os.path.join(index_dir, "int8.npy.tmp"), mode="w+", dtype=np.int8, shape=(n, d))
+    binary = np.lib.format.open_memmap(os.path.join(index_dir, "binary.npy.tmp"), mode="w+", dtype=np.uint8, shape=(n, d // 8))
+    for i in range(0, n, block_rows):
+        block = np.asarray(vectors[i:i + block_rows, :d], dtype=np.float32)
+        int8[i:i + block_rows] = np.clip(np.rint(block / scales), -127, 127).astype(np.int8)
+        binary[i:i + block_rows] = np.packbits(block > 0, axis=1)
+    int8.flush()
+    binary.flush()
+    del int8, binary
+    np.save(os.path.join(index_dir, "scales.npy"), scales)
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"dims": d, "flat_dir": flat_dir}, f)
+    for name in ("int8.npy", "binary.npy"):
+        os.replace(os.path.join(index_dir, name + ".tmp"), os.path.join(index_dir, name))
+    print(f"Quantized index built at {index_dir}: {n} x {d} (int8 {n * d / 2**20:.1f} MB, "
+          f"binary {n * d / 8 / 2**20:.1f} MB, float32 {n * vectors.shape[1] * 4 / 2**20:.1f} MB)")
+
+
+class QuantizedVectorStore(VectorStore):
+    def __init__(self, index_dir="data/quantized_index", flat_dir="data/flat_index", mode="binary", rescore=10,
+                 dims=None, block_rows=65536):
+        if mode not in ("binary", "int8"):
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        if not os.path.exists(os.path.join(index_dir, "meta.json")):
+            raise FileNotFoundError(
+                f"No quantized index at {index_dir}; build it with `uv run -m internal.database_setup.quantized_index`")
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            self.dims = json.load(f)["dims"]
+        if dims is not None and dims != self.dims:
+            raise ValueError(f"Quantized index at {index_dir} has {self.dims} dims, config asks for {dims}; rebuild it")
+        self.mode = mode
+        self.rescore = rescore
+        self.block_rows = block_rows
+        self.codes = np.load(os.path.join(index_dir, f"{mode}.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(index_dir, "scales.npy"))
+        # ids, course filter and the float32 vectors for rescoring
+        self.flat = FlatVectorStore(flat_dir)
+
+    def count(self):
+        return len(self.codes)
+
+    def memory_mb(self):
+        return self.codes.nbytes / 2**20
+
+    def _block_scores(self, query, start):
+        """Approximate similarity (higher is better) of one query to a block of codes."""
+        block = self.codes[start:start + self.block_rows]
+        if self.mode == "binary":
+            bits = np.packbits(query[:self.dims] > 0)
+            return -POPCOUNT[np.bitwise_xor(block, bits)].sum(axis=1, dtype=np.int32)
+        return block.astype(np.float32) @ (query[:self.dims] * self.scales)
+
+    def candidates(self, query, n_candidates, mask=None):
+        """Rows of the `n_candidates` best codes for one query."""
+        rows, scores = [], []
+        for start in range(0, len(self.codes), self.block_rows):
+            s = self._block_scores(query, start).astype(np.float32)
+            if mask is not None:
+                s[~mask[start:start + self.block_rows]] = -np.inf
+            k = min(n_candidates, len(s))
+            idx = np.argpartition(-s, k - 1)[:k]
+            rows.append(idx + start)
+            scores.append(s[idx])
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        keep = np.argsort(-scores)[:n_candidates]
+        return rows[keep][np.isfinite(scores[keep])]
+
+    def search(self, query_embeddings, top_k, courses=None):
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        mask = self.flat.course_mask(courses) if courses else None
+        results = []
+        for query in queries:
+            # sorted rows read the memory-mapped float vectors front to back
+            rows = np.sort(self.candidates(query, top_k * self.rescore, mask))
+            exact = self.flat.vectors[rows] @ query
+            order = np.argsort(-exact)[:top_k]
+            results.append([{"id": self.flat.ids[r].decode("utf-8"), "distance": float(2 - 2 * s)}
+                            for r, s in zip(rows[order], exact[order])])
+        return results
+
+
+if __name__ == "__main__":
+    # run after the flat index is built
+    build_quantized_index()
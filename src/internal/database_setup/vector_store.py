@@ -0,0 +1,179 @@
+"""
+Pluggable dense-vector search for the semantic retrieval leg.
+
+Both backends answer `search(query_embeddings, top_k, courses=None)` with, per query,
+a list of {"id", "distance"} (squared L2 of the normalized vectors, like Chroma's
+default space, so distance = 2 - 2 * cosine):
+  ChromaVectorStore  the existing Chroma collection (HNSW, approximate)
+  FlatVectorStore    exact search over a memory-mapped float32 matrix built from the
+                     per-course embeddings.npy files; ~1 ms per query for ~14k x 1024
+
+Select the backend with `retrieval.vector_store` in config.yaml ("chroma", "flat", or
+"quantized" for the compressed index in quantized_index.py).
+Layout of the flat index directory:
+    vectors.npy   (n, dim) float32, row-aligned with
+    ids.npy       chunk ids (fixed-width bytes)
+    courses.json  course names; row_courses.npy int16 row -> course index
+    shared.npy    (m, 2) int64 (row, course index) for chunks that other courses share
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from internal.database_setup.chunk_files import has_embeddings, read_table, load_embeddings
+from internal.database_setup.chunk_store import load_owners
+
+
+class VectorStore:
+    def count(self):
+        raise NotImplementedError
+
+    def search(self, query_embeddings, top_k, courses=None):
+        """[[{"id", "distance"}, ...] per query], best first; `courses` restricts the chunks searched."""
+        raise NotImplementedError
+
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, db_path="data/chroma_db", collection_name="rag_documents", collection=None):
+        if collection is None:
+            from internal.database_setup.chroma_db import init_db, get_collection
+            collection = get_collection(init_db(db_path=db_path), collection_name=collection_name)
+        self.collection = collection
+
+    def count(self):
+        return self.collection.count()
+
+    def search(self, query_embeddings, top_k, courses=None):
+        # only the chunk's own course is a scalar Chroma field; shared chunks are not
+        # found through the courses they were deduplicated from (the flat store does that)
+        where = {"course": {"$in": list(courses)}} if courses else None
+        results = self.collection.query(
+            query_embeddings=[np.asarray(q, dtype=np.float32) for q in query_embeddings],
+            n_results=top_k, where=where, include=["distances"])
+        return [[{"id": cid, "distance": dist} for cid, dist in zip(ids, dists)]
+                for ids, dists in zip(results["ids"], results["distances"])]
+
+
+def build_flat_index(processed_dir="data/processed_syllabi", index_dir="data/flat_index", store_dir="data/chunk_store"):
+    """Concatenate every course's embeddings.npy (+ chunk ids/courses) into one flat index."""
+    courses, parts = [], []
+    for course in sorted(os.listdir(processed_dir)):
+        course_dir = os.path.join(processed_dir, course)
+        if os.path.isdir(course_dir) and has_embeddings(course_dir):
+            ids = read_table(course_dir, columns=["chunk_id"]).column("chunk_id").to_pylist()
+            embeddings = load_embeddings(course_dir)
+            if len(ids) and len(ids) == len(embeddings):
+                courses.append(course)
+                parts.append((ids, embeddings))
+    if not parts:
+        raise RuntimeError(f"No embeddings found under {processed_dir}")
+
+    n, dim = sum(len(ids) for ids, _ in parts), parts[0][1].shape[1]
+    os.makedirs(index_dir, exist_ok=True)
+
+    def tmp(name):
+        return os.path.join(index_dir, name + ".tmp")
+
+    vectors = np.lib.format.open_memmap(tmp("vectors.npy"), mode="w+", dtype=np.float32, shape=(n, dim))
+    all_ids, row_courses, row = [], np.empty(n, dtype=np.int16), 0
+    for course_idx, (ids, embeddings) in enumerate(parts):
+        vectors[row:row + len(ids)] = embeddings
+        row_courses[row:row + len(ids)] = course_idx
+        all_ids.extend(ids)
+        row += len(ids)
+    vectors.flush()
+    del vectors
+
+    # deduplicated chunks also belong to the courses they were collapsed from
+    owners = load_owners(store_dir)
+    row_of = {cid: i for i, cid in enumerate(all_ids)}
+    shared = [(row_of[cid], courses.index(c)) for cid, entry in owners.items() if cid in row_of
+              for c in entry["courses"] if c in courses]
+    arrays = {"ids.npy": np.array([i.encode("utf-8") for i in all_ids]), "row_courses.npy": row_courses,
+              "shared.npy": np.array(shared, dtype=np.int64).reshape(-1, 2)}
+    for name, arr in arrays.items():
+        with open(tmp(name), "wb") as f:
+            np.save(f, arr)
+    with open(tmp("courses.json"), "w", encoding="utf-8") as f:
+        json.dump(courses, f)
+    for name in ["vectors.npy", "courses.json", *arrays]:
+        os.replace(tmp(name), os.path.join(index_dir, name))
+    print(f"Flat index built at {index_dir}: {n} x {dim}")
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Exact top-k by dot product over a memory-mapped matrix. Rows are split into
+    `shard_rows` shards searched by a thread pool (numpy releases the GIL in matmul);
+    each shard keeps its top-k with argpartition and the shard results are merged.
+    """
+    def __init__(self, index_dir="data/flat_index", shard_rows=262144, threads=None):
+        if not os.path.exists(os.path.join(index_dir, "vectors.npy")):
+            raise FileNotFoundError(
+                f"No flat index at {index_dir}; build it with `uv run -m internal.database_setup.vector_store`")
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(index_dir, "ids.npy"), mmap_mode="r")
+        self.row_courses = np.load(os.path.join(index_dir, "row_courses.npy"))
+        self.shared = np.load(os.path.join(index_dir, "shared.npy"))
+        with open(os.path.join(index_dir, "courses.json"), encoding="utf-8") as f:
+            self.courses = json.load(f)
+        self.shard_rows = shard_rows
+        n_shards = -(-len(self.vectors) // shard_rows)
+        self._pool = ThreadPoolExecutor(max_workers=threads or min(n_shards, os.cpu_count() or 1)) if n_shards > 1 else None
+
+    def count(self):
+        return len(self.vectors)
+
+    def course_mask(self, courses):
+        wanted = np.array([self.courses.index(c) for c in courses if c in self.courses], dtype=np.int16)
+        mask = np.isin(self.row_courses, wanted)
+        if len(self.shared):
+            mask[self.shared[np.isin(self.shared[:, 1], wanted), 0]] = True
+        return mask
+
+    def scores(self, query_embeddings):
+        """(n_queries, n) dot products against the whole corpus."""
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        return queries @ self.vectors.T
+
+    def _shard_top_k(self, queries, start, top_k, mask):
+        scores = queries @ self.vectors[start:start + self.shard_rows].T
+        if mask is not None:
+            scores[:, ~mask[start:start + self.shard_rows]] = -np.inf
+        k = min(top_k, scores.shape[1])
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return idx + start, np.take_along_axis(scores, idx, axis=1)
+
+    def search(self, query_embeddings, top_k, courses=None):
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        mask = self.course_mask(courses) if courses else None
+        starts = range(0, len(self.vectors), self.shard_rows)
+        run = lambda start: self._shard_top_k(queries, start, top_k, mask)
+        parts = list(self._pool.map(run, starts)) if self._pool else [run(s) for s in starts]
+        rows = np.concatenate([p[0] for p in parts], axis=1)
+        scores = np.concatenate([p[1] for p in parts], axis=1)
+
+        results = []
+        for q_rows, q_scores in zip(rows, scores):
+            order = np.argsort(-q_scores)[:top_k]
+            results.append([{"id": self.ids[r].decode("utf-8"), "distance": float(2 - 2 * s)}
+                            for r, s in zip(q_rows[order], q_scores[order]) if np.isfinite(s)])
+        return results
+
+
+def open_vector_store(backend="chroma", **kwargs):
+    if backend == "flat":
+        return FlatVectorStore(**kwargs)
+    if backend == "quantized":
+        from internal.database_setup.quantized_index import QuantizedVectorStore
+        return QuantizedVectorStore(**kwargs)
+    if backend == "chroma":
+        return ChromaVectorStore(**kwargs)
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+if __name__ == "__main__":
+    # run after the embeddings pipeline to (re)build the flat index
+    build_flat_index()
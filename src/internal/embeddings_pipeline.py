@@ -1,181 +1,471 @@
 import os
 import json
-from tqdm import tqdm 
+import hashlib
+import queue
+import threading
+import time
+from functools import lru_cache
+import numpy as np
+from tqdm import tqdm
 import torch
 import torch.nn.functional as F
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from internal.database_setup.bm25_indexer import build_index
-from internal.database_setup.preprocessing import clean_text 
-from internal.database_setup.embeddings import load_embedding_model, embed_text
+from internal.database_setup.bm25_indexer import TokenAccumulator
+from internal.database_setup.chunk_store import ChunkStoreWriter, load_owners
+from internal.database_setup.vector_store import build_flat_index
+from internal.database_setup.quantized_index import build_quantized_index
+from internal.database_setup.dedup import ChunkDeduplicator, collect_owners, write_duplicates
+from internal.database_setup.chunking import CharChunker, make_chunker
+from internal.database_setup.preprocessing import clean_text
+from internal.database_setup.embeddings import load_embedding_model, embed_text_batched
+from internal.database_setup.embedding_cache import EmbeddingCache, text_hash
+from internal.database_setup.embedding_pool import EmbeddingPool, default_workers
 from internal.database_setup.chroma_db import init_db, get_collection, add_documents
+from internal.database_setup.chunk_files import (
+    EmbeddingsWriter, has_chunks, has_embeddings, read_chunks, read_table, write_chunks,
+    load_embeddings, chroma_metadata, migrate_legacy)
+from internal.core import get_config
 # full chromadb/bm25index length: 13758
 
-def process_file(filepath, course, chunk_size=2048, chunk_overlap=200):
+PROCESSED_DIR = os.path.join("data", "processed_syllabi")
+MANIFEST_PATH = os.path.join(PROCESSED_DIR, "manifest.json")
+STATE_PATH = os.path.join(PROCESSED_DIR, "ingest_state.json")
+# model the JSON-era embeddings were made with, before the manifest existed
+LEGACY_EMBEDDING_MODEL = "intfloat/multilingual-e5-large-instruct"
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+
+def ingest_settings(cfg):
+    """Settings that determine chunk ids and vectors; recorded in the manifest."""
+    ingest_cfg = cfg.get("ingest", {})
+    settings = {
+        "embedding_model": ingest_cfg.get("embedding_model", LEGACY_EMBEDDING_MODEL),
+        "chunk_size": ingest_cfg.get("chunk_size", 2048),
+        "chunk_overlap": ingest_cfg.get("chunk_overlap", 200),
+        "separators": SEPARATORS,
+        "chunker": ingest_cfg.get("chunker", "chars"),
+    }
+    if settings["chunker"] == "tokens":
+        settings["chunk_tokens"] = ingest_cfg.get("chunk_tokens", 384)
+        settings["chunk_overlap_tokens"] = ingest_cfg.get("chunk_overlap_tokens", 48)
+    else:
+        # manifests written before the chunker setting existed stay valid
+        del settings["chunker"]
+    return settings
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(settings):
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+
+
+def content_chunk_id(course, source, text):
+    """Stable id from the chunk's document and text, so re-chunking never shifts ids."""
+    digest = hashlib.sha1(f"{source}\0{text}".encode("utf-8")).hexdigest()[:16]
+    return f"{course}_{digest}"
+
+
+def process_file(filepath, course, chunker=None):
     """
     Reads a scraped JSON file (e.g., processed_syllabi/Decision_making/scraped_data/xxx.json),
-    extracts its "text" field, cleans and splits it into chunks using a recursive splitter,
-    and attaches the metadata from the original file to each chunk.
+    extracts its "text" field, cleans and splits it into chunks with `chunker` (see
+    database_setup.chunking; character-based by default), and attaches the metadata
+    from the original file to each chunk.
     """
+    chunker = chunker or CharChunker(separators=SEPARATORS)
     with open(filepath, "r", encoding="utf-8") as f:
         data = json.load(f)
-    
+
     # Get the raw text and metadata (everything except the "text" field)
     raw_text = data.get("text", "")
     cleaned_text = clean_text(raw_text)
     metadata = {key: data[key] for key in data if key != "text"}
-    
-    # Use LangChain's recursive splitter to produce coherent chunks.
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " "]
-    )
-    chunks = splitter.split_text(cleaned_text)
-    
+
     # Attach the original metadata to each chunk.
     processed_chunks = []
-    for i, chunk in enumerate(chunks):
+    source = metadata.get("source") or os.path.basename(filepath)
+    for chunk, n_tokens in chunker.split(cleaned_text):
         chunk_data = metadata.copy()
         chunk_data["chunk_text"] = chunk
-        # add a chunk identifier
-        chunk_data["chunk_id"] = f"{course}_{os.path.basename(filepath)}_chunk_{i+1}"
+        if n_tokens is not None:
+            chunk_data["n_tokens"] = n_tokens
+        # content-addressed chunk identifier
+        chunk_data["chunk_id"] = content_chunk_id(course, source, chunk)
         processed_chunks.append(chunk_data)
-    
+
     return processed_chunks
 
-def process_directory(directory, course):
+def iter_directory(directory, course, chunker=None):
     """
-    Processes all scraped JSON files in a given directory and returns a list of all chunks.
+    Yields the chunks of each scraped JSON file in a directory, file by file.
+    Identical chunks of the same document share an id and are kept once.
     """
-    all_chunks = []
-    for filename in os.listdir(directory):
+    seen = set()
+    for filename in sorted(os.listdir(directory)):
         if filename.endswith(".json"):
             filepath = os.path.join(directory, filename)
-            chunks = process_file(filepath, course)
-            all_chunks.extend(chunks)
+            chunks = []
+            # chunk by chunk, so repeats within one file are dropped as well
+            for chunk in process_file(filepath, course, chunker):
+                if chunk["chunk_id"] not in seen:
+                    seen.add(chunk["chunk_id"])
+                    chunks.append(chunk)
+            yield chunks
+
+def process_directory(directory, course, chunker=None):
+    """
+    Processes all scraped JSON files in a given directory and returns a list of all chunks.
+    """
+    all_chunks = []
+    for chunks in iter_directory(directory, course, chunker):
+        all_chunks.extend(chunks)
     return all_chunks
 
 
-def process_course(course):
-    input_directory = os.path.join("data", "processed_syllabi", course, "scraped_data")
-    output_directory = os.path.join("data", "processed_syllabi", course)
-    os.makedirs(output_directory, exist_ok=True)
-    
-    print(f"Processing course: {course}")
-    # Check for already-processed chunks file
-    chunks_path = os.path.join(output_directory, "processed_chunks.json")
-    if os.path.exists(chunks_path):
-        print(f"Found existing chunks file for {course}, loading…")
-        with open(chunks_path, "r", encoding="utf-8") as f:
-            all_chunks = json.load(f)
-    else:
-        # If processed chunk doesn't exist, scan & split the scraped_data
-        all_chunks = process_directory(input_directory, course)
-        
-        # add course metadata for the first run
-        for chunk in all_chunks:
-            chunk["course"] = course
-
-        print(f"Processed {len(all_chunks)} chunks for {course}.")
-        # Save for next time
-        with open(chunks_path, "w", encoding="utf-8") as f:
-            json.dump(all_chunks, f, indent=2, ensure_ascii=False)
-        print(f"Saved processed chunks to: {chunks_path}")
-    
-    # Check if embeddings file exists; if so, load it instead of recomputing.
-    embeddings_file = os.path.join(output_directory, "processed_chunks_with_embeddings.json")
-    if os.path.exists(embeddings_file):
-        print(f"Embeddings file exists for {course}. Loading...")
-        with open(embeddings_file, "r", encoding="utf-8") as f:
-            all_chunks = json.load(f)
-    else:
-        # Load model and compute embeddings.
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = load_embedding_model(device=device)
-        chunk_texts = [chunk["chunk_text"] for chunk in all_chunks]
-
-        print("Embedding chunks...")
-        embeddings = []
-        batch_size = 16
-
-        for i in tqdm(range(0, len(chunk_texts), batch_size), desc=f"Embedding {course}"):
-            batch_texts = chunk_texts[i:i+batch_size]
-            batch_embeddings = embed_text(batch_texts, model)
-            embeddings.extend(batch_embeddings)
-        for i, emb in enumerate(embeddings):
-            all_chunks[i]["embedding"] = emb.tolist() if hasattr(emb, "tolist") else emb
-
-        # save embeddings
-        with open(embeddings_file, "w", encoding="utf-8") as f:
-            json.dump(all_chunks, f, indent=2, ensure_ascii=False)
-        print(f"Saved processed chunks with embeddings to: {embeddings_file}")
-    
-    return all_chunks
+def embed_chunks(chunks, cache, get_model, token_budget=16384, max_batch_size=64, stats=None):
+    """
+    Embedding matrix for `chunks`, row-aligned. Vectors are looked up in the cache by
+    text hash; only texts that are not cached yet go through the model returned by
+    get_model(), which is only called if something has to be encoded. Those are
+    encoded in length-sorted, token-budgeted batches (see embed_text_batched).
+    """
+    keys = [text_hash(chunk["chunk_text"]) for chunk in chunks]
+    found = cache.get_many(keys)
+    missing = list(dict.fromkeys(k for k in keys if k not in found))
+    if stats is not None:
+        stats["cached"] += len(keys) - len(missing)
+        stats["encoded"] += len(missing)
+
+    if missing:
+        texts = {key: chunk["chunk_text"] for key, chunk in zip(keys, chunks)}
+
+        def store(indices, embeddings):
+            cache.put_many([missing[i] for i in indices], embeddings)
+
+        t0 = time.perf_counter()
+        embeddings = embed_text_batched([texts[k] for k in missing], get_model(), token_budget,
+                                        max_batch_size, on_batch=store, stats=stats)
+        if stats is not None:
+            stats["encode_seconds"] += time.perf_counter() - t0
+        found.update(zip(missing, embeddings))
+
+    if not chunks:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([found[k] for k in keys])
+
+
+def _comparable(chunk):
+    return {k: v for k, v in chunk.items() if v is not None and k != "embedding"}
+
+
+def load_state(settings):
+    """Progress of an interrupted run with the same settings, or None."""
+    if not os.path.exists(STATE_PATH):
+        return None
+    with open(STATE_PATH, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    return state if state.get("settings") == settings else None
+
+
+def save_state(state):
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
 
-def main(courses):
-    # Process each course.
-    all_courses_chunks = []
+
+def update_owner_metadata(collection, owners, previous_owners, current_ids, batch_size):
+    """
+    Record all owning courses/sources of deduplicated chunks in Chroma ("courses" and
+    "sources", comma separated, since Chroma metadata values must be scalars). Chunks
+    that are no longer shared are reset to their own course and source.
+    """
+    current_ids = {i.decode("utf-8") if isinstance(i, bytes) else i for i in current_ids}
+    ids, metadatas = [], []
+    for chunk_id, entry in owners.items():
+        ids.append(chunk_id)
+        metadatas.append({"courses": ", ".join(entry["courses"]), "sources": ", ".join(entry["sources"])})
+    for chunk_id, entry in previous_owners.items():
+        if chunk_id not in owners and chunk_id in current_ids:
+            ids.append(chunk_id)
+            metadatas.append({"courses": entry["courses"][0], "sources": entry["sources"][0]})
+    for i in range(0, len(ids), batch_size):
+        collection.update(ids=ids[i:i + batch_size], metadatas=metadatas[i:i + batch_size])
+
+
+def _stage(target, out_q, *args):
+    """Run a pipeline stage in a daemon thread; errors are passed downstream."""
+    def run():
+        try:
+            target(out_q, *args)
+        except BaseException as e:
+            out_q.put(("error", None, e))
+            out_q.put(None)
+    thread = threading.Thread(target=run, daemon=True, name=target.__name__)
+    thread.start()
+    return thread
+
+
+def _chunk_stage(out_q, courses, settings, done, batch_chunks, embedding_dtype, dedup):
+    """
+    scraped JSON -> clean_text -> chunks, in batches of `batch_chunks` per course.
+    With `dedup` (a ChunkDeduplicator), duplicates of chunks seen earlier in this run,
+    in any course, are dropped; the "end" message carries the course's duplicate records.
+    """
+    chunker = make_chunker({"chunker": "chars", **settings})
     for course in courses:
-        course_chunks = process_course(course)
-        # Add course metadata to each chunk.
-        for chunk in course_chunks:
-            chunk["course"] = course
-        all_courses_chunks.extend(course_chunks)
+        if course in done:
+            if dedup is not None and has_chunks(os.path.join(PROCESSED_DIR, course)):
+                # chunks of finished courses stay canonical for the rest of the run
+                for chunk in read_chunks(os.path.join(PROCESSED_DIR, course)):
+                    dedup.add(chunk["chunk_id"], chunk["chunk_text"], course, chunk.get("source", ""))
+            out_q.put(("skip", course, None))
+            continue
+        input_directory = os.path.join(PROCESSED_DIR, course, "scraped_data")
+        output_directory = os.path.join(PROCESSED_DIR, course)
+        # convert JSON output of earlier runs to parquet/npy once, before later stages read it
+        migrate_legacy(output_directory, dtype=embedding_dtype)
+        out_q.put(("start", course, None))
+        if os.path.isdir(input_directory):
+            # always re-chunk, so new or edited scraped files are picked up
+            files = iter_directory(input_directory, course, chunker)
+        else:
+            print(f"No scraped_data for {course}, keeping the existing chunks.")
+            files = [read_chunks(output_directory)] if has_chunks(output_directory) else []
+        buffer, duplicates = [], []
+        for chunks in files:
+            for chunk in chunks:
+                # add course metadata
+                chunk["course"] = course
+            if dedup is not None:
+                chunks = dedup.filter(chunks, duplicates)
+            buffer.extend(chunks)
+            while len(buffer) >= batch_chunks:
+                out_q.put(("chunks", course, buffer[:batch_chunks]))
+                buffer = buffer[batch_chunks:]
+        if buffer:
+            out_q.put(("chunks", course, buffer))
+        out_q.put(("end", course, duplicates))
+    out_q.put(None)
+
+
+def _embed_stage(out_q, in_q, settings, seed_cache, batching, workers, stats):
+    """
+    chunk batches -> (chunks, vectors), through the embedding cache. With `workers`
+    set and no GPU, uncached chunks are encoded by a multi-process EmbeddingPool.
+    """
+    # SQLite connections must stay in the thread that made them
+    cache = EmbeddingCache(settings["embedding_model"])
+
+    @lru_cache(maxsize=1)
+    def get_model():
+        if torch.cuda.is_available():
+            return load_embedding_model(settings["embedding_model"], device="cuda")
+        if workers:
+            return EmbeddingPool(settings["embedding_model"], workers=workers)
+        return load_embedding_model(settings["embedding_model"], device="cpu")
+
+    try:
+        _embed_loop(out_q, in_q, cache, get_model, seed_cache, batching, stats)
+    finally:
+        cache.close()
+        if get_model.cache_info().currsize and isinstance(get_model(), EmbeddingPool):
+            get_model().close()
+    out_q.put(None)
+
+
+def _embed_loop(out_q, in_q, cache, get_model, seed_cache, batching, stats):
+    while (msg := in_q.get()) is not None:
+        kind, course, payload = msg
+        if kind == "start" and seed_cache:
+            # vectors of the previous run are still valid for the same model; keep them
+            output_directory = os.path.join(PROCESSED_DIR, course)
+            if has_chunks(output_directory) and has_embeddings(output_directory):
+                old_texts = read_table(output_directory, columns=["chunk_text"]).column("chunk_text").to_pylist()
+                old_embeddings = load_embeddings(output_directory)
+                if len(old_embeddings) == len(old_texts):
+                    cache.put_many([text_hash(t) for t in old_texts], old_embeddings)
+        elif kind == "chunks":
+            payload = (payload, embed_chunks(payload, cache, get_model, stats=stats, **batching))
+        out_q.put((kind, course, payload))
+
 
-    print(f"Total chunks processed: {len(all_courses_chunks)}")
-    #print("Sample chunk:", all_courses_chunks[:1])  # Print first chunk for inspection
+class _CourseWriter:
+    """
+    Writes one course as its batches arrive: vectors go straight to disk, new or
+    changed chunks are upserted to Chroma batch by batch, and ids that vanished are
+    deleted when the course ends. Only the course's chunk dicts stay in memory,
+    until chunks.parquet is written.
+    """
+    def __init__(self, course, collection, batch_size, dtype, rebuild):
+        self.course = course
+        self.collection = collection
+        self.batch_size = batch_size
+        self.output_directory = os.path.join(PROCESSED_DIR, course)
+        old_chunks = read_chunks(self.output_directory) if has_chunks(self.output_directory) else []
+        self.previous = {} if rebuild else {c["chunk_id"]: _comparable(c) for c in old_chunks}
+        self.chunks = []
+        self.embeddings = EmbeddingsWriter(self.output_directory, dtype=dtype)
+        self.changed = 0
+
+    def add(self, chunks, vectors):
+        self.chunks.extend(chunks)
+        self.embeddings.append(vectors)
+        docs = [{
+            "id": chunk["chunk_id"],
+            "embedding": vec,
+            "metadata": chroma_metadata(chunk),
+        } for chunk, vec in zip(chunks, vectors) if self.previous.get(chunk["chunk_id"]) != _comparable(chunk)]
+        for i in range(0, len(docs), self.batch_size):
+            # upsert to chroma method
+            add_documents(self.collection, docs[i:i + self.batch_size])
+        self.changed += len(docs)
 
-    chunk_ids = [chunk.get("chunk_id") for chunk in all_courses_chunks]
-    print(f"Unique chunk IDs: {len(set(chunk_ids))}, Total chunks: {len(chunk_ids)}")
+    def close(self, duplicates=()):
+        current_ids = {c["chunk_id"] for c in self.chunks}
+        removed = [cid for cid in self.previous if cid not in current_ids]
+        for i in range(0, len(removed), self.batch_size):
+            self.collection.delete(ids=removed[i:i + self.batch_size])
+        # Chroma is updated before the files, so a crash in between is simply redone
+        write_chunks(self.output_directory, self.chunks)
+        self.embeddings.close()
+        write_duplicates(self.output_directory, list(duplicates))
+        print(f"{self.course}: {len(self.chunks)} chunks, {self.changed} new/changed, {len(removed)} removed, "
+              f"{len(duplicates)} duplicates of earlier chunks dropped")
+
+
+def main(courses, bm25_dir="data/bm25_index", store_dir="data/chunk_store", queue_size=4, batch_chunks=256):
+    """
+    Streaming ingest: scraped JSON -> clean_text -> chunking -> cached/batched
+    embedding -> Chroma deltas, chunks.parquet/embeddings.npy, BM25 tokens and the
+    chunk store. Chunking, embedding and writing run as threads connected by bounded
+    queues, so chunking overlaps model inference and at most `queue_size` batches are
+    in flight per stage.
+
+    Progress is recorded per course in ingest_state.json; after a crash, rerunning
+    skips finished courses. If the embedding model or chunking settings differ from
+    the manifest of the last run, the collection is dropped and rebuilt. BM25 and the
+    chunk store are rebuilt from `courses`, so always pass every course.
+    """
+    cfg = get_config()
+    ingest_cfg = cfg.get("ingest", {})
+    embedding_dtype = ingest_cfg.get("embedding_dtype", "float32")
+    batching = {"token_budget": ingest_cfg.get("embed_token_budget", 16384),
+                "max_batch_size": ingest_cfg.get("embed_max_batch_size", 64)}
+    workers = ingest_cfg.get("embed_workers", 0)
+    if workers == "auto":
+        workers = default_workers()
+    if workers:
+        # every worker needs a few batches per call to stay busy
+        batch_chunks = max(batch_chunks, 4 * workers * batching["max_batch_size"])
+    settings = ingest_settings(cfg)
+    manifest = load_manifest()
+    previous_model = (manifest or {}).get("embedding_model", LEGACY_EMBEDDING_MODEL)
 
     # initialize ChromaDB
     db_client = init_db(db_path="data/chroma_db")
+    state = load_state(settings)
+    if state is not None:
+        print(f"Resuming ingest, {len(state['done'])} of {len(courses)} courses already done.")
+    else:
+        state = {"settings": settings, "rebuild": manifest is not None and manifest != settings, "done": []}
+        if state["rebuild"]:
+            print(f"Ingest settings changed ({manifest} -> {settings}); rebuilding the collection.")
+            try:
+                db_client.delete_collection("rag_documents")
+            except Exception:
+                pass
+        save_state(state)
     collection = get_collection(db_client, collection_name="rag_documents")
+    batch_size = db_client.get_max_batch_size()
 
     print("Checking existing documents in ChromaDB:")
-    print(collection.count()) 
-    
-    # Prepare documents for ChromaDB.
-    docs = []
-    for chunk in all_courses_chunks:
-        doc = {
-            "id": chunk.get("chunk_id"),
-            "embedding": chunk.get("embedding"),
-            "metadata": {k: v for k, v in chunk.items() if k not in ["chunk_text", "embedding", "flag"]},
-            "text": chunk.get("chunk_text")
-        }
-        docs.append(doc)
-    
-    print(f"Total documents to upsert: {len(docs)}")
-
-    # upsert to chroma method
-    add_documents(collection, docs)
-    print("Documents added to ChromaDB.")
-
-    return 
+    print(collection.count())
+
+    chunk_q = queue.Queue(maxsize=queue_size)
+    embed_q = queue.Queue(maxsize=queue_size)
+    stats = {"cached": 0, "encoded": 0, "encode_seconds": 0.0, "tokens": 0, "padded_tokens": 0}
+    dedup_cfg = ingest_cfg.get("dedup", {})
+    dedup = ChunkDeduplicator(threshold=dedup_cfg.get("threshold", 0.85)) if dedup_cfg.get("enabled", True) else None
+    _stage(_chunk_stage, chunk_q, courses, settings, set(state["done"]), batch_chunks, embedding_dtype, dedup)
+    _stage(_embed_stage, embed_q, chunk_q, settings, previous_model == settings["embedding_model"], batching, workers, stats)
+
+    tokens = TokenAccumulator()
+    store = ChunkStoreWriter(store_dir)
+    writer = None
+    started = time.perf_counter()
+    with tqdm(desc="Ingest", unit="chunk") as progress:
+        while (msg := embed_q.get()) is not None:
+            kind, course, payload = msg
+            if kind == "error":
+                raise payload
+            if kind == "skip":
+                # finished before the crash; only feed BM25 and the chunk store
+                output_directory = os.path.join(PROCESSED_DIR, course)
+                chunks = read_chunks(output_directory) if has_chunks(output_directory) else []
+                tokens.add(chunks)
+                store.add(chunks)
+            elif kind == "start":
+                print(f"Processing course: {course}")
+                writer = _CourseWriter(course, collection, batch_size, embedding_dtype, state["rebuild"])
+            elif kind == "chunks":
+                chunks, vectors = payload
+                writer.add(chunks, vectors)
+                tokens.add(chunks)
+                store.add(chunks)
+                progress.update(len(chunks))
+            elif kind == "end":
+                writer.close(payload)
+                writer = None
+                state["done"].append(course)
+                save_state(state)
+
+    # initialize bm25 index, after creating all chunks (shouldn't be in batches)
+    tokens.save(bm25_dir)
+    owners = collect_owners(os.path.join(PROCESSED_DIR, course) for course in courses)
+    previous_owners = {} if state["rebuild"] else load_owners(store_dir)
+    update_owner_metadata(collection, owners, previous_owners, store.ids, batch_size)
+    store.close(owners)
+    vector_store = cfg.get("retrieval", {}).get("vector_store")
+    if vector_store in ("flat", "quantized"):
+        build_flat_index(PROCESSED_DIR, store_dir=store_dir)
+    if vector_store == "quantized":
+        build_quantized_index(dims=cfg["retrieval"].get("quantized", {}).get("dims"))
+    write_manifest(settings)
+    os.remove(STATE_PATH)
+
+    elapsed = time.perf_counter() - started
+    print(f"Total chunks processed: {len(tokens)} in {elapsed:.1f}s "
+          f"({stats['encoded']} encoded, {stats['cached']} from the embedding cache)")
+    if stats["encoded"]:
+        print(f"Encoding: {stats['encoded'] / stats['encode_seconds']:.1f} chunks/s, "
+              f"{stats['tokens'] / stats['padded_tokens']:.0%} of encoded tokens were real (rest padding)")
+    if dedup is not None:
+        print(f"Deduplication: {len(tokens)} canonical chunks, {len(owners)} of them shared across courses/sources")
+    print(f"Documents in ChromaDB: {collection.count()}")
+
+    return
 
 
 if __name__ == "__main__":
 
-    courses = []
     # List of courses to process
-    first_courses = ['Human_computer_interaction', 'Natural_language_processing', 'Adv_cog_neuroscience', 
+    first_courses = ['Human_computer_interaction', 'Natural_language_processing', 'Adv_cog_neuroscience',
             'Adv_cognitive_modelling', 'Data_science', 'Decision_making']
-    second_courses = ['applied_cognitive_science', 'cognition_and_communication', 'cognitive_neuroscience', 
+    second_courses = ['applied_cognitive_science', 'cognition_and_communication', 'cognitive_neuroscience',
                'intro_to_cognitive_science', 'Methods_1', 'Methods_2', 'Methods_3', 'Methods_4']
-    third_courses = ['perception_and_action', 'philosophy_of_cognitive_science', 'social_and_cultural_dynamics', 
+    third_courses = ['perception_and_action', 'philosophy_of_cognitive_science', 'social_and_cultural_dynamics',
                      'applied_cognitive_science']
-    
-    courses.append(first_courses)
-    courses.append(second_courses)
-    courses.append(third_courses)
-            
-    for course_batch in courses:
-        main(course_batch)
-
-    # initialize bm25 index, after creating all chunks (shouldn't be in batches)
-    build_index()
-    print("Documents added to bm25 index.")
-
 
+    # one pass over all courses, so a settings change rebuilds everything consistently
+    courses = list(dict.fromkeys(first_courses + second_courses + third_courses))
+    # also rebuilds the bm25 index and the chunk store from the same chunks
+    main(courses)
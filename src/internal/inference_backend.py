@@ -0,0 +1,99 @@
+"""
+CPU inference backends for the project's transformer models.
+
+Every model loader takes a `backend`, selected per model under `inference:` in
+config.yaml:
+  torch  the original fp32 PyTorch model
+  int8   torch dynamic quantization of the Linear layers (weights int8, activations
+         quantized on the fly); CPU only, no export step
+  onnx   ONNX Runtime through optimum (`uv add "optimum[onnxruntime]"`); the model is
+         exported once to data/onnx_models/<model name>/ and loaded from there afterwards
+AlignScore's custom RoBERTa heads have no ONNX export, so it supports torch and int8.
+scripts/bench_inference.py checks each backend against the fp32 outputs and compares
+latency and memory.
+"""
+import os
+
+BACKENDS = ("torch", "int8", "onnx")
+ONNX_DIR = "data/onnx_models"
+
+
+def check_backend(backend, allowed=BACKENDS):
+    if backend not in allowed:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {allowed}")
+
+
+def quantize_int8(module):
+    """Dynamic int8 quantization of every nn.Linear in `module`, in place."""
+    import torch
+    torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return module
+
+
+def onnx_path(model_name, onnx_dir=ONNX_DIR):
+    return os.path.join(onnx_dir, model_name.replace("/", "__"))
+
+
+def _require_optimum():
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise ImportError('The onnx backend needs optimum with ONNX Runtime: uv add "optimum[onnxruntime]"') from e
+
+
+def load_sentence_transformer(model_name, device="cpu", backend="torch", onnx_dir=ONNX_DIR):
+    from sentence_transformers import SentenceTransformer
+
+    check_backend(backend)
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+    if backend == "int8":
+        return quantize_int8(SentenceTransformer(model_name, device="cpu"))
+    _require_optimum()
+    path = onnx_path(model_name, onnx_dir)
+    if os.path.isdir(path):
+        return SentenceTransformer(path, device="cpu", backend="onnx")
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model.save_pretrained(path)
+    return model
+
+
+def load_cross_encoder(model_name, max_length=512, backend="torch", onnx_dir=ONNX_DIR):
+    from sentence_transformers import CrossEncoder
+
+    check_backend(backend)
+    if backend == "torch":
+        return CrossEncoder(model_name, max_length=max_length)
+    if backend == "int8":
+        model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        quantize_int8(model.model)
+        return model
+    _require_optimum()
+    path = onnx_path(model_name, onnx_dir)
+    if os.path.isdir(path):
+        return CrossEncoder(path, max_length=max_length, device="cpu", backend="onnx")
+    model = CrossEncoder(model_name, max_length=max_length, device="cpu", backend="onnx")
+    model.save_pretrained(path)
+    return model
+
+
+def load_sequence_classifier(model_name, backend="torch", onnx_dir=ONNX_DIR, **kwargs):
+    """
+    AutoModelForSequenceClassification (e.g. the DeBERTa NLI model), or its ONNX
+    Runtime counterpart, which is called the same way (`model(**encoded).logits`).
+    """
+    check_backend(backend)
+    if backend in ("torch", "int8"):
+        from transformers import AutoModelForSequenceClassification
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, **kwargs)
+        return quantize_int8(model) if backend == "int8" else model
+    _require_optimum()
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    path = onnx_path(model_name, onnx_dir)
+    if os.path.isdir(path):
+        return ORTModelForSequenceClassification.from_pretrained(path)
+    # torch-only loading options (e.g. problem_type) do not apply to the exported graph
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True,
+                                                              cache_dir=kwargs.get("cache_dir"))
+    model.save_pretrained(path)
+    return model
@@ -1,10 +1,12 @@
 import csv
 import os
+from datetime import datetime, timezone
 
 # Define the header for the CSV file.
+# timestamp was added later, older files keep their original header (see log_experiment)
 CSV_FIELDS = ["query", "answer", "samples", "model",
                "settings", "uncertainty_method", "raw_uncertainty",
-                 "calibrated_confidence", "retrieved_documents"]
+                 "calibrated_confidence", "retrieved_documents", "timestamp"]
 
 def initialize_csv(csv_filename: str):
     """
@@ -19,14 +21,26 @@ def initialize_csv(csv_filename: str):
     else:
         print(f"[CSV Logger] CSV file {csv_filename} already exists.")
 
+def _file_fields(csv_filename: str) -> list[str]:
+    """
+    Returns the header of an existing CSV file, so rows appended to files created
+    before a field was added stay aligned with their columns.
+    """
+    with open(csv_filename, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), None)
+    return header or CSV_FIELDS
+
 def log_experiment(csv_filename: str, data: dict):
     """
-    Appends a new row to the CSV file.
+    Appends a new row to the CSV file, stamped with the UTC time it was logged
+    (used by scripts/replay_logs.py to reproduce inter-arrival times).
     
     data: a dictionary containing keys as defined in CSV_FIELDS.
     """
+    data = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), **data}
+    fields = _file_fields(csv_filename)
     with open(csv_filename, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
         writer.writerow(data)
     #print(f"[CSV Logger] Logged experiment data: {data}")
     print(f"[CSV Logger] Logged experiment data.")
@@ -29,6 +29,8 @@ from logging import warning
 from typing import List
 from tqdm import tqdm
 
+from internal.inference_backend import check_backend, quantize_int8
+
 
 class AlignScorer:
     def __init__(
@@ -39,6 +41,7 @@ class AlignScorer:
         ckpt_path: str,
         evaluation_mode="nli_sp",
         verbose=True,
+        backend="torch",
     ) -> None:
         try:
             spacy.load("en_core_web_sm")
@@ -63,6 +66,7 @@ class AlignScorer:
             batch_size=batch_size,
             device=device,
             verbose=verbose,
+            backend=backend,
         )
         nltk.download("punkt")
         nltk.download("punkt_tab")
@@ -80,8 +84,11 @@ class Inferencer:
         batch_size=32,
         device="cuda",
         verbose=True,
+        backend="torch",
     ) -> None:
-        self.device = device
+        # the custom alignment heads have no ONNX export; int8 quantizes the Linear layers on cpu
+        check_backend(backend, allowed=("torch", "int8"))
+        self.device = "cpu" if backend == "int8" else device
         if ckpt_path is not None:
             self.model = BERTAlignModel(model=model)
             if os.path.exists(ckpt_path):  # added loading from huggingface using torch
@@ -96,6 +103,8 @@ class Inferencer:
             warning("loading UNTRAINED model!")
             self.model = BERTAlignModel(model=model).to(self.device)
         self.model.eval()
+        if backend == "int8":
+            quantize_int8(self.model)
         self.batch_size = batch_size
 
         self.config = AutoConfig.from_pretrained(model)
@@ -2,6 +2,7 @@ import pathlib
 import pandas as pd
 from tqdm.auto import tqdm                      
 from alignscore_utils import AlignScorer
+from internal.core import get_config
 
 CSV_IN   = pathlib.Path("output/answered_test_data/testset_with_predictions.csv")
 CKPT     = pathlib.Path("AlignScore-large.ckpt")   # -large or -base
@@ -13,7 +14,8 @@ def main() -> None:
     scorer = AlignScorer(model="roberta-large",
                 ckpt_path="https://huggingface.co/yzha/AlignScore/resolve/main/AlignScore-large.ckpt",  # or -base.ckpt
                 device="cpu",                          
-                batch_size=8)
+                batch_size=8,
+                backend=get_config().get("inference", {}).get("alignscore", "torch"))
 
     refs = df["reference"].tolist()
     hyps = df["final_answer"].tolist()
@@ -0,0 +1,239 @@
+"""
+Process-wide registry of the loaded models and indexes.
+
+Each entry has a name ("embedding", "reranker", "nli", ...) and a zero-argument
+loader. get(name) loads on first use, or waits if a background preload is already
+loading it. On top of that the registry:
+  • preloads the configured models in background threads at startup, so the first
+    query does not pay for every load; status() / ready() report progress
+  • keeps the estimated size of the loaded models under `memory_budget_mb`, unloading
+    the least recently used ones first, and unloads models idle for `idle_unload_s`
+  • sets torch's intra-op thread count once, so concurrent requests split the cores
+    instead of each running a full-width thread pool
+Unloading only drops the registry's reference; a request still holding the model
+finishes normally and the memory is freed after it. Pinned entries (the memory-mapped
+stores) are never unloaded.
+"""
+import gc
+import os
+import threading
+import time
+
+import psutil
+
+_PROC = psutil.Process(os.getpid())
+
+
+def model_size_mb(model):
+    """Parameters + buffers of a torch model (or of its .model / ._deberta); 0 if there are none."""
+    for candidate in (model, getattr(model, "model", None), getattr(model, "_deberta", None)):
+        if candidate is not None and callable(getattr(candidate, "parameters", None)):
+            try:
+                tensors = list(candidate.parameters()) + list(candidate.buffers())
+            except Exception:
+                continue
+            size = sum(t.numel() * t.element_size() for t in tensors)
+            if size:
+                return size / 2**20
+    return 0.0
+
+
+def torch_threads_for(max_concurrency=1, threads="auto"):
+    """Intra-op threads per request: all cores shared by `max_concurrency` concurrent requests."""
+    if threads not in (None, "auto"):
+        return int(threads)
+    return max(1, (os.cpu_count() or 1) // max(1, int(max_concurrency)))
+
+
+def configure_torch_threads(n_threads):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(n_threads)
+    print(f"[models] torch intra-op threads: {n_threads}")
+
+
+class _Entry:
+    def __init__(self, name, loader, pinned=False):
+        self.name = name
+        self.loader = loader
+        self.pinned = pinned
+        self.model = None
+        self.state = "unloaded"  # unloaded | loading | ready | failed
+        self.error = None
+        self.size_mb = 0.0
+        self.load_s = None
+        self.last_used = 0.0
+        self.loads = 0
+        self.loaded = threading.Event()
+
+
+class ModelRegistry:
+    def __init__(self, memory_budget_mb=0, idle_unload_s=0, torch_threads=None):
+        self.memory_budget_mb = memory_budget_mb or 0
+        self.idle_unload_s = idle_unload_s or 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._janitor = None
+        if torch_threads:
+            configure_torch_threads(torch_threads)
+
+    def register(self, name, loader, pinned=False):
+        """Add (or replace the loader of) an entry; an already loaded model is kept."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self._entries[name] = _Entry(name, loader, pinned)
+            else:
+                entry.loader, entry.pinned = loader, pinned
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def get(self, name, loader=None):
+        """The loaded model `name`, loading it (with `loader` if it is not registered yet) if needed."""
+        if name not in self._entries:
+            if loader is None:
+                raise KeyError(f"No model registered as {name!r}")
+            self.register(name, loader)
+        while True:
+            with self._lock:
+                entry = self._entries[name]
+                entry.last_used = time.monotonic()
+                if entry.state == "ready":
+                    model = entry.model
+                    break
+                load_here = entry.state != "loading"
+                if load_here:
+                    entry.state, entry.error = "loading", None
+                    entry.loaded.clear()
+            if load_here:
+                self._load(entry)
+            else:
+                entry.loaded.wait()
+            if entry.state == "failed":
+                raise RuntimeError(f"Loading {name} failed: {entry.error}")
+            # else loop: ready now (or unloaded again by the budget, then load again)
+        self.unload_idle()
+        return model
+
+    def _load(self, entry):
+        rss0, t0 = _PROC.memory_info().rss, time.perf_counter()
+        try:
+            model = entry.loader()
+        except Exception as e:
+            with self._lock:
+                entry.state, entry.error = "failed", repr(e)
+            entry.loaded.set()
+            print(f"[models] loading {entry.name} failed: {e!r}")
+            return
+        load_s = time.perf_counter() - t0
+        # RSS growth is only a fallback (ONNX Runtime sessions, concurrent loads inflate it)
+        size = model_size_mb(model) or max(0.0, (_PROC.memory_info().rss - rss0) / 2**20)
+        with self._lock:
+            entry.model, entry.state, entry.size_mb = model, "ready", (0.0 if entry.pinned else size)
+            entry.load_s, entry.last_used = load_s, time.monotonic()
+            entry.loads += 1
+        entry.loaded.set()
+        print(f"[models] {entry.name} loaded in {load_s:.1f}s (~{size:.0f} MB)")
+        self._enforce_budget(keep=entry.name)
+
+    def unload(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.state != "ready" or entry.pinned:
+                return False
+            entry.model, entry.state = None, "unloaded"
+        gc.collect()
+        print(f"[models] unloaded {name}")
+        return True
+
+    def loaded_mb(self):
+        with self._lock:
+            return sum(e.size_mb for e in self._entries.values() if e.state == "ready")
+
+    def _enforce_budget(self, keep=None):
+        if self.memory_budget_mb <= 0:
+            return
+        with self._lock:
+            ready = sorted((e for e in self._entries.values() if e.state == "ready" and not e.pinned),
+                           key=lambda e: e.last_used)
+            total = sum(e.size_mb for e in ready)
+            victims = []
+            for entry in ready:
+                if total <= self.memory_budget_mb:
+                    break
+                if entry.name != keep:
+                    victims.append(entry.name)
+                    total -= entry.size_mb
+        for name in victims:
+            self.unload(name)
+
+    def unload_idle(self):
+        if self.idle_unload_s <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            idle = [e.name for e in self._entries.values()
+                    if e.state == "ready" and not e.pinned and now - e.last_used > self.idle_unload_s]
+        for name in idle:
+            self.unload(name)
+
+    def preload(self, names):
+        """Load `names` in background threads (failures are reported in status()), and start idle unloading."""
+        for name in names:
+            if name not in self._entries:
+                print(f"[models] cannot preload unknown model {name!r}")
+                continue
+            threading.Thread(target=self._preload_one, args=(name,), name=f"preload-{name}", daemon=True).start()
+        self._start_janitor()
+
+    def _preload_one(self, name):
+        try:
+            self.get(name)
+        except Exception:
+            pass  # recorded in the entry
+
+    def _start_janitor(self, interval=60):
+        if self.idle_unload_s <= 0 or self._janitor is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.unload_idle()
+
+        self._janitor = threading.Thread(target=run, name="model-janitor", daemon=True)
+        self._janitor.start()
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {e.name: {"state": e.state, "size_mb": round(e.size_mb, 1), "load_s": e.load_s, "loads": e.loads,
+                             "idle_s": round(now - e.last_used, 1) if e.last_used else None, "error": e.error}
+                    for e in self._entries.values()}
+
+    def ready(self, names=None):
+        with self._lock:
+            names = self._entries.keys() if names is None else names
+            return all(name in self._entries and self._entries[name].state == "ready" for name in names)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry; an unconfigured one unless set_registry() was called (core.get_models() does)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+def set_registry(registry):
+    global _registry
+    with _registry_lock:
+        _registry = registry
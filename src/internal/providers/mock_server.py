@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""
+Local mock LLM server for offline load and latency testing.
+
+Speaks the two wire formats our providers use:
+  • Ollama / ChatUI   POST /api/generate            (stream true/false, NDJSON when streaming)
+  • OpenAI-style chat POST /v1/chat/completions     (stream true/false, SSE when streaming)
+
+Time-to-first-token, tokens/sec, error rate and response templates are configurable
+through the `mock_server` block in config.yaml or on the command line.
+
+Examples
+--------
+$ uv run -m internal.providers.mock_server                          # defaults from config.yaml
+$ uv run -m internal.providers.mock_server --port 8001 --ttft 0.5 --tps 20 --error-rate 0.05
+
+Point the providers at it with:
+    OLLAMA_HOST=localhost:11434                 → OllamaProvider
+    HuggingFaceProvider(model="http://localhost:11434", ...)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import yaml
+
+DEFAULT_TEMPLATES = [
+    "Based on the CONTEXT, {query} relates to several topics covered in the Cognitive Science "
+    "syllabus. The main idea is explained in the course readings, where the authors describe "
+    "the underlying mechanisms and give concrete examples [1]. Further details can be found in [2].",
+    "The CONTEXT did not include specific information but, in short, {query} is usually discussed "
+    "in terms of perception, memory and decision making, as covered in the course material [1].",
+]
+
+# the selection prompt built by GeneratorProvider.build_selection_prompt ends with this instruction
+_SELECTION_MARKER = "Reply *only* with the index digit"
+_QUESTION_RE = re.compile(r"QUESTION:\s*(.+?)\s*$", re.MULTILINE)
+
+
+@dataclass
+class MockSettings:
+    host: str = "127.0.0.1"
+    port: int = 11434
+    ttft: float = 0.3                   # seconds before the first token is sent
+    tokens_per_sec: float = 30.0        # decode speed after the first token
+    error_rate: float = 0.0             # fraction of requests answered with HTTP 500
+    response_tokens: int | None = None  # fixed answer length; None → template length
+    selection_response: str = "1"       # reply to the best-answer selection prompt
+    seed: int | None = None
+    templates: list[str] = field(default_factory=lambda: list(DEFAULT_TEMPLATES))
+
+
+def load_mock_settings(**overrides) -> MockSettings:
+    """
+    Read the `mock_server` block from config.yaml (if present) and apply any
+    non-None keyword overrides on top.
+    """
+    cfg_path = Path(__file__).resolve().parents[3] / "config.yaml"
+    block = {}
+    if cfg_path.exists():
+        with cfg_path.open(encoding="utf-8") as f:
+            block = (yaml.safe_load(f) or {}).get("mock_server", {}) or {}
+
+    known = {f.name for f in fields(MockSettings)}
+    values = {k: v for k, v in block.items() if k in known and v is not None}
+    values.update({k: v for k, v in overrides.items() if v is not None})
+    return MockSettings(**values)
+
+
+class MockLLM:
+    """
+    Produces fake completions with realistic timing. Thread-safe, so one instance
+    can serve all handler threads of the HTTP server.
+    """
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self._rng = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "tokens": 0}
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            fail = self._rng.random() < self.settings.error_rate
+            if fail:
+                self.stats["errors"] += 1
+        return fail
+
+    def completion_tokens(self, prompt: str, max_tokens: int | None) -> list[str]:
+        """
+        Pick a template, fill in the question and return the answer as a list of
+        whitespace-preserving tokens, capped at max_tokens.
+        """
+        if _SELECTION_MARKER in prompt:
+            return [self.settings.selection_response]
+
+        matches = _QUESTION_RE.findall(prompt)
+        query = matches[-1] if matches else prompt.strip()[:80]
+        with self._lock:
+            template = self._rng.choice(self.settings.templates)
+        words = template.format(query=query).split()
+
+        n_tokens = self.settings.response_tokens or len(words)
+        if max_tokens:
+            n_tokens = min(n_tokens, int(max_tokens))
+        # cycle the template if a fixed length longer than the template is requested
+        tokens = [words[i % len(words)] for i in range(max(1, n_tokens))]
+        tokens = [tok if i == 0 else " " + tok for i, tok in enumerate(tokens)]
+
+        with self._lock:
+            self.stats["tokens"] += len(tokens)
+        return tokens
+
+    def stream(self, tokens: list[str]):
+        """Yield tokens one at a time, sleeping for ttft and then 1/tokens_per_sec."""
+        per_token = 1.0 / self.settings.tokens_per_sec if self.settings.tokens_per_sec > 0 else 0.0
+        time.sleep(self.settings.ttft)
+        for i, tok in enumerate(tokens):
+            if i > 0 and per_token:
+                time.sleep(per_token)
+            yield tok
+
+    def wait_full(self, tokens: list[str]) -> None:
+        """Sleep as long as generating `tokens` would take without streaming."""
+        per_token = 1.0 / self.settings.tokens_per_sec if self.settings.tokens_per_sec > 0 else 0.0
+        time.sleep(self.settings.ttft + per_token * max(0, len(tokens) - 1))
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    server_version = "MockLLM/0.1"
+    protocol_version = "HTTP/1.1"
+
+    # quiet down the default per-request stderr logging
+    def log_message(self, format, *args):
+        return
+
+    @property
+    def llm(self) -> MockLLM:
+        return self.server.llm
+
+    #  helpers
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"{}")
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    #  routes
+    def do_GET(self):
+        if self.path in ("/", "/health"):
+            self._send_json(200, {"status": "ok", **self.llm.stats})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "mock"}]})
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            body = self._read_json()
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+
+        if self.path.rstrip("/") == "/api/generate":
+            handler = self._ollama_generate
+        elif self.path.rstrip("/") in ("/v1/chat/completions", "/chat/completions"):
+            handler = self._openai_chat
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+
+        if self.llm.should_fail():
+            time.sleep(self.llm.settings.ttft)
+            self._send_json(500, {"error": "mock server: injected failure"})
+            return
+        handler(body)
+
+    def _ollama_generate(self, body: dict) -> None:
+        model = body.get("model", "mock")
+        options = body.get("options") or {}
+        max_tokens = options.get("num_predict") or options.get("max_new_tokens")
+        tokens = self.llm.completion_tokens(body.get("prompt", ""), max_tokens)
+        started = time.perf_counter()
+
+        if body.get("stream", True):  # Ollama streams unless told otherwise
+            self._start_stream("application/x-ndjson")
+            for tok in self.llm.stream(tokens):
+                line = {"model": model, "created_at": _now(), "response": tok, "done": False}
+                self._write_chunk((json.dumps(line) + "\n").encode("utf-8"))
+            final = {"model": model, "created_at": _now(), "response": "", "done": True,
+                     "eval_count": len(tokens),
+                     "total_duration": int((time.perf_counter() - started) * 1e9)}
+            self._write_chunk((json.dumps(final) + "\n").encode("utf-8"))
+            self._end_stream()
+        else:
+            self.llm.wait_full(tokens)
+            self._send_json(200, {
+                "model": model,
+                "created_at": _now(),
+                "response": "".join(tokens),
+                "done": True,
+                "eval_count": len(tokens),
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+            })
+
+    def _openai_chat(self, body: dict) -> None:
+        model = body.get("model") or "mock"
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        tokens = self.llm.completion_tokens(prompt, max_tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if body.get("stream", False):
+            self._start_stream("text/event-stream")
+            for i, tok in enumerate(self.llm.stream(tokens)):
+                delta = {"content": tok}
+                if i == 0:
+                    delta["role"] = "assistant"
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            last = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self._write_chunk(f"data: {json.dumps(last)}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._end_stream()
+        else:
+            self.llm.wait_full(tokens)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt.split()),
+                          "completion_tokens": len(tokens),
+                          "total_tokens": len(prompt.split()) + len(tokens)},
+            })
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def start_mock_server(settings: MockSettings | None = None) -> tuple[ThreadingHTTPServer, threading.Thread]:
+    """
+    Start the mock server in a daemon thread and return (server, thread).
+    Use port 0 to let the OS pick a free port; the bound port is server.server_address[1].
+    Stop it again with server.shutdown().
+    """
+    settings = settings or load_mock_settings()
+    server = ThreadingHTTPServer((settings.host, settings.port), MockHandler)
+    server.daemon_threads = True
+    server.llm = MockLLM(settings)
+    thread = threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local mock LLM server (Ollama + OpenAI-style APIs)")
+    parser.add_argument("--host", help="Interface to bind (default from config.yaml)")
+    parser.add_argument("--port", type=int, help="Port to listen on, 0 picks a free port")
+    parser.add_argument("--ttft", type=float, help="Seconds before the first token")
+    parser.add_argument("--tps", dest="tokens_per_sec", type=float, help="Tokens per second after the first token")
+    parser.add_argument("--error-rate", dest="error_rate", type=float, help="Fraction of requests that fail with HTTP 500")
+    parser.add_argument("--response-tokens", dest="response_tokens", type=int, help="Fixed answer length in tokens")
+    parser.add_argument("--seed", type=int, help="Seed for template choice and error injection")
+    parser.add_argument("--template", dest="templates", action="append",
+                        help="Response template, may contain {query}. Repeat for several.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    settings = load_mock_settings(**vars(args))
+    server, thread = start_mock_server(settings)
+    host, port = server.server_address[:2]
+    print(f"[MockLLM] Serving on http://{host}:{port}  (ttft={settings.ttft}s, "
+          f"{settings.tokens_per_sec} tok/s, error_rate={settings.error_rate})")
+    print(f"[MockLLM] Ollama endpoint : http://{host}:{port}/api/generate")
+    print(f"[MockLLM] OpenAI endpoint : http://{host}:{port}/v1/chat/completions")
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        print("\n[MockLLM] Shutting down.")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
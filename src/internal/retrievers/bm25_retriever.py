@@ -5,49 +5,30 @@ if sys.platform.startswith("win"):
     # pretend we have a resource module so downstream imports just get a no-op
     sys.modules['resource'] = types.ModuleType('resource')
 
-import os, json, glob
+import os, json
 import bm25s
 import Stemmer
 
 
-def collect_chunks():
-    #base_dir = os.path.dirname(__file__)               
-    #project_root  = os.path.dirname(base_dir)                  
-    processed_dir = os.path.join('data/processed_syllabi')
-
-    chunks = []
-    for path in glob.glob(os.path.join(processed_dir, '*', 'processed_chunks.json')):
-        with open(path, encoding='utf-8') as f:
-            chunks.extend(json.load(f))
-    return chunks
-
-def load_index(mmap=True):
-    index_dir = os.path.join("data/bm25_index")
-
-    # load BM25  raw corpus
-    retriever = bm25s.BM25.load(index_dir , mmap=mmap, load_corpus=True)
+def load_index(mmap=True, index_dir='data/bm25_index'):
+    """
+    Load the BM25 index (without its raw corpus) and the row -> chunk_id mapping.
+    Returns a (retriever, chunk_ids) tuple for bm25_retrieve.
+    """
+    retriever = bm25s.BM25.load(index_dir , mmap=mmap, load_corpus=False)
 
     # reload the chunk-id ordering
     with open(os.path.join(index_dir , 'chunk_ids.json'), encoding='utf-8') as f:
         chunk_ids = json.load(f)
+    return retriever, chunk_ids
 
-    # rebuild id→full-chunk map
-    chunks    = collect_chunks()
-    chunk_map = {c['chunk_id']: c for c in chunks}
-    return retriever, chunk_ids, chunk_map
 
-
-def bm25_retrieve(query, top_k=5):
+def tokenize_query(query):
+    """Query tokens (str) with the same lowercasing, stopwords and stemming as bm25_retrieve."""
     stemmer= Stemmer.Stemmer("english")
 
-    retriever, chunk_ids, chunk_map = load_index(mmap=True)
-
-    # make sure the reloaded corpus is non-empty
-    if not retriever.corpus:
-        raise RuntimeError("Reloaded BM25.corpus is empty!")
-
     # tokenize into a list of list-of-strings
-    tokenized = bm25s.tokenize(
+    return bm25s.tokenize(
         [query],               # note the list here → [[…]]
         lower=True,
         stopwords="english",
@@ -58,33 +39,49 @@ def bm25_retrieve(query, top_k=5):
         allow_empty=True
     )
 
-    # retrieve returns (docs_array, scores_array)
-    results, scores = retriever.retrieve(tokenized, k=top_k)
-    
+
+def bm25_retrieve(query, top_k=5, index=None):
+    """
+    Lexical top_k search, returning [{"id", "score"}]. Text and metadata are
+    hydrated from the chunk store later (see ChunkStore.hydrate).
+    `index` is an already loaded (retriever, chunk_ids) tuple from load_index();
+    if omitted the default index is loaded from disk.
+    """
+    retriever, chunk_ids = index if index is not None else load_index(mmap=True)
+    tokenized = tokenize_query(query)
+
+    # without a corpus, retrieve returns (doc_rows, scores)
+    k = min(top_k, len(chunk_ids))
+    rows, scores = retriever.retrieve(tokenized, k=k, show_progress=False)
+
     # flatten the first (and only) row into a Python list
     results_out = []
-    for doc_dict, score in zip(results[0], scores[0]):
-        raw_id = doc_dict["id"]
-        cid = chunk_ids[raw_id] if isinstance(raw_id, int) else raw_id
-        chunk = chunk_map[cid]
-        # chunk has keys: chunk_text, chunk_id, course, title, author…etc
-        metadata = { k: v for k, v in chunk.items() if k not in ("chunk_text","embedding") }
+    for row, score in zip(rows[0], scores[0]):
         results_out.append({
-            "id":       cid,
-            "score":    float(score),
-            "text":     chunk["chunk_text"],
-            "metadata": metadata
+            "id":    chunk_ids[int(row)],
+            "score": float(score),
         })
 
     return results_out
 
 
+def bm25_scores(query, index=None):
+    """
+    BM25 score of every indexed chunk (float32 array in chunk_ids order), read
+    straight from the sparse score matrix instead of a top-k selection.
+    """
+    retriever, _ = index if index is not None else load_index(mmap=True)
+    # unknown (and empty) tokens are dropped; no tokens left scores every chunk 0
+    token_ids = retriever.get_tokens_ids([t for t in tokenize_query(query)[0] if t])
+    return retriever.get_scores_from_ids(token_ids)
+
+
 def main():
     index_dir = os.path.join("bm25_index")
 
     stemmer= Stemmer.Stemmer("english")
 
-    retriever, chunk_ids, chunk_map = load_index(mmap=True)
+    retriever, chunk_ids = load_index(mmap=True)
 
     # Tokenize the query into a list-of-list-of-str [["what","is","the","prefrontal","cortex"]]
     query_tokens = bm25s.tokenize(
@@ -107,5 +104,6 @@ def main():
 
 if __name__ == "__main__":
     #main()
+    from internal.database_setup.chunk_store import ChunkStore
     results_out = bm25_retrieve("What is the prefrontal cortex?", top_k=2)
-    print(results_out)
+    print(ChunkStore().hydrate(results_out))
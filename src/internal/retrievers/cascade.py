@@ -0,0 +1,59 @@
+"""
+Rerank cascade: a cheap fused ranking of the hybrid candidates decides which ones
+the cross-encoder scores.
+
+The candidates carry the scores of the legs that found them (`distance` from the
+semantic leg, `bm25_score` from BM25). They are ranked by
+  rrf     sum over legs of 1 / (rrf_k + rank in that leg)
+  linear  semantic_weight * cosine + (1 - semantic_weight) * bm25, both min-max
+          normalized over the candidates (0 for a leg that did not return the chunk)
+and only the best `size` go to the reranker. scripts/rerank_cascade.py measures on
+the test sets how small `size` can be before the final max_docs selection changes,
+and fits semantic_weight for the linear blend.
+"""
+import numpy as np
+
+
+def leg_scores(docs):
+    """(cosine, bm25) per candidate; NaN where that leg did not return the chunk."""
+    cosine = np.array([1 - d["distance"] / 2 if d.get("distance") is not None else np.nan for d in docs], dtype=np.float64)
+    bm25 = np.array([d["bm25_score"] if d.get("bm25_score") is not None else np.nan for d in docs], dtype=np.float64)
+    return cosine, bm25
+
+
+def _ranks(scores):
+    """1-based rank by descending score; NaN stays unranked (inf)."""
+    ranks = np.full(len(scores), np.inf)
+    found = np.flatnonzero(~np.isnan(scores))
+    ranks[found[np.argsort(-scores[found], kind="stable")]] = np.arange(1, len(found) + 1)
+    return ranks
+
+
+def _minmax(scores):
+    found = ~np.isnan(scores)
+    if not found.any():
+        return np.zeros(len(scores))
+    lo, hi = scores[found].min(), scores[found].max()
+    out = (scores - lo) / (hi - lo) if hi > lo else np.where(found, 1.0, 0.0)
+    return np.where(found, out, 0.0)
+
+
+def fused_scores(docs, method="rrf", rrf_k=60, semantic_weight=0.5):
+    cosine, bm25 = leg_scores(docs)
+    if method == "rrf":
+        return 1 / (rrf_k + _ranks(cosine)) + 1 / (rrf_k + _ranks(bm25))
+    if method == "linear":
+        return semantic_weight * _minmax(cosine) + (1 - semantic_weight) * _minmax(bm25)
+    raise ValueError(f"Unknown cascade method: {method}")
+
+
+def fused_order(docs, method="rrf", rrf_k=60, semantic_weight=0.5):
+    """Candidate indices best first; ties keep the retrieval order."""
+    return np.argsort(-fused_scores(docs, method, rrf_k, semantic_weight), kind="stable")
+
+
+def shortlist(docs, size, method="rrf", rrf_k=60, semantic_weight=0.5):
+    """The `size` best candidates by fused rank (all of them if size <= 0 or there are fewer)."""
+    if size <= 0 or len(docs) <= size:
+        return docs
+    return [docs[i] for i in fused_order(docs, method, rrf_k, semantic_weight)[:size]]
@@ -0,0 +1,96 @@
+"""
+Exact hybrid retrieval: both legs scored over the whole corpus, fused, one top-k.
+
+The default hybrid stage (core.hybrid_retrieve) concatenates the semantic top
+`sem_k` and the BM25 top `lex_k`, so a chunk that is, say, 51st on both legs is
+never a candidate and the scores are never combined. Here the dense scores of every
+chunk come from one matrix-vector product over the flat index and the BM25 scores of
+every chunk straight from the bm25s sparse matrix; the two are fused in numpy:
+  weighted  w * minmax(dense) + (1 - w) * minmax(bm25), min and max over the filtered chunks
+  rrf       sum over legs of 1 / (rrf_k + rank), ranks taken within each leg's
+            best `rrf_depth` chunks (chunks deeper than that, or with a BM25 score
+            of 0, get nothing from that leg)
+Needs the flat (or quantized, which keeps the flat vectors) vector store.
+"""
+import numpy as np
+
+from internal.database_setup.vector_store import FlatVectorStore
+from internal.retrievers.bm25_retriever import bm25_scores
+
+
+def minmax(scores, valid=None):
+    """Scale to [0, 1] by the min and max over the `valid` chunks (all if None)."""
+    ref = scores if valid is None else scores[valid]
+    if len(ref) == 0:
+        return np.zeros_like(scores)
+    lo, hi = ref.min(), ref.max()
+    return (scores - lo) / (hi - lo) if hi > lo else np.zeros_like(scores)
+
+
+def rrf_scores(scores, rrf_k=60, depth=1000, valid=None):
+    """Reciprocal-rank contribution of every chunk for one leg (0 outside the top `depth`)."""
+    out = np.zeros(len(scores), dtype=np.float32)
+    if valid is not None:
+        scores = np.where(valid, scores, -np.inf)
+    depth = min(depth, len(scores))
+    if depth == 0:
+        return out
+    top = np.argpartition(-scores, depth - 1)[:depth]
+    top = top[np.argsort(-scores[top])]
+    top = top[np.isfinite(scores[top])]
+    out[top] = 1.0 / (rrf_k + np.arange(1, len(top) + 1))
+    return out
+
+
+class ExactHybridScorer:
+    def __init__(self, vector_store, bm25_index, fusion="weighted", rrf_k=60, rrf_depth=1000):
+        if fusion not in ("weighted", "rrf"):
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        flat = vector_store if isinstance(vector_store, FlatVectorStore) else getattr(vector_store, "flat", None)
+        if flat is None:
+            raise ValueError("exact_hybrid retrieval needs the flat or quantized vector store")
+        self.flat = flat
+        self.bm25_index = bm25_index
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.rrf_depth = rrf_depth
+
+        # BM25 row -> flat row; chunks missing from the dense index (-1) are dropped
+        row_of = {cid.decode("utf-8"): i for i, cid in enumerate(flat.ids)}
+        lex_rows = np.array([row_of.get(cid, -1) for cid in bm25_index[1]], dtype=np.int64)
+        self._lex_src = np.flatnonzero(lex_rows >= 0)
+        self._lex_dst = lex_rows[self._lex_src]
+
+    def lexical_scores(self, query):
+        """BM25 scores in flat-index row order."""
+        scores = np.zeros(self.flat.count(), dtype=np.float32)
+        scores[self._lex_dst] = bm25_scores(query, index=self.bm25_index)[self._lex_src]
+        return scores
+
+    def fuse(self, dense, lexical, semantic_weight=0.5, mask=None):
+        if self.fusion == "rrf":
+            valid = mask if mask is not None else np.ones(len(dense), dtype=bool)
+            fused = (semantic_weight * rrf_scores(dense, self.rrf_k, self.rrf_depth, valid)
+                     + (1 - semantic_weight) * rrf_scores(lexical, self.rrf_k, self.rrf_depth, valid & (lexical > 0)))
+        else:
+            fused = semantic_weight * minmax(dense, mask) + (1 - semantic_weight) * minmax(lexical, mask)
+        if mask is not None:
+            fused = np.where(mask, fused, -np.inf)
+        return fused
+
+    def search(self, query, query_embedding, top_k, semantic_weight=0.5, courses=None):
+        """
+        Top-k of the fused scores as [{"id", "score", "distance", "bm25_score", "source"}],
+        best first; `distance` is the dense distance, as in the semantic leg.
+        """
+        dense = self.flat.scores([query_embedding])[0]
+        lexical = self.lexical_scores(query)
+        mask = self.flat.course_mask(courses) if courses else None
+        fused = self.fuse(dense, lexical, semantic_weight, mask)
+
+        k = min(top_k, len(fused))
+        top = np.argpartition(-fused, k - 1)[:k]
+        top = top[np.argsort(-fused[top])]
+        return [{"id": self.flat.ids[r].decode("utf-8"), "score": float(fused[r]),
+                 "distance": float(2 - 2 * dense[r]), "bm25_score": float(lexical[r]), "source": "exact_hybrid"}
+                for r in top if np.isfinite(fused[r])]
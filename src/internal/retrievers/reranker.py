@@ -0,0 +1,113 @@
+"""
+Cross-encoder serving path for the rerank stage.
+
+RerankerService wraps the CrossEncoder with
+  • a bounded LRU cache of (query hash, chunk_id) -> score, so repeated questions and
+    eval reruns skip the model; it is cleared when the index version changes (the
+    chunk store's `version`, which changes whenever the store is rebuilt)
+  • length bucketing: uncached pairs are sorted by text length before batching, so
+    each batch is padded only to its own longest pair
+  • an explicit max_length (tokens of query + chunk) and batch size
+  • a torch / int8 / onnx inference backend (see internal.inference_backend)
+Run this file to time batch sizes on chunks from the store.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from internal.inference_backend import load_cross_encoder
+
+DEFAULT_RERANKER = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+
+def query_hash(query):
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()
+
+
+class RerankerService:
+    def __init__(self, model_name=DEFAULT_RERANKER, max_length=512, batch_size=32, cache_size=50000, model=None,
+                 backend="torch"):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.backend = backend
+        self.model = model if model is not None else load_cross_encoder(model_name, max_length, backend=backend)
+        self.index_version = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, index_version):
+        if index_version is not None and index_version != self.index_version:
+            self._cache.clear()
+            self.index_version = index_version
+
+    def predict(self, pairs):
+        """Scores of (query, text) pairs, batched shortest-first; returned in input order."""
+        if not pairs:
+            return []
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        sorted_scores = self.model.predict([pairs[i] for i in order], batch_size=self.batch_size,
+                                           show_progress_bar=False)
+        scores = [0.0] * len(pairs)
+        for i, score in zip(order, sorted_scores):
+            scores[i] = float(score)
+        return scores
+
+    def score(self, query, docs, index_version=None):
+        """Rerank score of each doc ({'id', 'text'}), in input order; cached per (query, chunk_id)."""
+        qhash = query_hash(query)
+        with self._lock:
+            self._check_version(index_version)
+            scores = [self._cache.get((qhash, doc['id'])) for doc in docs]
+            for doc, score in zip(docs, scores):
+                if score is not None:
+                    self._cache.move_to_end((qhash, doc['id']))
+        todo = [i for i, score in enumerate(scores) if score is None]
+        new_scores = self.predict([(query, docs[i]['text']) for i in todo])
+
+        with self._lock:
+            self.hits += len(docs) - len(todo)
+            self.misses += len(todo)
+            # a rebuild that happened meanwhile already cleared the cache; don't refill it with old scores
+            store = index_version is None or index_version == self.index_version
+            for i, score in zip(todo, new_scores):
+                scores[i] = score
+                if store:
+                    self._cache[(qhash, docs[i]['id'])] = score
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scores
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+
+
+if __name__ == "__main__":
+    # pairs/s per batch size, bucketed vs. unsorted, on random chunks of the store
+    import random
+    from internal.database_setup.chunk_store import ChunkStore
+
+    store = ChunkStore()
+    rows = random.Random(0).sample(range(len(store)), min(200, len(store)))
+    pairs = [("What does the prefrontal cortex do?", store.text(r)) for r in rows]
+    service = RerankerService(cache_size=0)
+    service.predict(pairs[:8])  # warm-up
+    for batch_size in (8, 16, 32, 64):
+        service.batch_size = batch_size
+        t0 = time.perf_counter()
+        service.predict(pairs)
+        bucketed = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        service.model.predict(pairs, batch_size=batch_size, show_progress_bar=False)
+        unsorted = time.perf_counter() - t0
+        print(f"batch_size={batch_size:3d}  bucketed {len(pairs) / bucketed:7.1f} pairs/s  "
+              f"unsorted {len(pairs) / unsorted:7.1f} pairs/s")
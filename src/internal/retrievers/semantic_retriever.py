@@ -1,17 +1,9 @@
 import torch
-from sentence_transformers import SentenceTransformer
 from internal.database_setup.chroma_db import get_collection, init_db 
-from functools import lru_cache
+from internal.database_setup.chunk_store import ChunkStore
+from internal.database_setup.vector_store import VectorStore
 
 
-@lru_cache(maxsize=1)
-def load_embedding_model(model_name: str = "intfloat/multilingual-e5-large-instruct", device: str = "cpu"):
-    """
-    Loads and caches the embedding model.
-    """
-    model = SentenceTransformer(model_name, device=device)
-    return model
-
 def embed_query(query, model):
     """
     Embeds the query using the provided SentenceTransformer model.
@@ -26,16 +18,26 @@ def retrieve_documents(query, model, collection, top_k=5):
     Given a natural language query, embeds the query and performs a vector similarity search on
     the provided ChromaDB collection. Returns the top_k results.
     
-    Each result will include document id, metadata, text, and similarity distance.
+    Each result will include document id and similarity distance; text and metadata
+    are hydrated from the chunk store (see ChunkStore.hydrate).
     """
     # Embed the query.
     query_embedding = embed_query(query, model)
-    
-    # Query the collection.
+    return search_collection(query_embedding, collection, top_k=top_k)
+
+def search_collection(query_embedding, collection, top_k=5):
+    """
+    Vector similarity search with an already embedded query (see retrieve_documents).
+    `collection` is a Chroma collection or any VectorStore backend.
+    """
+    if isinstance(collection, VectorStore):
+        return collection.search([query_embedding], top_k=top_k)[0]
+
+    # Query the collection; ids are always returned, only ask for the distances.
     results = collection.query(
         query_embeddings=[query_embedding],
         n_results=top_k,
-        include=["metadatas", "documents", "distances"]
+        include=["distances"]
     )
 
     # The results dictionary contains lists; convert to a list of dicts.
@@ -43,11 +45,9 @@ def retrieve_documents(query, model, collection, top_k=5):
     for i in range(len(results["ids"][0])):
         retrieved.append({
             "id": results["ids"][0][i],
-            "metadata": results["metadatas"][0][i],
-            "text": results["documents"][0][i],
             "distance": results["distances"][0][i]
         })
-    return retrieved 
+    return retrieved
 
 
 if __name__ == "__main__":
@@ -57,15 +57,17 @@ if __name__ == "__main__":
     collection = get_collection(db_client, collection_name="rag_documents")
     print(f"Collection count: {collection.count()}")  # Should print 13758
     
-    # Load your query embedding model.
+    # Load your query embedding model (through the model registry, see core.get_embedding_model).
+    from internal.core import get_embedding_model
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    query_model = load_embedding_model(device=device)
+    query_model = get_embedding_model(device)
     
     # Example query:
     query = "What does the prefrontal cortex do?"
     
     # Retrieve top 5 documents.
     results = retrieve_documents(query, query_model, collection, top_k=5)
+    results = ChunkStore().hydrate(results)
     
     print("Retrieved documents:")
     for res in results:
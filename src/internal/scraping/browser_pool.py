@@ -0,0 +1,124 @@
+"""
+Reusable headless browsers for JavaScript-rendered pages (AU course catalogue).
+
+Starting Chrome and sleeping a fixed 5 s per page made scraping the course pages
+mostly startup and sleep. BrowserPool keeps up to `size` drivers alive, hands one
+to each concurrent fetch and waits only until the course-description container is
+in the DOM. Anything with a `fetch(url) -> html` method can stand in for the pool
+(see StaticBackend), e.g. to test the scraper against local HTML fixtures.
+"""
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from internal.logging_utils.scraping_logger import logger
+
+# container that holds the course description once the page is rendered
+AU_COURSE_SELECTOR = "main"
+
+
+def chrome_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--log-level=3")  # Only log errors
+    # chromedriver should load automatically, otherwise make sure you have the correct one in your PATH.
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    def __init__(self, size=2, wait_selector=AU_COURSE_SELECTOR, timeout=20, driver_factory=chrome_driver):
+        self.size = size
+        self.wait_selector = wait_selector
+        self.timeout = timeout
+        self.driver_factory = driver_factory
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._drivers) < self.size:
+                driver = self.driver_factory()
+                self._drivers.append(driver)
+                return driver
+        return self._idle.get()
+
+    def fetch(self, url):
+        """Rendered HTML of `url`, once `wait_selector` is present (or after `timeout`)."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver = self._acquire()
+        try:
+            driver.get(url)
+            try:
+                WebDriverWait(driver, self.timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, self.wait_selector)))
+            except TimeoutException:
+                logger.warning(f"'{self.wait_selector}' did not appear within {self.timeout}s on {url}")
+            return driver.page_source
+        finally:
+            self._idle.put(driver)
+
+    def fetch_many(self, urls):
+        """Rendered HTML of several pages, fetched concurrently (one per driver), in input order."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(self.fetch, urls))
+
+    def close(self):
+        with self._lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logger.debug(f"Error closing browser: {e}")
+            self._drivers = []
+            self._idle = queue.Queue()
+
+
+class StaticBackend:
+    """Serves pages from a directory, by the last path segment of the URL (+ .html)."""
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+
+    def fetch(self, url):
+        name = urlparse(url).path.rstrip("/").split("/")[-1] or "index"
+        with open(os.path.join(self.fixture_dir, name + ".html"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def fetch_many(self, urls):
+        return [self.fetch(url) for url in urls]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_browser_backend(size=None):
+    """Process-wide backend for rendered pages; a BrowserPool unless set_browser_backend() was called."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = BrowserPool(size=size or 2)
+            atexit.register(_backend.close)
+        return _backend
+
+
+def set_browser_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -1,26 +1,21 @@
-import requests
 from newspaper import Article
 from bs4 import BeautifulSoup
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import time
+from internal.scraping.http_cache import get_fetcher
+from internal.scraping.browser_pool import AU_COURSE_SELECTOR, get_browser_backend
 #from logging.logging_config import logger
 import logging
 logger = logging.getLogger(__name__)
 
-def get_html_soup(url):
-    """Fetches HTML content from a URL and returns a BeautifulSoup object for parsing."""
-    try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        if response.status_code == 200:
-            return BeautifulSoup(response.text, "html.parser")
-        else:
-            logger.warning(f"Error {response.status_code}: Failed to fetch {url}")
-            return None
-    except requests.RequestException as e:
-        logger.warning(f"Request failed: {e}")
+def get_html_soup(url, html=None):
+    """
+    Fetches HTML content from a URL (through the pooled, cached fetcher) and returns
+    a BeautifulSoup object for parsing. Pass `html` to parse an already fetched page.
+    """
+    html = html if html is not None else get_fetcher().fetch(url)
+    if html is None:
         return None
+    return BeautifulSoup(html, "html.parser")
 
 def extract_author(article, soup):
     """Extracts author from an article using Newspaper3k and BeautifulSoup as fallback."""
@@ -77,32 +72,12 @@ def extract_html_text(soup, debug=False):
     
     return " ".join(paragraphs)
 
-def scrape_au_course(url):
-    """
-    Uses Selenium to render the JavaScript on an AU course page,
-    then extracts the course description text.
-    """
-    # Set up headless Chrome
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--log-level=3")  # Only log errors
-    
-    # chromedriver should load automatically, otherwise make sure you have the correct one in your PATH.
-    driver = webdriver.Chrome(options=options)
-    driver.get(url)
-    
-    # Wait for content to load
-    time.sleep(5)
-    
-    html = driver.page_source
-    driver.quit()
-    
+def extract_au_course_text(html):
+    """Course description text from a rendered AU course page."""
     soup = BeautifulSoup(html, "html.parser")
     
     # Find the container with the course description
-    container = soup.find("main")
+    container = soup.select_one(AU_COURSE_SELECTOR)
     if container:
         logger.info("Found course description container.")
         return container.get_text(separator="\n", strip=True)
@@ -110,16 +85,33 @@ def scrape_au_course(url):
         logger.debug("Course description container not found. Returning full page text.")
         return soup.get_text(separator="\n", strip=True)
 
+def scrape_au_course(url, backend=None):
+    """
+    Renders the JavaScript on an AU course page with a pooled headless browser
+    (see scraping.browser_pool), then extracts the course description text.
+    `backend` is anything with fetch(url) -> html, e.g. a StaticBackend for fixtures.
+    """
+    backend = backend or get_browser_backend()
+    return extract_au_course_text(backend.fetch(url))
+
+def scrape_au_courses(urls, backend=None):
+    """Course description texts of several AU course pages, rendered concurrently."""
+    backend = backend or get_browser_backend()
+    return [extract_au_course_text(html) for html in backend.fetch_many(urls)]
+
 def scrape_html_standard(url):
     """
-    Extracts metadata and content from an online article or blog post.
+    Extracts metadata and content from an online article or blog post. The page is
+    downloaded once and the same HTML is parsed by newspaper and BeautifulSoup.
     """
-    
-    soup = get_html_soup(url)
+    html = get_fetcher().fetch(url)
+    if html is None:
+        return None
+    soup = get_html_soup(url, html)
     article = Article(url)
     
     try:
-        article.download()
+        article.download(input_html=html)
         article.parse()
     except Exception as e:
         logger.warning(f"Error parsing article: {e}")
@@ -173,33 +165,4 @@ def scrape_html(url):
         return data
     
     else:
-        soup = get_html_soup(url)
-        article = Article(url)
-        
-        try:
-            article.download()
-            article.parse()
-        except Exception as e:
-            logger.warning(f"Error parsing article: {e}")
-            return None
-        
-        text = extract_html_text(soup, debug = True)
-
-        if not text.strip():
-            logger.warning(f"Warning: No text extracted from {url}")
-            flag = "empty_text"
-        else:
-            flag = ""
-
-        data = {
-            "document_type": "online_article",
-            "title": article.title or url.split("/")[-1].replace("-", " ").title(),  # Guess title from URL
-            "author": extract_author(article, soup),
-            "source": url,
-            "date_published": extract_date(article, soup),
-            "flag": flag,
-            "text": text
-        }
-        return data
-
-
+        return scrape_html_standard(url)
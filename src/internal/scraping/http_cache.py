@@ -0,0 +1,106 @@
+"""
+Pooled HTTP fetching with an on-disk cache for the HTML scraper.
+
+Every page is stored under data/http_cache/ together with its ETag/Last-Modified
+validators. Fetching a cached URL sends a conditional request, so an unchanged page
+costs a 304 instead of a full download. Each thread gets its own requests.Session
+(sessions are not guaranteed thread-safe), all with keep-alive connection pools.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from internal.logging_utils.scraping_logger import logger
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+class CachedFetcher:
+    def __init__(self, cache_dir="data/http_cache", timeout=30, pool_size=16):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self.stats = {"downloaded": 0, "not_modified": 0, "stale": 0}
+
+    @property
+    def session(self):
+        if not hasattr(self._local, "session"):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            self._local.session = session
+        return self._local.session
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".html")
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None, None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "r", encoding="utf-8") as f:
+            return meta, f.read()
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        meta = {"url": url, "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")}
+        # body first, so metadata never points at a missing or partial body
+        for path, content in ((body_path, response.text), (meta_path, json.dumps(meta))):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+    def fetch(self, url):
+        """HTML of `url`, revalidated against the cache; None if it cannot be fetched."""
+        meta, body = self._load(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            if body is not None:
+                logger.warning(f"Request failed: {e}; using cached copy of {url}")
+                self.stats["stale"] += 1
+                return body
+            logger.warning(f"Request failed: {e}")
+            return None
+
+        if response.status_code == 304 and body is not None:
+            self.stats["not_modified"] += 1
+            return body
+        if response.status_code != 200:
+            logger.warning(f"Error {response.status_code}: Failed to fetch {url}")
+            return None
+        self._store(url, response)
+        self.stats["downloaded"] += 1
+        return response.text
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Process-wide CachedFetcher, shared by all scraper threads."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = CachedFetcher()
+        return _fetcher
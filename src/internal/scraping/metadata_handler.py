@@ -1,8 +1,10 @@
 import json
 import os
+import hashlib
+from internal.scraping.utils import clean_filename
 from internal.logging_utils.scraping_logger import logger
 
-CORRECTIONS_FILE = r"data\processed_syllabi\metadata_corrections.json"
+CORRECTIONS_FILE = os.path.join("data", "processed_syllabi", "metadata_corrections.json")
 
 def load_metadata_corrections():
     """Loads manually corrected metadata from a JSON file or creates an empty one if missing."""
@@ -18,6 +20,16 @@ def save_metadata_corrections(metadata):
         json.dump(metadata, f, indent=4, ensure_ascii=False)
     return
 
+def new_corrections_entry(document_data):
+    return {
+        "title": document_data["title"],
+        "author": document_data.get("author", "Unknown"),
+        "date_published": document_data.get("date_published", "Unknown"),
+        "document_type": document_data.get("document_type", "Unknown"),
+        "source": document_data.get("source", "Unknown"),
+        "flag": document_data.get("flag", "Unknown")
+    }
+
 def update_metadata_corrections(document_data):
     """
     Check if document metadata exists in corrections file.
@@ -29,16 +41,86 @@ def update_metadata_corrections(document_data):
 
     # Add document if it does not exist
     if doc_source not in metadata_corrections:
-        metadata_corrections[doc_source] = {
-            "title": document_data["title"],
-            "author": document_data.get("author", "Unknown"),
-            "date_published": document_data.get("date_published", "Unknown"),
-            "document_type": document_data.get("document_type", "Unknown"),
-            "source": document_data.get("source", "Unknown"),
-            "flag": document_data.get("flag", "Unknown")
-        }
+        metadata_corrections[doc_source] = new_corrections_entry(document_data)
         logger.info(f"New metadata added for: {doc_source}")
 
     save_metadata_corrections(metadata_corrections)
 
     return metadata_corrections  # Return updated metadata for logging
+
+
+class MetadataStore:
+    """
+    Metadata corrections and source -> filename lookups for one scraping run, in memory.
+
+    The corrections file is read once and written back atomically every `flush_every`
+    new entries and on flush()/exit, instead of once per document. The source of every
+    existing scraped JSON in a directory is read once, the first time the directory
+    is used, so get_stable_filename's per-call file reads are not needed.
+    """
+    def __init__(self, corrections_file=CORRECTIONS_FILE, flush_every=50):
+        self.corrections_file = corrections_file
+        self.flush_every = flush_every
+        self.corrections = {}
+        if os.path.exists(corrections_file):
+            with open(corrections_file, "r", encoding="utf-8") as f:
+                self.corrections = json.load(f)
+        self._pending = 0
+        self._sources = {}  # directory -> {file path: source}
+
+    def corrections_for(self, document_data):
+        """Corrections of the document's source, adding a new entry if it has none yet."""
+        doc_source = document_data["source"]
+        if doc_source not in self.corrections:
+            self.corrections[doc_source] = new_corrections_entry(document_data)
+            logger.info(f"New metadata added for: {doc_source}")
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self.flush()
+        return self.corrections[doc_source]
+
+    def _directory_sources(self, directory):
+        if directory not in self._sources:
+            sources = {}
+            if os.path.isdir(directory):
+                for name in os.listdir(directory):
+                    path = os.path.join(directory, name)
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            sources[path] = json.load(f).get("source")
+                    except Exception:
+                        sources[path] = None
+            self._sources[directory] = sources
+        return self._sources[directory]
+
+    def stable_filename(self, directory, title, source, extension=".json", page_range=None):
+        """Same naming rules as utils.get_stable_filename, answered from memory."""
+        base_filename = clean_filename(title).lower()
+        if page_range:
+            page_range = str(page_range).replace(',', '-')
+            base_filename += f"_page-{page_range.translate(str.maketrans('', '', '() '))}"
+            path = os.path.join(directory, f"{base_filename}{extension}")
+        else:
+            sources = self._directory_sources(directory)
+            path = os.path.join(directory, f"{base_filename}{extension}")
+            if path in sources and sources[path] != source:
+                url_hash = hashlib.md5(source.encode("utf-8")).hexdigest()[:8]
+                path = os.path.join(directory, f"{base_filename}_{url_hash}{extension}")
+        self._directory_sources(directory)[path] = source
+        return path
+
+    def flush(self):
+        if not self._pending and os.path.exists(self.corrections_file):
+            return
+        os.makedirs(os.path.dirname(self.corrections_file) or ".", exist_ok=True)
+        tmp_path = self.corrections_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.corrections, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.corrections_file)
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
@@ -1,7 +1,13 @@
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 import pymupdf  # PyMuPDF/fitz
 import pypdf
+from pypdf.generic import NullObject
 from pathlib import Path
 from internal.logging_utils.scraping_logger import logger
+from internal.scraping.utils import file_hash
 
 def _safe_meta_val(raw_val, default="Unknown"):
     """
@@ -69,32 +75,36 @@ def extract_pdf_metadata(pdf_path):
     return title, author, date_published, keywords
 
 
-def pymupdf_extract_pdf_metadata(pdf_path):
-    """Extracts metadata (title, author, date) from a PDF file."""
-    title, author, date_published = "Unknown", "Unknown", "Unknown"
+def pdf_metadata(doc):
+    """
+    (title, author, date, keywords) from an open pymupdf document, normalized like
+    extract_pdf_metadata, so the file does not have to be opened again with pypdf.
+    """
+    metadata = doc.metadata or {}
+    for key, value in metadata.items():
+        logger.debug(f"   pymupdf* {key}: {value}")
 
-    try:
-        with open(pdf_path, "rb") as f:
-            pdf_reader = pymupdf.open(f)
-            metadata = pdf_reader.metadata or {}
+    title = _safe_meta_val(metadata.get("title"), default="Unknown")
+    author = _safe_meta_val(metadata.get("author"), default="Unknown")
+    raw_date = _safe_meta_val(metadata.get("creationDate"), default="Unknown")
+    keywords = _safe_meta_val(metadata.get("keywords"), default="Unavailable")
 
-            if metadata:
-                # Print all metadata keys for debugging
-                for key, value in metadata.items():
-                    logger.debug(f"   pymupdf* {key}: {value}")
+    # format date correctly - YYYY-MM-DD format
+    if raw_date.startswith("D:") and len(raw_date) >= 10:
+        date_published = f"{raw_date[2:6]}-{raw_date[6:8]}-{raw_date[8:10]}"
+    else:
+        date_published = raw_date
+    return title, author, date_published, keywords
 
-            title = metadata.get("/title", "Unknown")
-            author = metadata.get("/author", "Unknown")
-            date_published = metadata.get("/creationDate", "Unknown")
-            keywords = metadata.get("/keywords", "Unavailable")
-            
-            # format date correctly - YYYY-MM-DD format
-            if date_published.startswith("D:"):
-                date_published = f"{date_published[2:6]}-{date_published[6:8]}-{date_published[8:10]}"
-    except Exception as e:
-        logger.warning(f"Error extracting metadata with PyPDF: {e}")
 
-    return title.strip(), author.strip(), date_published.strip(), keywords.strip()
+def pymupdf_extract_pdf_metadata(pdf_path):
+    """Extracts metadata (title, author, date, keywords) from a PDF file."""
+    try:
+        with pymupdf.open(pdf_path) as doc:
+            return pdf_metadata(doc)
+    except Exception as e:
+        logger.warning(f"Error extracting metadata with PyMuPDF: {e}")
+        return "Unknown", "Unknown", "Unknown", "Unavailable"
 
 
 def adjust_page_range(page_range, true_page_1):
@@ -115,7 +125,81 @@ def adjust_page_range(page_range, true_page_1):
     return (adjusted_start, adjusted_end)
 
 
-def extract_pdf_full_text(pdf_path, page_range=None, true_page_1=None, header_footer_margin=30, debug=False):
+class PdfPageCache:
+    """
+    SQLite cache of the two extraction stages, so a re-run only redoes what changed:
+      blocks      (file hash, page)         -> page height + [(bbox, block text)]
+      page_texts  (file hash, page, margin) -> block texts left after the header/footer filter
+    """
+    def __init__(self, path="data/pdf_cache.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # several scraper processes may share the file; wait for their writes
+        self._conn = sqlite3.connect(path, timeout=60)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS blocks (file TEXT, page INTEGER, data TEXT, PRIMARY KEY (file, page))")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS page_texts "
+                           "(file TEXT, page INTEGER, margin REAL, data TEXT, PRIMARY KEY (file, page, margin))")
+        self._conn.commit()
+
+    def _get(self, table, where, params, pages):
+        found = {}
+        for i in range(0, len(pages), 500):
+            part = list(pages[i:i + 500])
+            rows = self._conn.execute(
+                f"SELECT page, data FROM {table} WHERE {where} AND page IN ({','.join('?' * len(part))})", (*params, *part))
+            found.update((page, json.loads(data)) for page, data in rows)
+        return found
+
+    def get_blocks(self, file_hash, pages):
+        return self._get("blocks", "file = ?", (file_hash,), pages)
+
+    def put_blocks(self, file_hash, blocks):
+        self._conn.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?)",
+                               ((file_hash, page, json.dumps(data)) for page, data in blocks.items()))
+        self._conn.commit()
+
+    def get_page_texts(self, file_hash, margin, pages):
+        return self._get("page_texts", "file = ? AND margin = ?", (file_hash, margin), pages)
+
+    def put_page_texts(self, file_hash, margin, texts):
+        self._conn.executemany("INSERT OR REPLACE INTO page_texts VALUES (?, ?, ?, ?)",
+                               ((file_hash, page, margin, json.dumps(data)) for page, data in texts.items()))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def page_blocks(page):
+    """(page height, [(bbox, text)]) of one page; text joins the block's spans like before."""
+    blocks = []
+    for block in page.get_text("dict")["blocks"]:
+        texts = (span.get("text", "").strip() for line in block.get("lines", []) for span in line.get("spans", []))
+        blocks.append((list(block["bbox"]), " ".join(t for t in texts if t)))
+    return page.rect.height, blocks
+
+
+def _extract_blocks(pdf_path, pages):
+    """Worker: open the PDF once and read the blocks of `pages`."""
+    with pymupdf.open(pdf_path) as doc:
+        return {page_num: page_blocks(doc[page_num]) for page_num in pages}
+
+
+def filter_blocks(page_height, blocks, header_footer_margin, debug=False):
+    """Block texts of a page without the header/footer blocks (and without empty blocks)."""
+    texts = []
+    for bbox, text in blocks:
+        # Skip header/footer blocks based on vertical margins.
+        if bbox[1] < header_footer_margin or bbox[3] > (page_height - header_footer_margin):
+            if debug:
+                logger.debug(f"Skipping block with bbox {bbox}. Text: '{text}'")
+            continue
+        if text:
+            texts.append(text)
+    return texts
+
+
+def extract_pdf_full_text(pdf_path, page_range=None, true_page_1=None, header_footer_margin=30, debug=False,
+                          doc=None, workers=None, cache=None, pdf_hash=None):
     """
     Extracts all text from a PDF as one continuous stream.
     
@@ -125,72 +209,80 @@ def extract_pdf_full_text(pdf_path, page_range=None, true_page_1=None, header_fo
       true_page_1 (int): If using page_range, the viewer's page number corresponding to the first "real" content page.
       header_footer_margin (float): Vertical margin (points) to ignore blocks near the top/bottom (headers/footers).
       debug (bool): If True, prints debug information.
+      doc: An already opened pymupdf document of pdf_path (opened here otherwise).
+      workers (int): Processes to split the pages across (default: up to 4 for 64+ pages).
+      cache (PdfPageCache): Page cache; a default one under data/ if None, none if False.
+      pdf_hash (str): file_hash(pdf_path) if the caller already computed it.
     
     Returns:
       str: The full text extracted from the PDF.
     """
-    doc = pymupdf.open(pdf_path)
-    adjusted = adjust_page_range(page_range, true_page_1) if (page_range and true_page_1) else None
-    if adjusted:
-        page_nums = range(adjusted[0], adjusted[1] + 1)
-    else:
-        page_nums = range(len(doc))
-    
-    full_text = ""
-    stop_processing = False
+    own_doc = doc is None
+    doc = pymupdf.open(pdf_path) if own_doc else doc
+    try:
+        adjusted = adjust_page_range(page_range, true_page_1) if (page_range and true_page_1) else None
+        if adjusted:
+            page_nums = list(range(adjusted[0], adjusted[1] + 1))
+        else:
+            page_nums = list(range(len(doc)))
+
+        own_cache = cache is None
+        cache = PdfPageCache() if own_cache else cache
+        pdf_hash = (pdf_hash or file_hash(pdf_path)) if cache else None
+
+        # stage 2 (filtered texts) only needs stage 1 (blocks) for pages it has not seen with this margin
+        page_texts = cache.get_page_texts(pdf_hash, header_footer_margin, page_nums) if cache else {}
+        todo = [p for p in page_nums if p not in page_texts]
+        blocks = cache.get_blocks(pdf_hash, todo) if cache else {}
+        missing = [p for p in todo if p not in blocks]
+        if missing:
+            workers = workers or (min(4, os.cpu_count() or 1) if len(missing) >= 64 else 1)
+            if workers > 1:
+                size = -(-len(missing) // workers)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    for part in pool.map(_extract_blocks, [pdf_path] * workers,
+                                         [missing[i:i + size] for i in range(0, len(missing), size)]):
+                        blocks.update(part)
+            else:
+                blocks.update((p, page_blocks(doc[p])) for p in missing)
+            if cache:
+                cache.put_blocks(pdf_hash, {p: blocks[p] for p in missing})
+        new_texts = {p: filter_blocks(*blocks[p], header_footer_margin, debug) for p in todo}
+        if cache:
+            cache.put_page_texts(pdf_hash, header_footer_margin, new_texts)
+            if own_cache:
+                cache.close()
+        page_texts.update(new_texts)
+    finally:
+        if own_doc:
+            doc.close()
+
+    parts = []
     for page_num in page_nums:
-        if stop_processing:
-            break
-        page = doc[page_num]
-        page_dict = page.get_text("dict")
-        page_height = page.rect.height
-        #if debug:
-        #    logger.debug(f"\nProcessing page {page_num} (height: {page_height})")
-        for block in page_dict["blocks"]:
-            bbox = block["bbox"]
-            # Skip header/footer blocks based on vertical margins.
-            if bbox[1] < header_footer_margin or bbox[3] > (page_height - header_footer_margin):
-                if debug:
-                    block_debug_text = ""
-                    for line in block.get("lines", []):
-                        for span in line.get("spans", []):
-                            text = span.get("text", "").strip()
-                            if text:
-                                block_debug_text += text + " "
-                    block_debug_text = block_debug_text.strip()
-                    logger.debug(f"Skipping block with bbox {bbox}. Text: '{block_debug_text}'")
-                continue
-            # Combine text from all spans in the block.
-            block_text = ""
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    text = span.get("text", "").strip()
-                    if text:
-                        block_text += text + " "
-            block_text = block_text.strip()
-            if not block_text:
-                continue
+        for block_text in page_texts[page_num]:
             # Stop processing if the block's text exactly equals "references".
             if block_text.lower().strip() == "references":
                 if debug:
                     logger.debug(f"Encountered 'References' block: '{block_text}'. Stopping processing.")
-                stop_processing = True
-                break
-            # Append the block text to the full text.
-            full_text += block_text + " "
-        full_text += "\n"  # Separate pages with a newline.
-    return full_text.strip()
+                parts.append("\n")
+                return "".join(parts).strip()
+            parts.append(block_text + " ")
+        parts.append("\n")  # Separate pages with a newline.
+    return "".join(parts).strip()
 
 
-def scrape_pdf(pdf_path, page_range=None, true_page_1=None):
+def scrape_pdf(pdf_path, page_range=None, true_page_1=None, workers=None, pdf_hash=None):
     """
     Extracts metadata and structured text from a PDF.
     - Books: Uses true page 1 and page range
     - Research Papers: Extracts full text as sections
+    The file is opened once for both; `workers` processes split long page ranges.
+    `pdf_hash` is the file's hash if the caller already has it (keys the page cache).
     """
-    title, author, date_published, keywords = extract_pdf_metadata(pdf_path)
-    #title, author, date_published, keywords = pymupdf_extract_pdf_metadata(pdf_path)
-    text = extract_pdf_full_text(pdf_path, page_range, true_page_1, header_footer_margin=33.5, debug = True)
+    with pymupdf.open(pdf_path) as doc:
+        title, author, date_published, keywords = pdf_metadata(doc)
+        text = extract_pdf_full_text(pdf_path, page_range, true_page_1, header_footer_margin=33.5, debug=True,
+                                     doc=doc, workers=workers, pdf_hash=pdf_hash)
 
     # title can't be unknown, to not override. fallback to file name
     if title == 'Unknown' or title == '':
@@ -0,0 +1,156 @@
+"""
+Parallel, resumable scraping of one course's materials.
+
+PDF extraction is CPU-bound and runs in a process pool; HTML fetching is I/O-bound
+and runs in a bounded thread pool, with a minimum interval between requests to the
+same domain. Results are handled (saved) in the calling thread as they complete.
+
+Progress is kept per material in `scrape_state.json` in the course's processed
+directory: {material key: {"status": "done" | "failed", "content_hash", ...}}.
+Re-runs skip materials that are done (PDFs only if the file is unchanged) and retry
+failed ones; anything not in the state is pending.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from internal.scraping.html_scraper import scrape_html
+from internal.scraping.pdf_processor import scrape_pdf
+from internal.scraping.utils import file_hash
+from internal.logging_utils.scraping_logger import logger
+
+STATE_FILE = "scrape_state.json"
+
+
+def material_key(material):
+    """Stable key of a materials_paths.txt entry (the same PDF can appear with several page ranges)."""
+    key = material["path"]
+    if material.get("page_range"):
+        key += f"|pages={material['page_range'][0]}-{material['page_range'][1]}"
+    if material.get("true_page_1") is not None:
+        key += f"|true_page_1={material['true_page_1']}"
+    return key
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ScrapeState:
+    """Per-material status of a course, persisted atomically after every update."""
+    def __init__(self, course_dir):
+        self.path = os.path.join(course_dir, STATE_FILE)
+        self.materials = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.materials = json.load(f)
+
+    def status(self, key):
+        return self.materials.get(key, {}).get("status", "pending")
+
+    def update(self, key, **entry):
+        self.materials[key] = entry
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.materials, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def counts(self):
+        counts = {}
+        for entry in self.materials.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+class DomainRateLimiter:
+    """Blocks until at least `min_interval` seconds have passed since the last request to a domain."""
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(domain, now))
+            self._next[domain] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _scrape_url(url, limiter):
+    limiter.wait(url)
+    return scrape_html(url)
+
+
+def is_done(material, state, pdf_hash=None):
+    """
+    Done in an earlier run (and, for local PDFs, the file has not changed since);
+    `pdf_hash` is the file's hash if already computed.
+    """
+    key = material_key(material)
+    if state.status(key) != "done":
+        return False
+    if material["path"].endswith(".pdf") and os.path.exists(material["path"]):
+        return state.materials[key].get("file_hash") == (pdf_hash or file_hash(material["path"]))
+    return True
+
+
+def run_materials(materials, course_dir, handle_result, pdf_workers=4, html_workers=8, per_domain_interval=1.0,
+                  pdf_page_workers=1):
+    """
+    Scrape `materials` (parse_materials_paths entries) that are not done yet.
+    `handle_result(material, data)` is called in this thread for every scraped
+    document, e.g. to save it. `pdf_page_workers` > 1 additionally splits each PDF's
+    pages across processes (mainly useful with pdf_workers=1). Returns the status
+    counts of the course.
+    """
+    state = ScrapeState(course_dir)
+    # every local PDF is hashed once per run: for the done check, the page cache and the state entry
+    pdf_hashes = {m["path"]: file_hash(m["path"]) for m in materials
+                  if m["path"].endswith(".pdf") and os.path.exists(m["path"])}
+    todo = [m for m in materials if not is_done(m, state, pdf_hashes.get(m["path"]))]
+    logger.info(f"{len(materials) - len(todo)} of {len(materials)} materials already done, "
+                f"{sum(state.status(material_key(m)) == 'failed' for m in todo)} failed ones are retried")
+
+    limiter = DomainRateLimiter(per_domain_interval)
+    with ProcessPoolExecutor(max_workers=pdf_workers) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=html_workers) as html_pool:
+        futures = {}
+        for material in todo:
+            path = material["path"]
+            if path.endswith(".pdf"):
+                future = pdf_pool.submit(scrape_pdf, path, page_range=material["page_range"],
+                                         true_page_1=material["true_page_1"], workers=pdf_page_workers,
+                                         pdf_hash=pdf_hashes.get(path))
+            elif path.startswith("http"):
+                future = html_pool.submit(_scrape_url, path, limiter)
+            else:
+                logger.warning(f"Skipping material that is neither a PDF nor a URL: {path}")
+                continue
+            futures[future] = material
+
+        for future in as_completed(futures):
+            material = futures[future]
+            key = material_key(material)
+            try:
+                data = future.result()
+                if data is None:
+                    raise RuntimeError("scraper returned no data")
+                handle_result(material, data)
+            except Exception as e:
+                logger.warning(f"Failed: {key}: {e}")
+                state.update(key, status="failed", error=str(e))
+                continue
+            entry = {"status": "done", "content_hash": text_hash(data["text"]), "flag": data.get("flag", "")}
+            if material["path"] in pdf_hashes:
+                entry["file_hash"] = pdf_hashes[material["path"]]
+            state.update(key, **entry)
+            logger.info(f"Done: {key}")
+
+    return state.counts()
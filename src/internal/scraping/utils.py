@@ -4,6 +4,15 @@ import hashlib
 import json
 from internal.logging_utils.scraping_logger import logger
 
+def file_hash(path):
+    """SHA-1 of a file's bytes, read in 1 MB blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def clean_filename(title):
     """Removes invalid filename characters and replaces spaces with underscores."""
     return re.sub(r'[<>:"/\\|?*]', '', title).replace(' ', '_')
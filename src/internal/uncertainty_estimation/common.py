@@ -31,3 +31,41 @@ def _compute_Jaccard_score(lst):
 
 def compute_sim_score(answers, affinity, similarity_score):
     return _compute_Jaccard_score(answers)
+
+
+def compute_semantic_matrix(answers, nli_model):
+    """
+    NLI probabilities for every ordered pair of answers, as in lm-polygraph's
+    SemanticMatrixCalculator. `nli_model` is a Deberta wrapper; pairs are scored in
+    batches of nli_model.batch_size.
+
+    Returns a dict with (n, n) arrays 'semantic_matrix_entail' and 'semantic_matrix_contra',
+    where [i, j] is p(answer_i entails / contradicts answer_j).
+    """
+    import torch
+
+    deberta = nli_model.deberta
+    tokenizer = nli_model.deberta_tokenizer
+    label2id = {k.upper(): v for k, v in deberta.config.label2id.items()}
+    ent_id, contra_id = label2id["ENTAILMENT"], label2id["CONTRADICTION"]
+
+    n = len(answers)
+    first = [answers[i] for i in range(n) for j in range(n)]
+    second = [answers[j] for i in range(n) for j in range(n)]
+
+    probs = []
+    with torch.no_grad():
+        for start in range(0, len(first), nli_model.batch_size):
+            encoded = tokenizer(
+                first[start:start + nli_model.batch_size],
+                second[start:start + nli_model.batch_size],
+                padding=True, truncation=True, return_tensors="pt",
+            ).to(nli_model.device)
+            logits = deberta(**encoded).logits
+            probs.append(torch.softmax(logits, dim=-1).cpu().numpy())
+    probs = np.concatenate(probs, axis=0)
+
+    return {
+        "semantic_matrix_entail": probs[:, ent_id].reshape(n, n),
+        "semantic_matrix_contra": probs[:, contra_id].reshape(n, n),
+    }
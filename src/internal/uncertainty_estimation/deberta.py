@@ -12,6 +12,8 @@ from transformers import (
 from transformers import logging as hf_logging
 hf_logging.set_verbosity_error() 
 
+from internal.inference_backend import load_sequence_classifier
+
 class Deberta:
     """
     Allows for the implementation of a singleton DeBERTa model which can be shared across
@@ -24,6 +26,7 @@ class Deberta:
         batch_size: int = 10,
         device=None,
         hf_cache: str = None,
+        backend: str = "torch",
     ):
         """
         Parameters
@@ -32,12 +35,17 @@ class Deberta:
             huggingface path of the pretrained DeBERTa (default 'microsoft/deberta-large-mnli')
         device : str
             device on which the computations will take place (default 'cuda:0' if available, else 'cpu').
+        backend : str
+            "torch", "int8" or "onnx" (see internal.inference_backend); the latter two run on cpu.
         """
         self.deberta_path = deberta_path
         self.batch_size = batch_size
         self._deberta = None
         self._deberta_tokenizer = None
-        if device is None:
+        self.backend = backend
+        if backend != "torch":
+            self.device = "cpu"
+        elif device is None:
             self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
@@ -70,8 +78,9 @@ class Deberta:
         if self._deberta is not None:
             return
         #self._deberta = DebertaForSequenceClassification.from_pretrained(
-        self._deberta = AutoModelForSequenceClassification.from_pretrained(
+        self._deberta = load_sequence_classifier(
             self.deberta_path,
+            backend=self.backend,
             problem_type="multi_label_classification",
             cache_dir=self.hf_cache,
         )
@@ -83,7 +92,8 @@ class Deberta:
         #    self.deberta_path, cache_dir=self.hf_cache
         #)
         self._deberta.to(self.device)
-        self._deberta.eval()
+        if hasattr(self._deberta, "eval"):  # ONNX Runtime models have no train/eval mode
+            self._deberta.eval()
 
 
 class MultilingualDeberta(Deberta):
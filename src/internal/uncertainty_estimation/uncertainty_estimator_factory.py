@@ -1,12 +1,25 @@
 
-from functools import lru_cache
 from transformers import logging as hf_logging
+from internal.model_registry import get_registry
 hf_logging.set_verbosity_error()
 
-@lru_cache(maxsize=1)
-def _cached_deberta(model_name: str, batch_size: int, device: str):
+NLI_MODEL = "microsoft/deberta-large-mnli"
+
+
+def load_deberta(model_name: str, batch_size: int, device: str, backend: str = "torch"):
     from internal.uncertainty_estimation.deberta import Deberta
-    return Deberta(model_name, batch_size=batch_size, device=device)
+    return Deberta(model_name, batch_size=batch_size, device=device, backend=backend)
+
+
+def nli_entry(model_name: str, batch_size: int, device: str, backend: str = "torch") -> str:
+    """Registry name of an NLI model; one entry per set of settings."""
+    return f"nli:{model_name}:{device}:{backend}:{batch_size}"
+
+
+def _cached_deberta(model_name: str, batch_size: int, device: str, backend: str = "torch"):
+    # core.get_models() registers the configured settings under the same name, so preloads are reused
+    return get_registry().get(nli_entry(model_name, batch_size, device, backend),
+                              loader=lambda: load_deberta(model_name, batch_size, device, backend))
 
 
 def get_uncertainty_estimator(method: str, **kwargs):
@@ -24,6 +37,7 @@ def get_uncertainty_estimator(method: str, **kwargs):
              - device (str)
              - affinity (str)
              - verbose (bool)
+             - backend (str, optional: "torch", "int8" or "onnx")
           For "lexical_similarity", kwargs might include:
              - metric (str)
           For "eccentricity", kwargs might include:
@@ -47,8 +61,9 @@ def get_uncertainty_estimator(method: str, **kwargs):
         device = kwargs.pop("device")
         affinity = kwargs.pop("affinity")
         verbose = kwargs.pop("verbose")
+        backend = kwargs.pop("backend", "torch")
         # Initialize the cached NLI model
-        nli_model = _cached_deberta("microsoft/deberta-large-mnli", batch_size, device)
+        nli_model = _cached_deberta(NLI_MODEL, batch_size, device, backend)
         return DegMat(nli_model, affinity=affinity, verbose=verbose, **kwargs)
     elif method == "eccentricity":
         from internal.uncertainty_estimation.eccentricity import Eccentricity
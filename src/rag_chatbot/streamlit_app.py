@@ -5,18 +5,17 @@ logging.getLogger("streamlit.watcher.local_sources_watcher").setLevel(logging.ER
 
 import streamlit as st
 from ui_helpers import render_chat_history
-from internal.core import run_rag, get_config
+from internal.core import run_rag, get_config, preload_models
 from internal.logging_utils.csv_logger import initialize_csv, log_experiment
 import json, os
 import copy
-from internal.retrievers.semantic_retriever import load_embedding_model as _load
 from internal.providers.provider_utils import format_url
 
 #streamlit cache add-on
-@st.cache_resource
-def load_embedding_model(model_name: str, device: str):
-    # add Streamlit cache
-    return _load(model_name, device)
+@st.cache_resource(show_spinner=False)
+def start_models():
+    # load the models in the background once per server process, not on the first question
+    return preload_models()
 
 # streamlit interface
 st.set_page_config(page_title="Trustworthy RAG Chatbot", layout="wide")
@@ -24,6 +23,8 @@ st.title("💬 Cognitive Science Chatbot")
 st.text("I am a Cognitive Science assistant with information about the entire Cognitive Science syllabus at Aarhus University.  " \
 "  \n Ask a question from your program to get started! 🧠")
 
+models = start_models()
+
 
 # Inject custom bubble outline styles\ nst.markdown(
 st.markdown(
@@ -66,6 +67,13 @@ with st.sidebar: # this text is currently too long, maybe add a pop-up on start-
     )
 
 st.sidebar.header("🔧 Settings")
+status = models.status()
+loading = [name for name, m in status.items() if m["state"] == "loading"]
+failed = [name for name, m in status.items() if m["state"] == "failed"]
+if loading:
+    st.sidebar.caption(f"⏳ Loading models: {', '.join(loading)}")
+if failed:
+    st.sidebar.caption(f"⚠️ Failed to load: {', '.join(failed)}")
 demo_mode = st.sidebar.checkbox("Fast demo mode (no real LLM calls)", value=False)
 
 
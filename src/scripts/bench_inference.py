@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+fp32 vs int8 vs ONNX Runtime for the project's transformer models on CPU.
+
+For every model (--models) the torch fp32 outputs on a sample of real inputs are the
+reference; each backend (--backends, see internal.inference_backend) is then loaded
+and measured for:
+  • load time and RSS growth (approximate: freed models are not always returned to the OS)
+  • latency percentiles per call, as the pipeline calls the model
+  • agreement with fp32:
+      embedding   cosine between the backend's and the fp32 vectors (chunks + queries)
+      reranker    Spearman correlation of the scores per query, top-10 overlap
+      nli         max |Δp| of entailment / contradiction, argmax label agreement
+      alignscore  mean / max |Δscore|
+Inputs are chunks from the chunk store and queries from the test-set CSVs.
+
+Examples
+--------
+$ uv run -m scripts.bench_inference
+$ uv run -m scripts.bench_inference --models embedding reranker --backends int8 onnx --chunks 128
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import time
+
+import numpy as np
+import psutil
+
+from internal.inference_backend import load_sentence_transformer
+from internal.database_setup.chunk_store import ChunkStore
+from internal.retrievers.reranker import RerankerService
+from internal.benchmarking.utils import percentiles, run_metadata, write_report, default_report_path
+from scripts.load_test import DEFAULT_QUERY_FILES, load_queries
+
+_PROC = psutil.Process(os.getpid())
+MODELS = ["embedding", "reranker", "nli", "alignscore"]
+ALIGNSCORE_CKPT = "https://huggingface.co/yzha/AlignScore/resolve/main/AlignScore-large.ckpt"
+
+
+def _rss_mb() -> float:
+    gc.collect()
+    return _PROC.memory_info().rss / 2**20
+
+
+def _ranks(x: np.ndarray) -> np.ndarray:
+    return np.argsort(np.argsort(x)).astype(float)
+
+
+def spearman(a, b) -> float:
+    ra, rb = _ranks(np.asarray(a)), _ranks(np.asarray(b))
+    return float(np.corrcoef(ra, rb)[0, 1]) if ra.std() and rb.std() else 1.0
+
+
+# each runner loads the model for a backend and returns (outputs, per-call latencies)
+
+def run_embedding(backend, chunks, queries):
+    model = load_sentence_transformer("intfloat/multilingual-e5-large-instruct", device="cpu", backend=backend)
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        model.encode(q, normalize_embeddings=True)
+        lat.append(time.perf_counter() - t0)
+    vectors = model.encode(chunks + queries, normalize_embeddings=True, batch_size=16)
+    return np.asarray(vectors), lat
+
+
+def run_reranker(backend, chunks, queries):
+    service = RerankerService(cache_size=0, backend=backend)
+    docs = [{"id": str(i), "text": c} for i, c in enumerate(chunks)]
+    scores, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        scores.append(service.score(q, docs))
+        lat.append(time.perf_counter() - t0)
+    return np.asarray(scores), lat
+
+
+def run_nli(backend, chunks, queries):
+    from internal.uncertainty_estimation.deberta import Deberta
+    from internal.uncertainty_estimation.common import compute_semantic_matrix
+
+    nli = Deberta("microsoft/deberta-large-mnli", batch_size=10, device="cpu", backend=backend)
+    # answer-like texts: the first ~300 characters of 5 chunks, scored pairwise like the samples in deg_mat
+    out, lat = [], []
+    for start in range(0, len(chunks) - 4, 5):
+        answers = [c[:300] for c in chunks[start:start + 5]]
+        t0 = time.perf_counter()
+        matrices = compute_semantic_matrix(answers, nli)
+        lat.append(time.perf_counter() - t0)
+        out.append(np.stack([matrices["semantic_matrix_entail"], matrices["semantic_matrix_contra"]]))
+    return np.asarray(out), lat
+
+
+def run_alignscore(backend, chunks, queries):
+    from internal.metrics.alignscore_utils import AlignScorer
+
+    scorer = AlignScorer(model="roberta-large", batch_size=8, device="cpu", ckpt_path=ALIGNSCORE_CKPT,
+                         verbose=False, backend=backend)
+    # a chunk against its own opening (supported) and against the next chunk's (unsupported)
+    contexts = chunks[:16]
+    claims = [c[:200] if i % 2 == 0 else chunks[(i + 1) % len(chunks)][:200] for i, c in enumerate(contexts)]
+    scores, lat = [], []
+    for context, claim in zip(contexts, claims):
+        t0 = time.perf_counter()
+        scores.extend(scorer.score([context], [claim]))
+        lat.append(time.perf_counter() - t0)
+    return np.asarray(scores), lat
+
+
+RUNNERS = {"embedding": run_embedding, "reranker": run_reranker, "nli": run_nli, "alignscore": run_alignscore}
+
+
+def agreement(model: str, ref: np.ndarray, out: np.ndarray) -> dict:
+    if model == "embedding":
+        cos = np.sum(ref * out, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(out, axis=1))
+        return {"cosine_mean": float(cos.mean()), "cosine_min": float(cos.min())}
+    if model == "reranker":
+        top = min(10, ref.shape[1])
+        overlap = [len(set(np.argsort(-r)[:top]) & set(np.argsort(-o)[:top])) / top for r, o in zip(ref, out)]
+        return {"spearman_mean": float(np.mean([spearman(r, o) for r, o in zip(ref, out)])),
+                "top10_overlap_mean": float(np.mean(overlap))}
+    if model == "nli":
+        delta = np.abs(ref - out)
+        # label per pair: entailment if p(entail) > p(contra)
+        same = (ref[:, 0] > ref[:, 1]) == (out[:, 0] > out[:, 1])
+        return {"entail_max_abs_delta": float(delta[:, 0].max()), "contra_max_abs_delta": float(delta[:, 1].max()),
+                "label_agreement": float(same.mean())}
+    delta = np.abs(ref - out)
+    return {"mean_abs_delta": float(delta.mean()), "max_abs_delta": float(delta.max())}
+
+
+def measure(model: str, backend: str, chunks, queries) -> tuple[dict, np.ndarray]:
+    rss0, t0 = _rss_mb(), time.perf_counter()
+    out, lat = RUNNERS[model](backend, chunks, queries)
+    total_s = time.perf_counter() - t0
+    row = {"backend": backend, "load_and_run_s": total_s, "rss_mb": _rss_mb() - rss0, "latency": percentiles(lat)}
+    gc.collect()
+    return row, out
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Accuracy and speed of int8 / ONNX backends against fp32")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=MODELS)
+    parser.add_argument("--backends", nargs="+", choices=["int8", "onnx"], default=["int8", "onnx"])
+    parser.add_argument("--chunks", type=int, default=64, help="Chunks sampled from the store")
+    parser.add_argument("--queries", type=int, default=16, help="Queries from the test sets")
+    parser.add_argument("--store", default="data/chunk_store")
+    parser.add_argument("--query-files", nargs="+", default=DEFAULT_QUERY_FILES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/inference_<time>.json)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    store = ChunkStore(args.store)
+    rows = random.Random(args.seed).sample(range(len(store)), min(args.chunks, len(store)))
+    chunks = [store.text(r) for r in rows]
+    queries = load_queries(args.query_files)[:args.queries]
+
+    report = {"meta": run_metadata(vars(args)), "models": {}}
+    for model in args.models:
+        print(f"[bench] {model}: torch fp32 reference")
+        ref_row, ref = measure(model, "torch", chunks, queries)
+        results = [ref_row]
+        for backend in args.backends:
+            if model == "alignscore" and backend == "onnx":
+                print("[bench]   alignscore has no ONNX export, skipped")
+                continue
+            try:
+                row, out = measure(model, backend, chunks, queries)
+            except ImportError as e:
+                print(f"[bench]   {backend}: {e}")
+                continue
+            row["agreement"] = agreement(model, ref, out)
+            row["speedup_p50"] = ref_row["latency"]["p50"] / row["latency"]["p50"]
+            results.append(row)
+            print(f"[bench]   {backend:5s} p50 {row['latency']['p50']*1e3:8.1f}ms (x{row['speedup_p50']:.2f})  "
+                  f"rss {row['rss_mb']:7.0f}MB  {row['agreement']}")
+        report["models"][model] = results
+
+    write_report(report, args.output or default_report_path("inference"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Recall / latency / memory of the compressed dense index against exact search.
+
+For every --dims value a quantized index is built from the flat index (under
+<flat dir>/../quantized_bench/<dims>/), then each mode (binary, int8) and rescore
+factor is compared with FlatVectorStore on the same queries:
+  • recall@k: share of the exact top-k ids that the compressed search returns
+  • query latency percentiles
+  • size of the codes in memory vs the float32 matrix
+
+Queries come from a synthetic corpus (--root, see bench_retrieval) or, for the real
+index, are made from the corpus itself: the normalized mean of two random chunk
+vectors plus noise, so they fall between documents like real questions do.
+
+Examples
+--------
+$ uv run -m scripts.bench_quantization
+$ uv run -m scripts.bench_quantization --root data/bench_corpus/1000000 --dims 1024 512 --rescore 1 5 20
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from internal.database_setup.vector_store import FlatVectorStore, build_flat_index
+from internal.database_setup.quantized_index import QuantizedVectorStore, build_quantized_index
+from internal.benchmarking.synthetic_corpus import load_queries
+from internal.benchmarking.utils import percentiles, run_metadata, write_report, default_report_path
+
+
+def proxy_queries(vectors: np.ndarray, n: int, rng: np.random.Generator, noise: float = 0.02) -> np.ndarray:
+    pairs = rng.integers(0, len(vectors), size=(n, 2))
+    queries = np.asarray(vectors[pairs[:, 0]], dtype=np.float32) + np.asarray(vectors[pairs[:, 1]], dtype=np.float32)
+    queries += rng.normal(0, noise, queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def timed_search(store, queries: np.ndarray, top_k: int) -> tuple[list[list[str]], list[float]]:
+    ids, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = store.search([q], top_k)[0]
+        lat.append(time.perf_counter() - t0)
+        ids.append([d["id"] for d in res])
+    return ids, lat
+
+
+def recall(approx: list[list[str]], exact: list[list[str]]) -> float:
+    return float(np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact) if e]))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recall@k of the int8/binary index against exact search")
+    parser.add_argument("--flat-dir", default="data/flat_index", help="Flat index (built if missing)")
+    parser.add_argument("--root", default=None, help="Synthetic corpus root (uses its flat index and queries)")
+    parser.add_argument("--dims", nargs="+", type=int, default=[None], help="Truncated dimensions (default: all)")
+    parser.add_argument("--modes", nargs="+", default=["binary", "int8"], choices=["binary", "int8"])
+    parser.add_argument("--rescore", nargs="+", type=int, default=[1, 5, 10, 20], help="Shortlist = rescore x top_k")
+    parser.add_argument("--top-k", nargs="+", type=int, default=[10, 50])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/quantization_<time>.json)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    flat_dir = os.path.join(args.root, "flat_index") if args.root else args.flat_dir
+    if not os.path.exists(os.path.join(flat_dir, "vectors.npy")):
+        base = args.root or "data"
+        build_flat_index(os.path.join(base, "processed_syllabi"), flat_dir, os.path.join(base, "chunk_store"))
+    flat = FlatVectorStore(flat_dir)
+    if args.root:
+        queries = np.stack([vec for _, vec in load_queries(args.root)[:args.queries]])
+    else:
+        queries = proxy_queries(flat.vectors, args.queries, rng)
+
+    report = {"meta": run_metadata(vars(args)), "n_chunks": flat.count(),
+              "float32_mb": flat.vectors.nbytes / 2**20, "results": []}
+    exact = {}
+    for top_k in args.top_k:
+        exact[top_k], lat = timed_search(flat, queries, top_k)
+        report["results"].append({"mode": "exact", "top_k": top_k, "recall": 1.0, "latency": percentiles(lat),
+                                  "memory_mb": report["float32_mb"]})
+
+    for dims in args.dims:
+        index_dir = os.path.join(os.path.dirname(os.path.abspath(flat_dir)), "quantized_bench", str(dims or "all"))
+        t0 = time.perf_counter()
+        build_quantized_index(flat_dir, index_dir, dims=dims)
+        build_s = time.perf_counter() - t0
+        for mode in args.modes:
+            for rescore in args.rescore:
+                store = QuantizedVectorStore(index_dir, flat_dir, mode=mode, rescore=rescore)
+                for top_k in args.top_k:
+                    ids, lat = timed_search(store, queries, top_k)
+                    row = {"mode": mode, "dims": store.dims, "rescore": rescore, "top_k": top_k,
+                           "recall": recall(ids, exact[top_k]), "latency": percentiles(lat),
+                           "memory_mb": store.memory_mb(), "build_s": build_s}
+                    report["results"].append(row)
+                    print(f"[bench] {mode:6s} dims={store.dims:5d} rescore={rescore:3d} k={top_k:4d}  "
+                          f"recall={row['recall']:.3f}  p50={row['latency']['p50']*1e3:7.2f}ms  "
+                          f"codes={row['memory_mb']:8.1f}MB")
+
+    write_report(report, args.output or default_report_path("quantization"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""
+Retrieval micro-benchmarks with corpus-size scaling.
+
+For each corpus size a synthetic corpus is generated (or reused) under
+data/bench_corpus/<size>/ in the same parquet/npy/Chroma/bm25s layout as the real one, and
+we measure:
+  • index build time and on-disk size (Chroma, BM25)
+  • load time and RSS growth of opening each index and the chunk store
+  • query latency percentiles for the semantic leg, the BM25 leg, the fused
+    hybrid stage and chunk-store hydration over a grid of top_k x semantic_weight
+    (→ semantic_k / lexical_k)
+  • with --vector-store flat, the exact hybrid stage (both legs scored over the whole
+    corpus and fused, retrieval.method: exact_hybrid) at the same top_k / weight, and
+    how many of its candidates the top-k concatenation misses
+  • optionally the cross-encoder rerank of the fused candidates (--rerank) and the
+    query embedding itself (--embed-query); both need the real models.
+
+Examples
+--------
+$ uv run -m scripts.bench_retrieval --sizes 10000 100000
+$ uv run -m scripts.bench_retrieval --sizes 1000000 --queries 50 --top-k 100 --rerank
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import time
+
+import psutil
+
+from internal.core import hybrid_retrieve, exact_hybrid_retrieve, rerank_documents, get_reranker, get_embedding_model
+from internal.database_setup.chroma_db import init_db, get_collection
+from internal.database_setup.chunk_store import ChunkStore
+from internal.database_setup.vector_store import FlatVectorStore, build_flat_index
+from internal.retrievers.bm25_retriever import load_index, bm25_retrieve
+from internal.retrievers.exact_hybrid import ExactHybridScorer
+from internal.retrievers.semantic_retriever import search_collection, embed_query
+from internal.benchmarking.synthetic_corpus import write_corpus, load_queries, dir_size_mb, COLLECTION
+from internal.benchmarking.utils import percentiles, run_metadata, write_report, default_report_path
+
+_PROC = psutil.Process(os.getpid())
+
+
+def _rss_mb() -> float:
+    gc.collect()
+    return _PROC.memory_info().rss / 2**20
+
+
+def split_k(top_k: int, weight: float) -> tuple[int, int]:
+    """Same semantic/lexical split as core.rag_pipeline."""
+    weight = max(0.0, min(1.0, weight))
+    sem_k = max(1, int(round(weight * top_k)))
+    return sem_k, max(1, top_k - sem_k)
+
+
+def ensure_corpus(root: str, size: int, rebuild: bool, n_queries: int) -> dict:
+    info_path = os.path.join(root, "corpus_info.json")
+    if os.path.exists(info_path) and not rebuild:
+        with open(info_path, encoding="utf-8") as f:
+            info = json.load(f)
+        print(f"[bench] reusing corpus at {root}")
+        return {"reused": True, **info.get("build_timings", {})}
+    print(f"[bench] generating {size:,} chunks at {root}")
+    with contextlib.redirect_stderr(io.StringIO()):  # bm25s progress bars
+        timings = write_corpus(root, size, n_queries=n_queries)
+    return {"reused": False, **timings}
+
+
+def bench_load(root: str, vector_store: str = "chroma") -> tuple[dict, object, tuple, ChunkStore]:
+    """Open both indexes and the chunk store, recording wall time and RSS growth of each."""
+    result = {}
+
+    rss0, t0 = _rss_mb(), time.perf_counter()
+    if vector_store == "flat":
+        index_dir = os.path.join(root, "flat_index")
+        if not os.path.exists(os.path.join(index_dir, "vectors.npy")):
+            build_flat_index(os.path.join(root, "processed_syllabi"), index_dir, os.path.join(root, "chunk_store"))
+            result["flat_build_s"] = time.perf_counter() - t0
+        rss0, t0 = _rss_mb(), time.perf_counter()
+        collection = FlatVectorStore(index_dir)
+    else:
+        client = init_db(db_path=os.path.join(root, "chroma_db"))
+        collection = get_collection(client, collection_name=COLLECTION)
+    n = collection.count()
+    result["vector_store"] = vector_store
+    result[f"{vector_store}_open_s"] = time.perf_counter() - t0
+    # the HNSW segment (or the mapped matrix) is only paged in by the first query
+    queries = load_queries(root)
+    t1 = time.perf_counter()
+    search_collection(queries[0][1], collection, top_k=1)
+    result[f"{vector_store}_first_query_s"] = time.perf_counter() - t1
+    result[f"{vector_store}_rss_mb"] = _rss_mb() - rss0
+    result["n_chunks"] = n
+
+    rss0, t0 = _rss_mb(), time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        bm25_index = load_index(mmap=True, index_dir=os.path.join(root, "bm25_index"))
+    result["bm25_load_s"] = time.perf_counter() - t0
+    result["bm25_rss_mb"] = _rss_mb() - rss0
+
+    rss0, t0 = _rss_mb(), time.perf_counter()
+    store = ChunkStore(os.path.join(root, "chunk_store"))
+    result["chunk_store_load_s"] = time.perf_counter() - t0
+    result["chunk_store_rss_mb"] = _rss_mb() - rss0
+    return result, collection, bm25_index, store
+
+
+def bench_queries(collection, bm25_index, store, queries, top_ks, weights, rerank: bool,
+                  fusion: str = "weighted") -> list[dict]:
+    grid = []
+    reranker = get_reranker() if rerank else None
+    scorer = ExactHybridScorer(collection, bm25_index, fusion=fusion) if isinstance(collection, FlatVectorStore) else None
+    for top_k in top_ks:
+        for weight in weights:
+            sem_k, lex_k = split_k(top_k, weight)
+            sem_t, bm_t, fused_t, hyd_t, rr_t, n_cand = [], [], [], [], [], []
+            exact_t, n_missed = [], []
+            for text, vec in queries:
+                t0 = time.perf_counter()
+                with contextlib.redirect_stderr(io.StringIO()):
+                    docs, timings = hybrid_retrieve(text, text, None, collection, sem_k=sem_k, lex_k=lex_k,
+                                                    bm25_index=bm25_index, query_embedding=vec)
+                fused_t.append(time.perf_counter() - t0)
+                sem_t.append(timings["semantic_retrieval"])
+                bm_t.append(timings["bm25_retrieval"])
+                n_cand.append(len(docs))
+                if scorer is not None:
+                    exact_docs, timings = exact_hybrid_retrieve(text, text, None, scorer, top_k, semantic_weight=weight,
+                                                                query_embedding=vec)
+                    exact_t.append(timings["exact_hybrid_retrieval"])
+                    n_missed.append(len({d["id"] for d in exact_docs} - {d["id"] for d in docs}))
+                t0 = time.perf_counter()
+                docs = store.hydrate(docs)
+                hyd_t.append(time.perf_counter() - t0)
+                if reranker is not None:
+                    reranker.clear()  # time the model, not the score cache (the grid repeats queries)
+                    t0 = time.perf_counter()
+                    rerank_documents(text, docs, reranker=reranker)
+                    rr_t.append(time.perf_counter() - t0)
+            row = {
+                "top_k": top_k, "semantic_weight": weight, "semantic_k": sem_k, "lexical_k": lex_k,
+                "candidates_mean": sum(n_cand) / len(n_cand),
+                "semantic": percentiles(sem_t),
+                "bm25": percentiles(bm_t),
+                "hybrid_fused": percentiles(fused_t),
+                "hydrate": percentiles(hyd_t),
+            }
+            if exact_t:
+                row["exact_hybrid"] = percentiles(exact_t)
+                row["exact_hybrid_missed_by_concat_mean"] = sum(n_missed) / len(n_missed)
+            if rr_t:
+                row["rerank"] = percentiles(rr_t)
+                row["rerank_pairs_per_s"] = sum(n_cand) / sum(rr_t)
+            grid.append(row)
+            print(f"[bench]   top_k={top_k:4d} w={weight:.2f}  sem p50={row['semantic']['p50']*1e3:7.1f}ms  "
+                  f"bm25 p50={row['bm25']['p50']*1e3:7.1f}ms  fused p95={row['hybrid_fused']['p95']*1e3:7.1f}ms"
+                  + (f"  exact p95={row['exact_hybrid']['p95']*1e3:7.1f}ms" if exact_t else ""))
+    return grid
+
+
+def bench_embed_query(queries, device: str) -> dict:
+    t0 = time.perf_counter()
+    model = get_embedding_model(device)
+    load_s = time.perf_counter() - t0
+    lat = []
+    for text, _ in queries:
+        t0 = time.perf_counter()
+        embed_query(text, model)
+        lat.append(time.perf_counter() - t0)
+    return {"model_load_s": load_s, "latency": percentiles(lat)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Retrieval micro-benchmarks over synthetic corpora")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000], help="Corpus sizes in chunks")
+    parser.add_argument("--root", default="data/bench_corpus", help="Where synthetic corpora are written")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per grid point")
+    parser.add_argument("--top-k", nargs="+", type=int, default=[20, 50, 100], help="top_k values to sweep")
+    parser.add_argument("--weights", nargs="+", type=float, default=[0.25, 0.5, 0.75], help="semantic_weight values to sweep")
+    parser.add_argument("--rerank", action="store_true", help="Also time the cross-encoder over the fused candidates")
+    parser.add_argument("--embed-query", action="store_true", help="Also time query embedding with the e5 model")
+    parser.add_argument("--vector-store", choices=["chroma", "flat"], default="chroma",
+                        help="Backend of the semantic leg (flat: exact search over a memory-mapped matrix)")
+    parser.add_argument("--fusion", choices=["weighted", "rrf"], default="weighted",
+                        help="Score fusion of the exact hybrid stage (flat vector store only)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate corpora even if they exist")
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/retrieval_<time>.json)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    report = {"meta": run_metadata(vars(args)), "sizes": []}
+
+    for size in args.sizes:
+        root = os.path.join(args.root, str(size))
+        entry = {"size": size, "build": ensure_corpus(root, size, args.rebuild, max(args.queries, 200))}
+        entry["disk_mb"] = {
+            "chunks_parquet_npy": dir_size_mb(os.path.join(root, "processed_syllabi")),
+            "chroma": dir_size_mb(os.path.join(root, "chroma_db")),
+            "bm25": dir_size_mb(os.path.join(root, "bm25_index")),
+            "chunk_store": dir_size_mb(os.path.join(root, "chunk_store")),
+        }
+        entry["load"], collection, bm25_index, store = bench_load(root, args.vector_store)
+        queries = load_queries(root)[:args.queries]
+        entry["queries"] = bench_queries(collection, bm25_index, store, queries, args.top_k, args.weights, args.rerank,
+                                          args.fusion)
+        if args.embed_query:
+            entry["embed_query"] = bench_embed_query(queries, args.device)
+        # the default-path bm25_retrieve reloads the index per call; time one such call for reference
+        t0 = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            bm25_retrieve(queries[0][0], top_k=10, index=load_index(
+                mmap=True, index_dir=os.path.join(root, "bm25_index")))
+        entry["bm25_cold_query_s"] = time.perf_counter() - t0
+        entry["rss_mb_after"] = _rss_mb()
+        report["sizes"].append(entry)
+        store.close()
+        del collection, bm25_index, store
+
+    write_report(report, args.output or default_report_path("retrieval"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""
+Uncertainty-estimation benchmarks across sample counts and answer lengths.
+
+Every estimator compares all pairs of samples, so cost grows quadratically with
+n_samples and (for ROUGE/BLEU/NLI) linearly with answer length. This sweeps
+n in {2, 5, 10, 20, 50} and answer lengths derived from `generation.max_new_tokens`,
+and reports wall time, peak memory and pairs/sec for:
+  • LexicalSimilarity (rougeL, BLEU)
+  • DegMat / Eccentricity on Jaccard similarity  (what compute_uncertainty uses today)
+  • DegMat / Eccentricity on the DeBERTa NLI matrix, per NLI batch size (--nli)
+
+Samples are synthetic: one base answer plus per-sample word substitutions, so pairs
+overlap partially like real LLM samples do.
+
+Examples
+--------
+$ uv run -m scripts.bench_uncertainty
+$ uv run -m scripts.bench_uncertainty --nli --batch-sizes 5 10 20 --n-samples 2 5 10
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+import numpy as np
+
+from internal.core import get_config
+from internal.uncertainty_estimation.lexical_similarity import LexicalSimilarity
+from internal.uncertainty_estimation.deg_mat import DegMat
+from internal.uncertainty_estimation.eccentricity import Eccentricity
+from internal.uncertainty_estimation.uncertainty_estimator_factory import compute_uncertainty
+from internal.uncertainty_estimation.common import compute_semantic_matrix
+from internal.benchmarking.utils import ResourceSampler, run_metadata, write_report, default_report_path
+
+WORDS = (
+    "the a of and to in is that it for as with on by this be are from or which at an "
+    "cortex memory attention model brain neural cognitive decision learning language "
+    "perception action prefrontal hippocampus bayesian prior evidence task participants "
+    "experiment response signal network representation process theory effect study "
+    "results suggests however therefore because although between during within across"
+).split()
+WORDS_PER_TOKEN = 0.75  # rough English words per Llama token
+
+
+def make_samples(n: int, n_tokens: int, rng: np.random.Generator, change: float = 0.3) -> list[str]:
+    """n answers of ~n_tokens tokens that share (1 - change) of their words with a common base."""
+    n_words = max(1, int(n_tokens * WORDS_PER_TOKEN))
+    base = rng.choice(WORDS, n_words)
+    samples = []
+    for _ in range(n):
+        words = base.copy()
+        mask = rng.random(n_words) < change
+        words[mask] = rng.choice(WORDS, int(mask.sum()))
+        samples.append(" ".join(words))
+    return samples
+
+
+def measure(fn, repeats: int) -> dict:
+    """Median wall time over `repeats` runs, peak Python heap and peak process RSS."""
+    times = []
+    tracemalloc.start()
+    # compute_uncertainty prints every score; keep that out of the output
+    with ResourceSampler(interval=0.01) as sampler, contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"wall_s": float(np.median(times)), "wall_s_min": min(times),
+            "peak_heap_mb": peak_heap / 2**20, "peak_rss_mb": sampler.peak_rss_mb}
+
+
+def bench_pairwise(samples: list[str], repeats: int) -> list[dict]:
+    """Estimators that only need the sample texts (today's compute_uncertainty path)."""
+    n = len(samples)
+    estimators = {
+        "lexical_similarity_rougeL": LexicalSimilarity(metric="rougeL"),
+        "lexical_similarity_BLEU": LexicalSimilarity(metric="BLEU"),
+        "deg_mat_jaccard": DegMat(similarity_score="Jaccard_score"),
+        "eccentricity_jaccard": Eccentricity(similarity_score="Jaccard_score", thres=0.7),
+    }
+    rows = []
+    for name, est in estimators.items():
+        res = measure(lambda: compute_uncertainty(est, samples), repeats)
+        pairs = n * (n - 1) // 2
+        rows.append({"estimator": name, "pairs": pairs, "pairs_per_s": pairs / res["wall_s"], **res})
+    return rows
+
+
+def bench_nli(samples: list[str], nli_model, repeats: int) -> list[dict]:
+    """NLI matrix (n*n ordered pairs through DeBERTa) plus the two graph estimators on top of it."""
+    n = len(samples)
+    rows = []
+    matrices = {}
+
+    def run_matrix():
+        matrices.update(compute_semantic_matrix(samples, nli_model))
+
+    res = measure(run_matrix, repeats)
+    rows.append({"estimator": "nli_semantic_matrix", "batch_size": nli_model.batch_size,
+                 "pairs": n * n, "pairs_per_s": n * n / res["wall_s"], **res})
+
+    stats = {"sample_texts": [samples],
+             "semantic_matrix_entail": np.array([matrices["semantic_matrix_entail"]]),
+             "semantic_matrix_contra": np.array([matrices["semantic_matrix_contra"]])}
+    for name, est in {"deg_mat_nli": DegMat(similarity_score="NLI_score", affinity="entail"),
+                      "eccentricity_nli": Eccentricity(similarity_score="NLI_score", affinity="entail", thres=0.7)}.items():
+        est_res = measure(lambda: est(stats), repeats)
+        rows.append({"estimator": name, "batch_size": nli_model.batch_size, "pairs": n * n,
+                     # the estimator itself is cheap; the end-to-end cost includes the matrix
+                     "end_to_end_wall_s": res["wall_s"] + est_res["wall_s"], **est_res})
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    cfg = get_config()
+    max_new = cfg["generation"]["max_new_tokens"]
+    parser = argparse.ArgumentParser(description="Benchmark uncertainty estimators over n_samples and answer length")
+    parser.add_argument("--n-samples", nargs="+", type=int, default=[2, 5, 10, 20, 50])
+    parser.add_argument("--lengths", nargs="+", type=int, default=[max_new // 4, max_new // 2, max_new],
+                        help=f"Answer lengths in tokens (default derived from max_new_tokens={max_new})")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per configuration (median is reported)")
+    parser.add_argument("--nli", action="store_true", help="Also benchmark the DeBERTa NLI matrix (downloads the model)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 5, 10, 20], help="NLI batch sizes")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/uncertainty_<time>.json)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    report = {"meta": run_metadata(vars(args)), "results": []}
+
+    nli_model = None
+    if args.nli:
+        from internal.uncertainty_estimation.deberta import Deberta
+        t0 = time.perf_counter()
+        nli_model = Deberta("microsoft/deberta-large-mnli", batch_size=args.batch_sizes[0], device=args.device)
+        report["nli_model_load_s"] = time.perf_counter() - t0
+
+    for n_tokens in args.lengths:
+        for n in args.n_samples:
+            samples = make_samples(n, n_tokens, rng)
+            base = {"n_samples": n, "answer_tokens": n_tokens}
+            for row in bench_pairwise(samples, args.repeats):
+                report["results"].append({**base, **row})
+                print(f"[bench] len={n_tokens:4d} n={n:3d} {row['estimator']:28s} "
+                      f"{row['wall_s']*1e3:9.1f} ms  {row['pairs_per_s']:10.0f} pairs/s")
+            if nli_model is not None:
+                for bs in args.batch_sizes:
+                    nli_model.batch_size = bs
+                    for row in bench_nli(samples, nli_model, repeats=1 if n >= 20 else args.repeats):
+                        report["results"].append({**base, **row})
+                    print(f"[bench] len={n_tokens:4d} n={n:3d} nli batch={bs:3d} "
+                          f"{report['results'][-3]['wall_s']:9.2f} s  {report['results'][-3]['pairs_per_s']:8.1f} pairs/s")
+
+    write_report(report, args.output or default_report_path("uncertainty"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""
+End-to-end load test: N concurrent simulated students chatting with the RAG engine.
+
+Queries are drawn from the test-set CSVs (column `user_input` or `query`) and grouped
+into multi-turn sessions in file order, so each turn carries the chat history of the
+previous turns exactly like the Streamlit app. By default every session talks to the
+bundled mock LLM server, so only our own pipeline cost is measured.
+
+Examples
+--------
+$ uv run -m scripts.load_test --users 8 --sessions 32 --turns 3
+$ uv run -m scripts.load_test --users 4 --ttft 0.5 --tps 20 --uq-method lexical_similarity
+$ uv run -m scripts.load_test --users 2 --api-url http://localhost:11434/api/generate   # real Ollama
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from internal.core import get_config, init_estimator, init_scaler, rag_pipeline
+from internal.providers.provider import OllamaProvider
+from internal.providers.mock_server import load_mock_settings, start_mock_server
+from internal.benchmarking.utils import (
+    ResourceSampler, percentiles, run_metadata, write_report, default_report_path)
+
+DEFAULT_QUERY_FILES = [
+    "output/raw_test_data/full_f-anno_split_testset.csv",
+    "output/usability_test_run/experiment_results.csv",
+]
+STAGES = ["model_and_db", "semantic_retrieval", "bm25_retrieval", "query_embedding", "exact_hybrid_retrieval", "cascade",
+          "hydrate", "rerank", "generation", "uncertainty", "selection", "total"]
+
+
+def load_queries(paths: list[str]) -> list[str]:
+    """Read queries from every CSV that exists, keeping file order."""
+    queries = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"[load_test] skipping missing query file {path}", file=sys.stderr)
+            continue
+        df = pd.read_csv(path)
+        col = "user_input" if "user_input" in df.columns else "query"
+        queries.extend(str(q).strip() for q in df[col].dropna() if str(q).strip())
+    if not queries:
+        raise RuntimeError(f"No queries found in {paths}")
+    return queries
+
+
+def build_sessions(queries: list[str], n_sessions: int, turns: int) -> list[list[str]]:
+    """
+    Slice the query list into consecutive `turns`-long sessions, wrapping around
+    the list if more sessions are requested than there are queries.
+    """
+    sessions = []
+    pos = 0
+    for _ in range(n_sessions):
+        sessions.append([queries[(pos + t) % len(queries)] for t in range(turns)])
+        pos += turns
+    return sessions
+
+
+class LoadTest:
+    def __init__(self, cfg: dict, api_url: str, model_id: str, n_samples: int,
+                 estimator, scaler, top_k: int, think_time: float = 0.0):
+        self.cfg = cfg
+        self.api_url = api_url
+        self.model_id = model_id
+        self.n_samples = n_samples
+        self.estimator = estimator
+        self.scaler = scaler
+        self.top_k = top_k
+        self.think_time = think_time
+        self.records = []
+        self._lock = threading.Lock()
+
+    def _provider(self) -> OllamaProvider:
+        gen_cfg = self.cfg["generation"]
+        return OllamaProvider(
+            api_url=self.api_url,
+            model_id=self.model_id,
+            temperature=gen_cfg["temperature"],
+            top_p=gen_cfg["top_p"],
+            max_new_tokens=gen_cfg["max_new_tokens"],
+        )
+
+    def run_turn(self, provider, query: str, history: list[dict]) -> dict:
+        started = time.perf_counter()
+        record = {"query": query, "turn": len(history), "error": None, "timings": {}}
+        try:
+            result = rag_pipeline(
+                query=query,
+                top_k=self.top_k,
+                provider=provider,
+                device=self.cfg.get("device", "cpu"),
+                n_samples=self.n_samples,
+                estimator=self.estimator,
+                scaler=self.scaler,
+                chat_history=history,
+            )
+            if result is None:
+                raise RuntimeError("rag_pipeline returned None (empty collection?)")
+            record["timings"] = result.get("timings", {})
+            history.append({"user": query, "assistant": result["final_answer"]})
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            record["traceback"] = traceback.format_exc(limit=3)
+        record["latency"] = time.perf_counter() - started
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def run_session(self, session: list[str]) -> None:
+        provider = self._provider()
+        history = []
+        for query in session:
+            self.run_turn(provider, query, history)
+            if self.think_time:
+                time.sleep(self.think_time)
+
+    def run(self, sessions: list[list[str]], users: int) -> float:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users, thread_name_prefix="user") as pool:
+            futures = [pool.submit(self.run_session, s) for s in sessions]
+            for i, fut in enumerate(as_completed(futures), start=1):
+                fut.result()
+                print(f"[load_test] session {i}/{len(sessions)} done", file=sys.stderr)
+        return time.perf_counter() - started
+
+
+def summarise(records: list[dict], duration: float) -> dict:
+    ok = [r for r in records if r["error"] is None]
+    errors = Counter(r["error"].split(":")[0] for r in records if r["error"])
+    stage_latency = {
+        stage: percentiles([r["timings"].get(stage) for r in ok])
+        for stage in STAGES
+    }
+    return {
+        "requests": len(records),
+        "succeeded": len(ok),
+        "failed": len(records) - len(ok),
+        "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+        "errors_by_type": dict(errors),
+        "duration_s": duration,
+        "throughput_rps": len(ok) / duration if duration else 0.0,
+        "latency": percentiles([r["latency"] for r in ok]),
+        "stage_latency": stage_latency,
+        "latency_by_turn": {
+            str(turn): percentiles([r["latency"] for r in ok if r["turn"] == turn])
+            for turn in sorted({r["turn"] for r in ok})
+        },
+        "sample_errors": [r.get("traceback") for r in records if r["error"]][:5],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test of the RAG pipeline")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated students")
+    parser.add_argument("--sessions", type=int, default=None, help="Total chat sessions (default: 4 per user)")
+    parser.add_argument("--turns", type=int, default=3, help="Queries per session, each with the previous turns as history")
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERY_FILES, help="Test-set CSVs to draw queries from")
+    parser.add_argument("--n-samples", type=int, default=None, help="Samples per query (default from config.yaml)")
+    parser.add_argument("--uq-method", default=None, help="Uncertainty method (default from config.yaml)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a user waits between turns")
+    parser.add_argument("--warmup", type=int, default=1, help="Sequential warm-up queries before measuring")
+    parser.add_argument("--api-url", default=None, help="Real /api/generate endpoint; omit to use the mock server")
+    parser.add_argument("--ttft", type=float, default=None, help="Mock server time-to-first-token")
+    parser.add_argument("--tps", type=float, default=None, help="Mock server tokens/sec")
+    parser.add_argument("--error-rate", type=float, default=None, help="Mock server injected error rate")
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/load_test_<time>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's own console output")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    cfg = get_config()
+    n_sessions = args.sessions or args.users * 4
+    n_samples = args.n_samples or cfg["generation"]["n_samples"]
+    uq_method = args.uq_method or cfg["uncertainty"]["method"]
+
+    server = None
+    if args.api_url:
+        api_url = args.api_url
+    else:
+        settings = load_mock_settings(port=0, ttft=args.ttft, tokens_per_sec=args.tps, error_rate=args.error_rate)
+        server, _ = start_mock_server(settings)
+        api_url = f"http://{settings.host}:{server.server_address[1]}/api/generate"
+    print(f"[load_test] backend: {api_url}", file=sys.stderr)
+
+    estimator = init_estimator(cfg, override_method=uq_method) if n_samples > 1 else None
+    try:
+        scaler = init_scaler(cfg)
+    except (FileNotFoundError, KeyError):
+        scaler = None
+
+    queries = load_queries(args.queries)
+    sessions = build_sessions(queries, n_sessions, args.turns)
+    test = LoadTest(cfg, api_url, model_id="mock", n_samples=n_samples, estimator=estimator,
+                    scaler=scaler, top_k=cfg["retrieval"]["top_k"], think_time=args.think_time)
+
+    # the providers and pipeline print every payload; keep the terminal readable
+    sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with sink:
+        # warm-up loads the models and indexes once, outside the measured window
+        warm = LoadTest(cfg, api_url, "mock", n_samples, estimator, scaler, cfg["retrieval"]["top_k"])
+        for query in queries[:args.warmup]:
+            warm.run_turn(warm._provider(), query, [])
+        with ResourceSampler() as sampler:
+            duration = test.run(sessions, args.users)
+
+    report = {
+        "meta": run_metadata(vars(args)),
+        "workload": {"users": args.users, "sessions": n_sessions, "turns": args.turns,
+                     "n_samples": n_samples, "uq_method": uq_method, "backend": api_url,
+                     "mock": server is not None},
+        "warmup": summarise(warm.records, sum(r["latency"] for r in warm.records)),
+        "results": summarise(test.records, duration),
+        "resources": sampler.summary(),
+    }
+    if server is not None:
+        report["mock_server"] = dict(server.llm.stats)
+        server.shutdown()
+
+    res = report["results"]
+    print(f"requests={res['requests']} failed={res['failed']} "
+          f"throughput={res['throughput_rps']:.2f} req/s "
+          f"p50={res['latency'].get('p50', float('nan')):.2f}s p95={res['latency'].get('p95', float('nan')):.2f}s "
+          f"peak RSS={report['resources']['rss_mb_peak']:.0f} MB")
+    write_report(report, args.output or default_report_path("load_test"))
+
+
+if __name__ == "__main__":
+    main()
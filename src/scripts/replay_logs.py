@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Replay logged chatbot traffic as a benchmark workload.
+
+Reads the experiment CSVs written by the Streamlit app and the CLI, rebuilds every
+request (query, n_samples, temperature/top_p/max_new_tokens, UE method and the chat
+history as it was at that point of the log) and fires it at the current code at the
+original inter-arrival times, optionally sped up or slowed down. Requests are sent
+open-loop, so a slower pipeline shows up as queueing instead of a slower replay.
+
+Rows logged before the `timestamp` column existed have no arrival times; those are
+spaced `--interval` seconds apart instead.
+
+Examples
+--------
+$ uv run -m scripts.replay_logs                                  # both default logs, original pacing
+$ uv run -m scripts.replay_logs --speed 10 --max-concurrency 8   # 10x faster than real time
+$ uv run -m scripts.replay_logs --logs output/usability_test_run/P1_experiment.csv --interval 2
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from internal import core
+from internal.core import get_config, init_estimator, init_scaler, rag_pipeline
+from internal.providers.provider import OllamaProvider
+from internal.providers.mock_server import load_mock_settings, start_mock_server
+from internal.benchmarking.utils import (
+    ResourceSampler, percentiles, run_metadata, write_report, default_report_path)
+
+DEFAULT_LOGS = [
+    "output/streamlit_run/experiment_results.csv",
+    "output/client_run/experiment_results.csv",
+]
+
+
+def _parse_settings(raw) -> dict:
+    if isinstance(raw, str) and raw.strip():
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def load_requests(paths: list[str], max_history: int, use_history: bool) -> list[dict]:
+    """
+    Rebuild one request per logged row. History is the sequence of earlier
+    (query, logged answer) pairs in the same file, capped at `max_history` turns.
+    """
+    requests_out = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"[replay] skipping missing log {path}", file=sys.stderr)
+            continue
+        df = pd.read_csv(path)
+        has_ts = "timestamp" in df.columns
+        history = []
+        for row in df.itertuples(index=False):
+            query = str(getattr(row, "query", "") or "").strip()
+            if not query or query == "nan":
+                continue
+            settings = _parse_settings(getattr(row, "settings", None))
+            ts = pd.to_datetime(getattr(row, "timestamp"), utc=True, errors="coerce") if has_ts else None
+            requests_out.append({
+                "log": path,
+                "query": query,
+                "history": list(history[-max_history:]) if use_history else [],
+                "uq_method": getattr(row, "uncertainty_method", None),
+                "n_samples": int(settings.get("n_samples", 1) or 1),
+                "temperature": settings.get("temperature"),
+                "top_p": settings.get("top_p"),
+                "max_new_tokens": settings.get("max_new_tokens"),
+                "top_k": settings.get("top_k"),
+                "timestamp": None if ts is None or pd.isna(ts) else ts.timestamp(),
+            })
+            history.append({"user": query, "assistant": str(getattr(row, "answer", "") or "")})
+    return requests_out
+
+
+def schedule(requests_in: list[dict], speed: float, interval: float) -> list[float]:
+    """
+    Arrival offsets (seconds from replay start). Logged timestamps are used when
+    present and monotone within a log; otherwise rows are spaced by `interval`.
+    Gaps are divided by `speed`.
+    """
+    offsets = []
+    t = 0.0
+    prev = None
+    for req in requests_in:
+        ts = req["timestamp"]
+        if prev is not None and ts is not None and prev["timestamp"] is not None \
+                and prev["log"] == req["log"] and ts >= prev["timestamp"]:
+            gap = ts - prev["timestamp"]
+        elif prev is None:
+            gap = 0.0
+        else:
+            gap = interval
+        t += gap / speed if speed > 0 else 0.0
+        offsets.append(t)
+        prev = req
+    return offsets
+
+
+def cache_stats() -> dict:
+    """
+    Hit/miss counters of the process-wide caches the pipeline goes through, and the
+    state of the models in the registry.
+    """
+    info = core.get_config.cache_info()
+    stats = {"get_config": {"hits": info.hits, "misses": info.misses, "size": info.currsize},
+             "models": core.get_models().status()}
+    if stats["models"].get("reranker", {}).get("state") == "ready":
+        stats["rerank_scores"] = core.get_reranker().stats()
+    return stats
+
+
+class Replayer:
+    def __init__(self, cfg: dict, api_url: str, use_scaler: bool = True):
+        self.cfg = cfg
+        self.api_url = api_url
+        self.records = []
+        self._lock = threading.Lock()
+        self._estimators = {}
+        try:
+            self.scaler = init_scaler(cfg) if use_scaler else None
+        except (FileNotFoundError, KeyError):
+            self.scaler = None
+
+    def estimator(self, method: str | None):
+        method = method if isinstance(method, str) and method else self.cfg["uncertainty"]["method"]
+        with self._lock:
+            if method not in self._estimators:
+                self._estimators[method] = init_estimator(self.cfg, override_method=method)
+            return self._estimators[method]
+
+    def run_one(self, req: dict, scheduled_at: float, replay_start: float) -> None:
+        gen_cfg = self.cfg["generation"]
+        started = time.perf_counter()
+        record = {"query": req["query"], "uq_method": req["uq_method"], "n_samples": req["n_samples"],
+                  "queue_delay": started - (replay_start + scheduled_at), "error": None, "timings": {}}
+        try:
+            provider = OllamaProvider(
+                api_url=self.api_url,
+                model_id="mock",
+                temperature=req["temperature"] if req["temperature"] is not None else gen_cfg["temperature"],
+                top_p=req["top_p"] if req["top_p"] is not None else gen_cfg["top_p"],
+                max_new_tokens=req["max_new_tokens"] or gen_cfg["max_new_tokens"],
+            )
+            estimator = self.estimator(req["uq_method"]) if req["n_samples"] > 1 else None
+            result = rag_pipeline(
+                query=req["query"],
+                top_k=req["top_k"] or self.cfg["retrieval"]["top_k"],
+                provider=provider,
+                device=self.cfg.get("device", "cpu"),
+                n_samples=req["n_samples"],
+                estimator=estimator,
+                scaler=self.scaler,
+                chat_history=req["history"],
+            )
+            if result is None:
+                raise RuntimeError("rag_pipeline returned None (empty collection?)")
+            record["timings"] = result.get("timings", {})
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            record["traceback"] = traceback.format_exc(limit=3)
+        record["latency"] = time.perf_counter() - started
+        with self._lock:
+            self.records.append(record)
+
+    def run(self, requests_in: list[dict], offsets: list[float], max_concurrency: int) -> float:
+        replay_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="replay") as pool:
+            for i, (req, offset) in enumerate(zip(requests_in, offsets), start=1):
+                delay = replay_start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.run_one, req, offset, replay_start)
+                if i % 10 == 0:
+                    print(f"[replay] dispatched {i}/{len(requests_in)}", file=sys.stderr)
+        return time.perf_counter() - replay_start
+
+
+def summarise(records: list[dict], requests_in: list[dict], duration: float) -> dict:
+    ok = [r for r in records if r["error"] is None]
+    seen, repeats = set(), set()
+    for req in requests_in:
+        (repeats if req["query"] in seen else seen).add(req["query"])
+    first = [r for r in ok if r["query"] not in repeats]
+    again = [r for r in ok if r["query"] in repeats]
+    stages = sorted({k for r in ok for k in r["timings"]})
+    return {
+        "requests": len(records),
+        "failed": len(records) - len(ok),
+        "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+        "errors_by_type": dict(Counter(r["error"].split(":")[0] for r in records if r["error"])),
+        "duration_s": duration,
+        "throughput_rps": len(ok) / duration if duration else 0.0,
+        "latency": percentiles([r["latency"] for r in ok]),
+        "queue_delay": percentiles([max(0.0, r["queue_delay"]) for r in ok]),
+        "stage_latency": {s: percentiles([r["timings"].get(s) for r in ok]) for s in stages},
+        "latency_by_uq_method": {
+            str(m): percentiles([r["latency"] for r in ok if r["uq_method"] == m])
+            for m in sorted({str(r["uq_method"]) for r in ok})
+        },
+        "traffic_mix": {
+            "uq_method": dict(Counter(str(r["uq_method"]) for r in requests_in)),
+            "n_samples": dict(Counter(str(r["n_samples"]) for r in requests_in)),
+            "distinct_queries": len(seen),
+            "repeated_query_share": sum(r["query"] in repeats for r in requests_in) / len(requests_in),
+        },
+        # queries that occur more than once are where result/score caches can pay off
+        "latency_unique_queries": percentiles([r["latency"] for r in first]),
+        "latency_repeated_queries": percentiles([r["latency"] for r in again]),
+        "sample_errors": [r.get("traceback") for r in records if r["error"]][:5],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay logged queries against the current RAG pipeline")
+    parser.add_argument("--logs", nargs="+", default=DEFAULT_LOGS, help="experiment_results.csv files to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (2 = twice as fast, 0 = no waiting)")
+    parser.add_argument("--interval", type=float, default=5.0, help="Gap in seconds for rows without timestamps")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Upper bound on in-flight requests")
+    parser.add_argument("--max-history", type=int, default=6, help="Turns of logged history attached to each request")
+    parser.add_argument("--no-history", dest="use_history", action="store_false", help="Replay every query without history")
+    parser.add_argument("--limit", type=int, default=None, help="Only replay the first N requests")
+    parser.add_argument("--api-url", default=None, help="Real /api/generate endpoint; omit to use the mock server")
+    parser.add_argument("--ttft", type=float, default=None, help="Mock server time-to-first-token")
+    parser.add_argument("--tps", type=float, default=None, help="Mock server tokens/sec")
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/replay_<time>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's own console output")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    cfg = get_config()
+
+    requests_in = load_requests(args.logs, args.max_history, args.use_history)[:args.limit]
+    if not requests_in:
+        sys.exit(f"No requests found in {args.logs}")
+    offsets = schedule(requests_in, args.speed, args.interval)
+    print(f"[replay] {len(requests_in)} requests over {offsets[-1]:.1f}s of scheduled time", file=sys.stderr)
+
+    server = None
+    if args.api_url:
+        api_url = args.api_url
+    else:
+        settings = load_mock_settings(port=0, ttft=args.ttft, tokens_per_sec=args.tps)
+        server, _ = start_mock_server(settings)
+        api_url = f"http://{settings.host}:{server.server_address[1]}/api/generate"
+
+    replayer = Replayer(cfg, api_url)
+    sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with sink, ResourceSampler() as sampler:
+        duration = replayer.run(requests_in, offsets, args.max_concurrency)
+
+    report = {
+        "meta": run_metadata(vars(args)),
+        "backend": api_url,
+        "results": summarise(replayer.records, requests_in, duration),
+        "caches": cache_stats(),
+        "resources": sampler.summary(),
+    }
+    if server is not None:
+        report["mock_server"] = dict(server.llm.stats)
+        server.shutdown()
+
+    res = report["results"]
+    print(f"replayed={res['requests']} failed={res['failed']} "
+          f"p50={res['latency'].get('p50', float('nan')):.2f}s p95={res['latency'].get('p95', float('nan')):.2f}s "
+          f"repeated queries={res['traffic_mix']['repeated_query_share']:.0%}")
+    write_report(report, args.output or default_report_path("replay"))
+
+
+if __name__ == "__main__":
+    main()
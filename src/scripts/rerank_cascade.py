@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+How many rerank candidates can the cascade drop without changing the final context?
+
+Every test-set query is retrieved exactly like rag_pipeline does and *all*
+candidates are cross-encoded once; their leg scores and rerank scores are cached in
+--scores-file, so re-runs only analyse. The reference answer context is the
+max_docs / threshold / min_docs selection over all candidates. For a fused ranking
+(retrievers/cascade.py) a shortlist of size S gives the same selection exactly when
+it contains every reference document, so per query the smallest safe S is the fused
+position of the worst-ranked selected document. Reported per ranking:
+  • share of queries whose selection is unchanged at each --shortlists size
+  • percentiles of the smallest safe shortlist
+  • the smallest size that keeps the selection for --target of the queries
+The linear blend is evaluated for every --weights value and the best one is
+suggested as retrieval.cascade.semantic_weight. "retrieval" is the plain
+candidate order (semantic first, then BM25), for reference.
+
+Examples
+--------
+$ uv run -m scripts.rerank_cascade
+$ uv run -m scripts.rerank_cascade --limit 100 --shortlists 10 20 30 --target 0.95
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from internal.core import (get_config, get_chunk_store, get_vector_store, get_embedding_model, retrieve_candidates,
+                           rerank_documents, select_documents)
+from internal.retrievers.cascade import fused_order
+from internal.benchmarking.utils import percentiles, run_metadata, write_report, default_report_path
+from scripts.load_test import DEFAULT_QUERY_FILES, load_queries
+
+
+def score_queries(queries: list[str], retr_cfg: dict, scores_file: str, device: str) -> list[dict]:
+    """Candidates (retrieval order) with leg and rerank scores per query, cached as JSON lines."""
+    cached = {}
+    if os.path.exists(scores_file):
+        with open(scores_file, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                cached[record["query"]] = record
+    todo = [q for q in dict.fromkeys(queries) if q not in cached]
+    if todo:
+        print(f"[cascade] cross-encoding all candidates of {len(todo)} queries ({len(cached)} cached)")
+        model = get_embedding_model(device)
+        collection = get_vector_store(retr_cfg.get('vector_store', 'chroma'))
+        store = get_chunk_store()
+        os.makedirs(os.path.dirname(scores_file) or ".", exist_ok=True)
+        with open(scores_file, "a", encoding="utf-8") as f:
+            for i, query in enumerate(todo, 1):
+                docs, _ = retrieve_candidates(query, query, model, collection, retr_cfg)
+                candidates = [{"id": d["id"], "distance": d.get("distance"), "bm25_score": d.get("bm25_score")}
+                              for d in docs]
+                reranked = rerank_documents(query, store.hydrate(docs))
+                rerank = {d["id"]: float(d["rerank_score"]) for d in reranked}
+                for c in candidates:
+                    c["rerank_score"] = rerank[c["id"]]
+                record = {"query": query, "candidates": candidates}
+                f.write(json.dumps(record) + "\n")
+                cached[query] = record
+                if i % 20 == 0:
+                    print(f"[cascade]   {i}/{len(todo)}")
+    return [cached[q] for q in dict.fromkeys(queries)]
+
+
+def safe_sizes(records: list[dict], order_fn, retr_cfg: dict) -> np.ndarray:
+    """Smallest shortlist per query that keeps the reference selection."""
+    sizes = []
+    for record in records:
+        docs = record["candidates"]
+        ranked = sorted(docs, key=lambda d: d["rerank_score"], reverse=True)
+        selected = {d["id"] for d in select_documents(
+            ranked, threshold=retr_cfg.get('threshold', 0.3), min_docs=retr_cfg.get('min_docs', 0),
+            max_docs=retr_cfg.get('max_docs', 10))}
+        position = {docs[i]["id"]: p for p, i in enumerate(order_fn(docs), 1)}
+        sizes.append(max((position[cid] for cid in selected), default=0))
+    return np.array(sizes)
+
+
+def summarise(sizes: np.ndarray, shortlists: list[int], target: float) -> dict:
+    needed = int(np.ceil(np.quantile(sizes, target))) if len(sizes) else 0
+    return {
+        "unchanged_share": {str(s): float(np.mean(sizes <= s)) for s in shortlists},
+        "safe_size": percentiles(sizes.tolist()),
+        "size_for_target": needed,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shortlist size of the rerank cascade vs. the final context")
+    parser.add_argument("--query-files", nargs="+", default=DEFAULT_QUERY_FILES, help="Test-set CSVs")
+    parser.add_argument("--limit", type=int, default=None, help="Use only the first N queries")
+    parser.add_argument("--shortlists", nargs="+", type=int, default=[10, 20, 30, 40, 50, 75])
+    parser.add_argument("--target", type=float, default=0.99, help="Share of queries whose selection must not change")
+    parser.add_argument("--weights", nargs="+", type=float, default=[round(w, 1) for w in np.arange(0, 1.01, 0.1)],
+                        help="semantic_weight values of the linear blend")
+    parser.add_argument("--rrf-k", type=int, default=60)
+    parser.add_argument("--scores-file", default="output/benchmarks/cascade_scores.jsonl",
+                        help="Cache of candidate and rerank scores per query")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--output", default=None, help="Report path (default output/benchmarks/cascade_<time>.json)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    retr_cfg = get_config().get('retrieval', {})
+    queries = load_queries(args.query_files)[:args.limit]
+    records = score_queries(queries, retr_cfg, args.scores_file, args.device)
+
+    rankings = {
+        "retrieval": lambda docs: np.arange(len(docs)),
+        "rrf": lambda docs: fused_order(docs, "rrf", rrf_k=args.rrf_k),
+    }
+    for w in args.weights:
+        rankings[f"linear_{w:.2f}"] = lambda docs, w=w: fused_order(docs, "linear", semantic_weight=w)
+
+    report = {"meta": run_metadata(vars(args)), "queries": len(records),
+              "candidates_mean": float(np.mean([len(r["candidates"]) for r in records])), "rankings": {}}
+    for name, order_fn in rankings.items():
+        row = summarise(safe_sizes(records, order_fn, retr_cfg), args.shortlists, args.target)
+        report["rankings"][name] = row
+        shares = "  ".join(f"{s}:{row['unchanged_share'][str(s)]:.2f}" for s in args.shortlists)
+        print(f"[cascade] {name:12s} size for {args.target:.0%}: {row['size_for_target']:4d}   unchanged {shares}")
+
+    linear = {k: v for k, v in report["rankings"].items() if k.startswith("linear_")}
+    if linear:
+        best = min(linear, key=lambda k: linear[k]["size_for_target"])
+        best_method = "rrf" if report["rankings"]["rrf"]["size_for_target"] <= linear[best]["size_for_target"] else "linear"
+        size = report["rankings"]["rrf" if best_method == "rrf" else best]["size_for_target"]
+        report["suggested"] = {"method": best_method, "semantic_weight": float(best[len("linear_"):]),
+                               "rrf_k": args.rrf_k, "shortlist": size}
+        print(f"[cascade] suggested retrieval.cascade: {report['suggested']}")
+
+    write_report(report, args.output or default_report_path("cascade"))
+
+
+if __name__ == "__main__":
+    main()